@@ -1,61 +1,105 @@
+import os
+
 import dash_bootstrap_components as dbc
 from dash import Dash, html, dcc, Input, Output
 from core.data_manager import DataManager
+from core.executor import chart_executor
 from tabs.overview.layout import OverviewTab
 from tabs.customers.layout import CustomersTab
 from tabs.sales.layout import SalesTab
 from tabs.marketing.layout import MarketingTab
 from tabs.operations.layout import OperationsTab
 from components.navbar import create_navbar
+from core.instrumentation import callback_instrumentation
+from core.metrics import install_metrics
+from core.profiling import callback_profiler
+from core.reloader import DataReloader, LiveData
+from core.warmup import start_warm_up
+
+
+def create_app():
+    """
+    Фабрика приложения: загружает данные, прогревает кэши и регистрирует
+    callbacks. Для продакшена - wsgi.py под gunicorn (gunicorn.conf.py)
+    """
+    app = Dash(
+        __name__,
+        external_stylesheets=[dbc.themes.BOOTSTRAP],
+        suppress_callback_exceptions=True,
+    )
+    app.title = "Малинка - Analytics Dashboard"
+    # Время, фазы и размер ответа каждого callback; медленные вызовы - в журнал
+    # (DASHBOARD_SLOW_CALLBACK_MS, DASHBOARD_SLOW_CALLBACK_LOG)
+    callback_instrumentation.install(app)
+
+    # DASHBOARD_DATA_DIR - каталог с CSV (по умолчанию data).
+    # DASHBOARD_SHARED_DIR - каталог общего хранилища таблиц: воркеры,
+    # запущенные позже или перезапущенные, отображают таблицы оттуда без
+    # разбора CSV и без своей копии данных
+    data_manager = DataManager(
+        data_dir=os.environ.get("DASHBOARD_DATA_DIR", "data"),
+        shared_dir=os.environ.get("DASHBOARD_SHARED_DIR"),
+    )
+    data_loaded = data_manager.load_data()
+
+    if not data_loaded:
+        print("Внимание: Данные не загружены. Проверьте наличие CSV файлов.")
+
+    # Вкладки работают с данными через LiveData: при изменении CSV
+    # DataReloader подменяет снимок данных целиком, не останавливая сервер
+    live_data = LiveData(data_manager)
+
+    overview_tab = OverviewTab(live_data)
+    customers_tab = CustomersTab(live_data)
+    sales_tab = SalesTab(live_data)
+    marketing_tab = MarketingTab(live_data)
+    operations_tab = OperationsTab(live_data)
+    tabs = [overview_tab, customers_tab, sales_tab, marketing_tab, operations_tab]
+
+    # KPI и графики без фильтров считаются заранее, чтобы первый посетитель после
+    # запуска не ждал холодных расчетов (режим - DASHBOARD_WARMUP)
+    start_warm_up(tabs)
+
+    reloader = DataReloader.from_env(live_data, tabs)
+    reloader.install(app.server)
+    # Метрики callbacks, кэшей и данных в формате Prometheus
+    install_metrics(app.server, live_data, reloader)
+    # Профилирование отдельных вызовов по заголовку или через /_profiling
+    # (только с DASHBOARD_PROFILE_TOKEN)
+    callback_profiler.install(app)
+
+    app.layout = html.Div(
+        [
+            dcc.Location(id="url", refresh=False),
+            create_navbar(),
+            html.Div(id="page-content", className="content-container"),
+            dcc.Store(id="filter-store", data={}),
+        ]
+    )
+
+    @app.callback(Output("page-content", "children"), [Input("url", "pathname")])
+    def display_page(pathname):
+        if pathname == "/customers":
+            return customers_tab.get_layout()
+        elif pathname == "/sales":
+            return sales_tab.get_layout()
+        elif pathname == "/marketing":
+            return marketing_tab.get_layout()
+        elif pathname == "/operations":
+            return operations_tab.get_layout()
+        else:
+            return overview_tab.get_layout()
+
+    overview_tab.register_callbacks(app)
+    customers_tab.register_callbacks(app)
+    sales_tab.register_callbacks(app)
+    marketing_tab.register_callbacks(app)
+    operations_tab.register_callbacks(app)
+
+    return app
 
-app = Dash(
-    __name__,
-    external_stylesheets=[dbc.themes.BOOTSTRAP],
-    suppress_callback_exceptions=True,
-)
-app.title = "Малинка - Analytics Dashboard"
-
-data_manager = DataManager()
-data_loaded = data_manager.load_data()
-
-if not data_loaded:
-    print("Внимание: Данные не загружены. Проверьте наличие CSV файлов.")
-
-overview_tab = OverviewTab(data_manager)
-customers_tab = CustomersTab(data_manager)
-sales_tab = SalesTab(data_manager)
-marketing_tab = MarketingTab(data_manager)
-operations_tab = OperationsTab(data_manager)
-
-app.layout = html.Div(
-    [
-        dcc.Location(id="url", refresh=False),
-        create_navbar(),
-        html.Div(id="page-content", className="content-container"),
-        dcc.Store(id="filter-store", data={}),
-    ]
-)
-
-
-@app.callback(Output("page-content", "children"), [Input("url", "pathname")])
-def display_page(pathname):
-    if pathname == "/customers":
-        return customers_tab.get_layout()
-    elif pathname == "/sales":
-        return sales_tab.get_layout()
-    elif pathname == "/marketing":
-        return marketing_tab.get_layout()
-    elif pathname == "/operations":
-        return operations_tab.get_layout()
-    else:
-        return overview_tab.get_layout()
-
-
-overview_tab.register_callbacks(app)
-customers_tab.register_callbacks(app)
-sales_tab.register_callbacks(app)
-marketing_tab.register_callbacks(app)
-operations_tab.register_callbacks(app)
 
 if __name__ == "__main__":
+    app = create_app()
+    chart_executor.start()
     app.run(host='0.0.0.0', port=8050, debug=False)
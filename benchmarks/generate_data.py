@@ -0,0 +1,393 @@
+"""
+Генератор синтетических данных для бенчмарков: те же файлы и колонки, что в
+data/, в масштабе scale от объема выборки (scale=1 - около 130 тыс. продаж
+и 50 тыс. клиентов). Распределения неравномерные, как в жизни: популярность
+товаров и активность клиентов - по степенному закону, продажи растут к концу
+года и в выходные, днем и вечером их больше, чем ночью. Данные зависят
+только от seed.
+
+    python -m benchmarks.generate_data --scale 10 --out /tmp/bench-x10
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Объемы при scale=1
+BASE_ROWS = {
+    "customers": 50_000,
+    "sales": 130_000,
+    "events": 60_000,
+    "traffic": 50_000,
+    "customer_support": 50_000,
+    "ad_revenue": 1_080,
+}
+# Справочники от масштаба не зависят
+PRODUCTS = 500
+SUPPLIERS = 20
+WAREHOUSES = 5
+
+START = np.datetime64("2025-01-01")
+DAYS = 365
+CHUNK_ROWS = 1_000_000
+
+REGIONS = {"Moscow": 0.4, "SPB": 0.25, "Kazan": 0.2, "Ekaterinburg": 0.15}
+SEGMENTS = {
+    "new": 0.25,
+    "returning": 0.25,
+    "loyal": 0.2,
+    "discount_hunter": 0.15,
+    "high_spender": 0.05,
+    "churn_risk": 0.1,
+}
+CATEGORIES = {
+    "Electronics": 0.25,
+    "Clothes": 0.25,
+    "Home": 0.2,
+    "Beauty": 0.15,
+    "Food": 0.15,
+}
+# Доля возвратов и их причины по категориям
+RETURN_RATES = {
+    "Electronics": 0.15,
+    "Clothes": 0.25,
+    "Home": 0.1,
+    "Beauty": 0.12,
+    "Food": 0.05,
+}
+REASONS = ["wrong_size", "damaged", "defect", "other"]
+PAYMENT_METHODS = {"card": 0.55, "sbp": 0.25, "cash": 0.1, "installment": 0.1}
+CHANNELS = {
+    "yandex": 0.3,
+    "organic": 0.25,
+    "vk": 0.2,
+    "malinka_ads": 0.15,
+    "mail.ru_search": 0.1,
+}
+DEVICES = {"mobile": 0.6, "desktop": 0.32, "tablet": 0.08}
+EVENT_TYPES = {"page_view": 0.7, "add_to_cart": 0.2, "purchase": 0.1}
+PAGES = {"/home": 0.3, "/product": 0.55, "/checkout": 0.15}
+ISSUE_TYPES = {
+    "delivery_delay": 0.35,
+    "product_question": 0.3,
+    "refund": 0.2,
+    "account": 0.15,
+}
+# Активность по часам суток: ночью почти нет, пики днем и вечером
+HOUR_WEIGHTS = np.array(
+    [1, 0.5, 0.3, 0.2, 0.2, 0.4, 1, 2, 3, 4, 4.5, 5]
+    + [6, 6, 5, 4.5, 4.5, 5, 6, 7, 7, 6, 4, 2]
+)
+
+
+def _choice(rng, weights, size):
+    """Значения словаря weights (значение -> вероятность)"""
+    values = np.array(list(weights))
+    p = np.array(list(weights.values()), dtype="float64")
+    return values[rng.choice(len(values), size, p=p / p.sum())]
+
+
+def _day_weights():
+    """Вес каждого дня года: рост к концу года, выходные, ноябрь-декабрь"""
+    days = np.arange(DAYS)
+    dates = START + days
+    weekday = (dates.astype("datetime64[D]").view("int64") + 3) % 7
+    weights = 1 + 0.5 * days / DAYS
+    weights *= np.where(weekday >= 5, 1.2, 1.0)
+    weights *= np.where(days >= 304, 1.4, 1.0)
+    return weights / weights.sum()
+
+
+def _timestamps(rng, size, dates_only=False):
+    """Случайные моменты года по профилю дней и часов, по возрастанию"""
+    days = np.sort(rng.choice(DAYS, size, p=_day_weights()))
+    result = START + days.astype("timedelta64[D]")
+    if dates_only:
+        return result.astype("datetime64[s]")
+    hours = rng.choice(24, size, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    seconds = hours * 3600 + rng.integers(0, 3600, size)
+    times = result.astype("datetime64[s]") + seconds.astype("timedelta64[s]")
+    return np.sort(times)
+
+
+def _chunks(total):
+    for start in range(0, total, CHUNK_ROWS):
+        yield start, min(start + CHUNK_ROWS, total)
+
+
+def _write(df, path, first, index=False):
+    df.to_csv(path, mode="w" if first else "a", header=first, index=index)
+
+
+class DataGenerator:
+    """Пишет все таблицы дашборда в каталог out"""
+
+    def __init__(self, out, scale=1.0, seed=42, events_part_rows=1_000_000):
+        self.out = out
+        self.scale = scale
+        self.rng = np.random.default_rng(seed)
+        self.events_part_rows = events_part_rows
+        self.rows = {name: max(int(n * scale), 1) for name, n in BASE_ROWS.items()}
+        self.products = None
+        # Порядок популярности номеров 1..n для каждого n и показателя степени
+        self._popularity = {}
+
+    def _path(self, name):
+        return os.path.join(self.out, name)
+
+    def _power_law(self, n, exponent, size):
+        """
+        Номера 1..n со степенной популярностью: i-й по популярности встречается
+        в i**exponent раз реже первого. Какие номера популярны, выбирается
+        случайно один раз, так что во всех таблицах и частях файлов они одни
+        """
+        key = (n, exponent)
+        if key not in self._popularity:
+            weights = np.arange(1, n + 1, dtype="float64") ** -exponent
+            self._popularity[key] = (np.cumsum(weights), self.rng.permutation(n))
+        cdf, order = self._popularity[key]
+        ranks = np.searchsorted(cdf, self.rng.random(size) * cdf[-1])
+        return order[ranks] + 1
+
+    def generate(self):
+        os.makedirs(self.out, exist_ok=True)
+        for step in (
+            self.suppliers,
+            self.products_table,
+            self.user_segments,
+            self.inventory,
+            self.sales_and_returns,
+            self.events,
+            self.traffic,
+            self.customer_support,
+            self.ad_revenue,
+        ):
+            started = time.perf_counter()
+            name = step()
+            print(f"{name}: {time.perf_counter() - started:.1f} с")
+
+    def suppliers(self):
+        ids = np.arange(1, SUPPLIERS + 1)
+        pd.DataFrame(
+            {
+                "supplier_id": ids,
+                "supplier_name": [f"Supplier_{i}" for i in ids],
+                "region": _choice(self.rng, REGIONS, SUPPLIERS),
+                "rating": self.rng.uniform(3.0, 5.0, SUPPLIERS).round(2),
+            }
+        ).to_csv(self._path("suppliers.csv"), index=False)
+        return "suppliers"
+
+    def products_table(self):
+        ids = np.arange(1, PRODUCTS + 1)
+        self.products = pd.DataFrame(
+            {
+                "product_id": ids,
+                "product_name": [f"Product_{i}" for i in ids],
+                "category": _choice(self.rng, CATEGORIES, PRODUCTS),
+                "price": np.clip(
+                    self.rng.lognormal(8.0, 1.0, PRODUCTS), 200, 20000
+                ).round(2),
+                # Несколько крупных поставщиков и много мелких
+                "supplier_id": self._power_law(SUPPLIERS, 0.8, PRODUCTS),
+            }
+        )
+        self.products.to_csv(self._path("products.csv"), index=False)
+        return "products"
+
+    def user_segments(self):
+        n = self.rows["customers"]
+        registration = np.datetime64("2020-01-01") + self.rng.integers(
+            0, 1826, n
+        ).astype("timedelta64[D]")
+        pd.DataFrame(
+            {
+                "customer_id": np.arange(1, n + 1),
+                "segment": _choice(self.rng, SEGMENTS, n),
+                "region": _choice(self.rng, REGIONS, n),
+                "registration_date": registration,
+            }
+        ).to_csv(self._path("user_segments.csv"), index=False)
+        return "user_segments"
+
+    def inventory(self):
+        # Десятая часть товаров почти закончилась
+        low = self.rng.random(PRODUCTS) < 0.1
+        stock = np.where(
+            low,
+            self.rng.integers(0, 10, PRODUCTS),
+            self.rng.integers(10, 1000, PRODUCTS),
+        )
+        updated = _timestamps(self.rng, PRODUCTS)
+        pd.DataFrame(
+            {
+                "product_id": np.arange(1, PRODUCTS + 1),
+                "warehouse_id": self.rng.integers(1, WAREHOUSES + 1, PRODUCTS),
+                "stock_quantity": stock,
+                "last_updated": self.rng.permutation(updated),
+            }
+        ).to_csv(self._path("inventory.csv"), index=False)
+        return "inventory"
+
+    def _customers(self, size):
+        # Немногие клиенты покупают часто, большинство - изредка
+        return self._power_law(self.rows["customers"], 0.7, size)
+
+    def sales_and_returns(self):
+        n = self.rows["sales"]
+        times = _timestamps(self.rng, n)
+        categories = self.products.set_index("product_id")["category"]
+        return_id = 0
+        for first, (start, end) in enumerate(_chunks(n)):
+            size = end - start
+            products = self._power_law(PRODUCTS, 1.1, size)
+            sales = pd.DataFrame(
+                {
+                    "transaction_id": np.arange(start + 1, end + 1),
+                    "customer_id": self._customers(size),
+                    "product_id": products,
+                    "quantity": self.rng.choice(4, size, p=[0.6, 0.25, 0.1, 0.05]) + 1,
+                    "payment_method": _choice(self.rng, PAYMENT_METHODS, size),
+                    "transaction_date": times[start:end],
+                }
+            )
+            _write(sales, self._path("sales.csv"), first == 0)
+
+            category = categories.reindex(products).to_numpy()
+            rate = pd.Series(category).map(RETURN_RATES).to_numpy()
+            returned = sales[self.rng.random(size) < rate]
+            reason_p = np.where(
+                category[returned.index] == "Clothes", 0.6, 0.1
+            )  # вероятность wrong_size
+            reasons = np.where(
+                self.rng.random(len(returned)) < reason_p,
+                "wrong_size",
+                self.rng.choice(REASONS[1:], len(returned)),
+            )
+            returns = pd.DataFrame(
+                {
+                    "return_id": np.arange(
+                        return_id + 1, return_id + len(returned) + 1
+                    ),
+                    "transaction_id": returned["transaction_id"].to_numpy(),
+                    "customer_id": returned["customer_id"].to_numpy(),
+                    "product_id": returned["product_id"].to_numpy(),
+                    "reason": reasons,
+                },
+                # Исходный returns.csv записан с индексом pandas
+                index=pd.RangeIndex(return_id, return_id + len(returned)),
+            )
+            return_id += len(returned)
+            _write(returns, self._path("returns.csv"), first == 0, index=True)
+        return "sales, returns"
+
+    def events(self):
+        n = self.rows["events"]
+        times = _timestamps(self.rng, n)
+        parts = max(2, -(-n // self.events_part_rows))
+        bounds = np.linspace(0, n, parts + 1).astype(int)
+        for part, (part_start, part_end) in enumerate(zip(bounds, bounds[1:]), 1):
+            path = self._path(f"events_part{part}.csv")
+            for start in range(part_start, part_end, CHUNK_ROWS):
+                end = min(start + CHUNK_ROWS, part_end)
+                size = end - start
+                events = pd.DataFrame(
+                    {
+                        "event_id": np.arange(start + 1, end + 1),
+                        "customer_id": self._customers(size),
+                        "event_type": _choice(self.rng, EVENT_TYPES, size),
+                        "event_timestamp": times[start:end],
+                        "page_url": _choice(self.rng, PAGES, size),
+                        "product_id": self._power_law(PRODUCTS, 1.1, size),
+                    }
+                )
+                _write(events, path, start == part_start)
+        return f"events ({parts} частей)"
+
+    def traffic(self):
+        n = self.rows["traffic"]
+        times = _timestamps(self.rng, n)
+        for first, (start, end) in enumerate(_chunks(n)):
+            size = end - start
+            traffic = pd.DataFrame(
+                {
+                    "traffic_id": np.arange(start + 1, end + 1),
+                    "customer_id": self._customers(size),
+                    "channel": _choice(self.rng, CHANNELS, size),
+                    "session_start": times[start:end],
+                    "device": _choice(self.rng, DEVICES, size),
+                }
+            )
+            _write(traffic, self._path("traffic.csv"), first == 0)
+        return "traffic"
+
+    def customer_support(self):
+        n = self.rows["customer_support"]
+        dates = _timestamps(self.rng, n, dates_only=True)
+        for first, (start, end) in enumerate(_chunks(n)):
+            size = end - start
+            minutes = np.clip(self.rng.lognormal(5.0, 1.0, size), 5, 999).astype(int)
+            # Долгие обращения чаще остаются нерешенными
+            resolved = self.rng.random(size) < np.where(minutes > 600, 0.5, 0.85)
+            support = pd.DataFrame(
+                {
+                    "ticket_id": np.arange(start + 1, end + 1),
+                    "customer_id": self._customers(size),
+                    "issue_type": _choice(self.rng, ISSUE_TYPES, size),
+                    "resolution_time_minutes": minutes,
+                    "resolved": resolved,
+                    "support_date": dates[start:end],
+                }
+            )
+            _write(support, self._path("customer_support.csv"), first == 0)
+        return "customer_support"
+
+    def ad_revenue(self):
+        n = self.rows["ad_revenue"]
+        ids = np.arange(1, n + 1)
+        spend = self.rng.uniform(100, 500, n).round(2)
+        impressions = self.rng.lognormal(6.5, 0.6, n).astype(int) + 1
+        dates = START + np.sort(self.rng.integers(0, DAYS + 1, n)).astype(
+            "timedelta64[D]"
+        )
+        pd.DataFrame(
+            {
+                "ad_id": ids,
+                "campaign_name": [f"Campaign_{i}" for i in ids],
+                "product_id": self._power_law(PRODUCTS, 0.8, n),
+                "spend": spend,
+                "revenue": (spend * self.rng.lognormal(0.4, 0.5, n)).round(2),
+                "impressions": impressions,
+                "clicks": (impressions * self.rng.beta(2, 8, n)).astype(int),
+                "date": dates,
+            }
+        ).to_csv(self._path("ad_revenue.csv"), index=False)
+        return "ad_revenue"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", required=True, help="каталог для CSV")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="масштаб объема (1, 10, 100)"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--events-part-rows",
+        type=int,
+        default=1_000_000,
+        help="строк в одной части events_partN.csv",
+    )
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    DataGenerator(args.out, args.scale, args.seed, args.events_part_rows).generate()
+    elapsed = time.perf_counter() - started
+    print(f"Данные x{args.scale:g} записаны в {args.out} за {elapsed:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,610 @@
+"""
+Нагрузочный тест callbacks: виртуальные пользователи одновременно работают с
+дашбордом - открывают вкладки, применяют и сбрасывают фильтры, ждут тика
+интервала на вкладке операций. Запросы к /_dash-update-component строятся,
+как их строит браузер: callbacks берутся из /_dash-dependencies, и после
+каждого ответа вызываются те, чьи входы изменились (фильтр -> хранилище
+фильтров -> KPI и графики), а для новых компонентов - начальные вызовы.
+
+По умолчанию приложение создается в этом процессе и запросы идут через
+тестовый клиент Flask: это один процесс с --users потоками, как воркер
+gthread. Чтобы подобрать число воркеров, тест запускается с --url на сервер
+под gunicorn, а --pid мастера добавляет в отчет память всех его процессов.
+
+Отчет: пропускная способность, p50/p95/p99 времени каждого callback и
+каждого действия пользователя, пиковая память. --save-sessions сохраняет
+выполненные шаги со значениями фильтров, --sessions воспроизводит их снова.
+
+    python -m benchmarks.loadtest --data /tmp/bench-x10 --users 8 --steps 30
+    python -m benchmarks.loadtest --url http://127.0.0.1:8050 --pid 1234
+"""
+
+import argparse
+import contextlib
+import datetime
+import functools
+import http.client
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+from benchmarks.run import _git_commit
+
+UPDATE_PATH = "/_dash-update-component"
+TAB_PATHS = ["/", "/customers", "/sales", "/marketing", "/operations"]
+
+# Вероятности следующего действия пользователя. Действия, для которых на
+# вкладке нет компонентов (фильтров, интервала обновления), не выбираются
+ACTION_WEIGHTS = {"filter": 0.4, "reset": 0.15, "open": 0.2, "tick": 0.25}
+
+# Предел длины цепочки callbacks, вызванных одним действием
+MAX_CHAIN = 10
+
+
+class _TestClient:
+    """Запросы к приложению в этом процессе через тестовый клиент Flask"""
+
+    def __init__(self, server):
+        self._client = server.test_client()
+
+    def request(self, method, path, payload=None):
+        response = self._client.open(path, method=method, json=payload)
+        return response.status_code, response.get_data()
+
+
+class _HttpClient:
+    """Запросы к запущенному серверу по одному keep-alive соединению"""
+
+    def __init__(self, url, timeout=120):
+        parts = urllib.parse.urlsplit(url)
+        self._prefix = parts.path.rstrip("/")
+        self._connection = http.client.HTTPConnection(
+            parts.hostname, parts.port or 80, timeout=timeout
+        )
+
+    def request(self, method, path, payload=None):
+        body = None if payload is None else json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json"} if body else {}
+        try:
+            self._connection.request(method, self._prefix + path, body, headers)
+            response = self._connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            # Следующий запрос откроет соединение заново
+            self._connection.close()
+            raise
+
+
+def _index(node, index):
+    """Собирает props компонентов с id из дерева layout: id -> props"""
+    if isinstance(node, list):
+        for child in node:
+            _index(child, index)
+    elif isinstance(node, dict) and isinstance(node.get("props"), dict):
+        props = node["props"]
+        if isinstance(props.get("id"), str):
+            index[props["id"]] = props
+        for value in props.values():
+            _index(value, index)
+    return index
+
+
+def _has_components(value):
+    if isinstance(value, dict):
+        return "type" in value and "props" in value
+    if isinstance(value, list):
+        return any(_has_components(item) for item in value)
+    return False
+
+
+def _property(spec):
+    """(id, свойство) из "id.свойство"; суффикс allow_duplicate отбрасывается"""
+    component_id, prop = spec.rsplit(".", 1)
+    return component_id, prop.split("@")[0]
+
+
+class _Callback:
+    """Callback из /_dash-dependencies"""
+
+    def __init__(self, dependency):
+        self.output = dependency["output"]
+        specs = (
+            self.output[2:-2].split("...")
+            if self.output.startswith("..")
+            else [self.output]
+        )
+        self.outputs = [_property(spec) for spec in specs]
+        self.inputs = [(i["id"], i["property"]) for i in dependency["inputs"]]
+        self.state = [(s["id"], s["property"]) for s in dependency["state"]]
+        self.initial = not dependency.get("prevent_initial_call")
+        first = ".".join(self.outputs[0])
+        more = len(self.outputs) - 1
+        self.name = f"{first} (+{more})" if more else first
+
+    @classmethod
+    def supported(cls, dependency):
+        """Вызывается на сервере и не использует id-словари (pattern matching)"""
+        ids = [spec["id"] for spec in dependency["inputs"] + dependency["state"]]
+        return dependency.get("clientside_function") is None and all(
+            isinstance(i, str) for i in ids
+        )
+
+
+class Session:
+    """
+    Один пользователь в браузере: состояние компонентов страницы и вызов
+    callbacks по их изменениям. Время каждого запроса пишется в calls,
+    время действий целиком (со всей цепочкой callbacks) - в actions
+    """
+
+    def __init__(self, client, callbacks, rng):
+        self.client = client
+        self.callbacks = callbacks
+        self.rng = rng
+        self.layout = None
+        self.components = {}
+        self.path = None
+        self.calls = []
+        self.actions = []
+        self.errors = []
+
+    def _request(self, name, method, path, payload=None):
+        started = time.perf_counter()
+        try:
+            status, body = self.client.request(method, path, payload)
+        except (OSError, http.client.HTTPException) as e:
+            status, body = None, str(e).encode()
+        elapsed = time.perf_counter() - started
+        ok = status in (200, 204)
+        self.calls.append((name, elapsed, ok))
+        if not ok:
+            self.errors.append(f"{name}: {status} {body[:200]!r}")
+        return body if status == 200 else None
+
+    def _call(self, callback, changed):
+        def values(properties):
+            return [
+                {"id": i, "property": p, "value": self.components.get(i, {}).get(p)}
+                for i, p in properties
+            ]
+
+        payload = {
+            "output": callback.output,
+            "inputs": values(callback.inputs),
+            "state": values(callback.state),
+            "changedPropIds": [
+                f"{i}.{p}" for i, p in callback.inputs if (i, p) in changed
+            ],
+        }
+        body = self._request(callback.name, "POST", UPDATE_PATH, payload)
+        return json.loads(body).get("response", {}) if body else {}
+
+    def _apply(self, response):
+        """Применяет ответ callback; (изменившиеся свойства, новые компоненты)"""
+        changed, structure = set(), False
+        for component_id, props in response.items():
+            target = self.components.get(component_id)
+            if target is None:
+                continue
+            for prop, value in props.items():
+                target[prop] = value
+                changed.add((component_id, prop))
+                structure = structure or _has_components(value)
+        added = set()
+        if structure:
+            components = _index(self.layout, {})
+            added = set(components) - set(self.components)
+            self.components = components
+        return changed, added
+
+    def _fire(self, changed, added=()):
+        """Вызывает callbacks, затронутые изменениями, и цепочки за ними"""
+        for _ in range(MAX_CHAIN):
+            triggered = []
+            for callback in self.callbacks:
+                ids = [i for i, _ in callback.inputs + callback.outputs]
+                if not all(i in self.components for i in ids):
+                    continue
+                if any(p in changed for p in callback.inputs) or (
+                    callback.initial and any(i in added for i in ids)
+                ):
+                    triggered.append(callback)
+            if not triggered:
+                return
+            next_changed, next_added = set(), set()
+            for callback in triggered:
+                props, components = self._apply(self._call(callback, changed))
+                next_changed |= props
+                next_added |= components
+            changed, added = next_changed, next_added
+
+    def _set(self, component_id, prop, value):
+        self.components[component_id][prop] = value
+        return {(component_id, prop)}
+
+    def _click(self, component_id):
+        clicks = self.components[component_id].get("n_clicks") or 0
+        self._fire(self._set(component_id, "n_clicks", clicks + 1))
+
+    def _tab(self):
+        return self.path.strip("/") or "overview"
+
+    def load(self, path):
+        """Открывает страницу path с нуля, как при входе на сайт"""
+        body = self._request("layout", "GET", "/_dash-layout")
+        if body is None:
+            return
+        self.layout = json.loads(body)
+        self.components = _index(self.layout, {})
+        self.path = path
+        self._set("url", "pathname", path)
+        self._fire(set(), set(self.components))
+
+    def open(self, path):
+        """Переход на вкладку по ссылке в меню"""
+        self.path = path
+        self._fire(self._set("url", "pathname", path))
+
+    def filter(self, values=None):
+        """
+        Выбирает фильтры вкладки (случайно, если values не задан) и нажимает
+        "Применить"; возвращает выбранные значения или None, если фильтров нет
+        """
+        apply = f"{self._tab()}-apply-filters"
+        if apply not in self.components:
+            return None
+        if values is None:
+            values = self._random_filters()
+        self._click("filter-button")
+        changed = set()
+        for key, value in values.items():
+            component_id, prop = key.rsplit(".", 1)
+            if component_id in self.components:
+                changed |= self._set(component_id, prop, value)
+        self._fire(changed)
+        self._click(apply)
+        return values
+
+    def reset(self):
+        """Сброс фильтров вкладки и применение сброшенных значений"""
+        tab = self._tab()
+        if f"{tab}-reset-filters" not in self.components:
+            return False
+        self._click("filter-button")
+        self._click(f"{tab}-reset-filters")
+        self._click(f"{tab}-apply-filters")
+        return True
+
+    def tick(self):
+        """Срабатывание dcc.Interval на вкладке"""
+        if "interval-component" not in self.components:
+            return False
+        ticks = self.components["interval-component"].get("n_intervals") or 0
+        self._fire(self._set("interval-component", "n_intervals", ticks + 1))
+        return True
+
+    def _random_filters(self):
+        prefix = f"{self._tab()}-"
+        values = {}
+        for component_id, props in self.components.items():
+            if not component_id.startswith(prefix):
+                continue
+            if component_id.endswith("-filter") and props.get("options"):
+                options = [
+                    o["value"] if isinstance(o, dict) else o for o in props["options"]
+                ]
+                # Чаще всего выбирают одно значение или оставляют фильтр пустым
+                count = min(self.rng.choice([0, 0, 1, 1, 1, 2, 3]), len(options))
+                chosen = self.rng.sample(options, count)
+                if not props.get("multi"):
+                    chosen = chosen[0] if chosen else None
+                values[f"{component_id}.value"] = chosen
+            elif component_id.endswith("-date-range"):
+                first = props.get("min_date_allowed")
+                last = props.get("max_date_allowed")
+                if not first or not last:
+                    continue
+                first = datetime.date.fromisoformat(str(first)[:10])
+                days = (datetime.date.fromisoformat(str(last)[:10]) - first).days
+                start = self.rng.randint(0, days)
+                end = self.rng.randint(start, days)
+                values[f"{component_id}.start_date"] = str(
+                    first + datetime.timedelta(start)
+                )
+                values[f"{component_id}.end_date"] = str(
+                    first + datetime.timedelta(end)
+                )
+        return values
+
+    def _next_step(self):
+        """Случайное следующее действие по ACTION_WEIGHTS"""
+        if self.path is None:
+            return {"action": "load", "path": self.rng.choice(TAB_PATHS)}
+        weights = dict(ACTION_WEIGHTS)
+        if "interval-component" not in self.components:
+            weights.pop("tick")
+        if f"{self._tab()}-apply-filters" not in self.components:
+            weights.pop("filter")
+            weights.pop("reset")
+        action = self.rng.choices(list(weights), list(weights.values()))[0]
+        if action == "open":
+            path = self.rng.choice([p for p in TAB_PATHS if p != self.path])
+            return {"action": "open", "path": path}
+        return {"action": action}
+
+    def perform(self, step):
+        """Выполняет шаг сессии и возвращает его со значениями фильтров"""
+        step = dict(step)
+        action = step["action"]
+        started = time.perf_counter()
+        if action == "load":
+            self.load(step["path"])
+        elif action == "open":
+            self.open(step["path"])
+        elif action == "filter":
+            step["values"] = self.filter(step.get("values"))
+        elif action == "reset":
+            self.reset()
+        elif action == "tick":
+            self.tick()
+        else:
+            raise ValueError(f"Неизвестное действие: {action}")
+        self.actions.append((action, time.perf_counter() - started))
+        return step
+
+    def run(self, steps=None, count=0, think=0.0):
+        """
+        Выполняет шаги steps или count случайных шагов с паузами think
+        секунд в среднем; возвращает выполненные шаги
+        """
+        performed = []
+        for index in range(len(steps) if steps is not None else count):
+            if index and think:
+                time.sleep(self.rng.expovariate(1 / think))
+            step = steps[index] if steps is not None else self._next_step()
+            performed.append(self.perform(step))
+        return performed
+
+
+def _process_memory(pid):
+    """PSS процесса (RSS, если PSS недоступен), байты; None вне Linux"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _descendants(pid):
+    pids = [pid]
+    for current in pids:
+        try:
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+class MemorySampler:
+    """
+    Пиковая память процессов pids и их потомков (воркеров gunicorn) за время
+    теста. PSS делит общие после fork страницы между процессами, поэтому
+    сумма не считает данные мастера в каждом воркере заново
+    """
+
+    def __init__(self, pids, interval=0.1):
+        self.pids = pids
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self):
+        sizes = [
+            _process_memory(pid) for root in self.pids for pid in _descendants(root)
+        ]
+        sizes = [size for size in sizes if size is not None]
+        if sizes:
+            self.peak = max(self.peak or 0, sum(sizes))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+def _latency(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {
+        "count": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2),
+        "mean_ms": round(float(ms.mean()), 2),
+    }
+
+
+def _group(samples):
+    groups = {}
+    for name, seconds, *_ in samples:
+        groups.setdefault(name, []).append(seconds)
+    return {name: _latency(values) for name, values in sorted(groups.items())}
+
+
+def run_load_test(
+    make_client, users, steps=20, sessions=None, think=0.0, seed=0, pids=()
+):
+    """
+    Запускает users виртуальных пользователей в потоках. make_client()
+    создает клиент для пользователя; sessions - сохраненные шаги по
+    пользователям (иначе по steps случайных шагов). Возвращает (отчет,
+    выполненные сессии)
+    """
+    if sessions is not None:
+        users = len(sessions)
+    client = make_client()
+    status, body = client.request("GET", "/_dash-dependencies")
+    if status != 200:
+        raise RuntimeError(f"/_dash-dependencies: {status}")
+    dependencies = json.loads(body)
+    callbacks = [_Callback(d) for d in dependencies if _Callback.supported(d)]
+
+    results = [None] * users
+
+    def user(number):
+        session = Session(make_client(), callbacks, random.Random(seed + number))
+        planned = sessions[number] if sessions is not None else None
+        try:
+            performed = session.run(planned, steps, think)
+        except Exception as e:
+            session.errors.append(f"сессия прервана: {e}")
+            performed = []
+        results[number] = (session, performed)
+
+    threads = [
+        threading.Thread(target=user, args=(n,), name=f"user-{n}") for n in range(users)
+    ]
+    with MemorySampler(pids or [os.getpid()]) as memory:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+
+    calls = [c for session, _ in results for c in session.calls]
+    actions = [a for session, _ in results for a in session.actions]
+    errors = [e for session, _ in results for e in session.errors]
+    updates = [c for c in calls if c[0] != "layout"]
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "users": users,
+            "steps": steps if sessions is None else None,
+            "think_s": think,
+            "seed": seed,
+        },
+        "duration_s": round(duration, 3),
+        "requests": len(calls),
+        "errors": len(errors),
+        "throughput_rps": round(len(updates) / duration, 2) if duration else None,
+        "actions_per_s": round(len(actions) / duration, 2) if duration else None,
+        "peak_memory_bytes": memory.peak,
+        "callbacks": _group(updates),
+        "actions": _group(actions),
+        "error_samples": errors[:20],
+    }
+    return report, [performed for _, performed in results]
+
+
+def _print_report(report):
+    peak = report["peak_memory_bytes"]
+    print(
+        f"Пользователей: {report['meta']['users']}, "
+        f"время: {report['duration_s']:.1f} с, "
+        f"запросов: {report['requests']}, ошибок: {report['errors']}"
+    )
+    print(
+        f"Пропускная способность: {report['throughput_rps']} callback/с, "
+        f"{report['actions_per_s']} действий/с"
+    )
+    if peak is not None:
+        print(f"Пиковая память: {peak / 1024 ** 2:.0f} МБ")
+    for title, rows in (
+        ("callback", report["callbacks"]),
+        ("действие", report["actions"]),
+    ):
+        print(f"\n{title:<55} {'n':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+        for name, t in sorted(rows.items(), key=lambda item: -item[1]["p95_ms"]):
+            print(
+                f"{name:<55} {t['count']:>5} {t['p50_ms']:>8.1f} {t['p95_ms']:>8.1f} "
+                f"{t['p99_ms']:>8.1f} {t['max_ms']:>8.1f}"
+            )
+    for error in report["error_samples"]:
+        print(f"Ошибка: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="адрес запущенного сервера")
+    parser.add_argument("--data", help="каталог с CSV для приложения в этом процессе")
+    parser.add_argument(
+        "--pid",
+        type=int,
+        action="append",
+        help="процесс сервера для замера памяти (с потомками), с --url",
+    )
+    parser.add_argument(
+        "--users", type=int, default=8, help="виртуальных пользователей"
+    )
+    parser.add_argument("--steps", type=int, default=20, help="шагов на пользователя")
+    parser.add_argument(
+        "--think", type=float, default=0.0, help="средняя пауза между шагами, с"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sessions", help="JSON сохраненных сессий для повтора")
+    parser.add_argument("--save-sessions", help="куда сохранить выполненные сессии")
+    parser.add_argument("--output", help="файл JSON для отчета")
+    args = parser.parse_args(argv)
+
+    sessions = None
+    if args.sessions:
+        with open(args.sessions, encoding="utf-8") as f:
+            sessions = json.load(f)
+
+    if args.url:
+        make_client = functools.partial(_HttpClient, args.url)
+        pids = args.pid or ()
+    else:
+        if args.data:
+            os.environ["DASHBOARD_DATA_DIR"] = args.data
+        from app import create_app
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            server = create_app().server
+        make_client = functools.partial(_TestClient, server)
+        pids = ()
+
+    report, performed = run_load_test(
+        make_client, args.users, args.steps, sessions, args.think, args.seed, pids
+    )
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Отчет записан в {args.output}")
+    if args.save_sessions:
+        with open(args.save_sessions, "w", encoding="utf-8") as f:
+            json.dump(performed, f, ensure_ascii=False, indent=1)
+        print(f"Сессии записаны в {args.save_sessions}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
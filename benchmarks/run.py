@@ -0,0 +1,278 @@
+"""
+Бенчмарки дашборда: время загрузки данных (DataManager.load_data) и каждого
+публичного метода *Calculations и *Charts всех вкладок на наборе сценариев
+фильтров FILTER_SCENARIOS. Для метода замеряется холодный вызов (кэши
+расчетов и графиков пусты) и теплый (ответ из кэша). Результат пишется в
+JSON; с --compare сравнивается с прошлым прогоном, например другого коммита.
+
+    python -m benchmarks.generate_data --scale 10 --out /tmp/bench-x10
+    python -m benchmarks.run --data /tmp/bench-x10 --output x10.json
+    python -m benchmarks.run --data /tmp/bench-x10 --compare x10.json
+"""
+
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from core.data_manager import SHARED_TABLES, DataManager
+from tabs.customers.layout import CustomersTab
+from tabs.marketing.layout import MarketingTab
+from tabs.operations.layout import OperationsTab
+from tabs.overview.layout import OverviewTab
+from tabs.sales.layout import SalesTab
+
+TABS = [OverviewTab, CustomersTab, SalesTab, MarketingTab, OperationsTab]
+
+# Сценарии фильтров. Метод получает только те фильтры, которые принимает
+FILTER_SCENARIOS = {
+    "all": {},
+    "quarter": {"start_date": "2025-04-01", "end_date": "2025-06-30"},
+    "region": {"regions": ["Moscow"]},
+    "multi": {
+        "start_date": "2025-03-01",
+        "end_date": "2025-09-30",
+        "regions": ["Moscow", "SPB"],
+        "categories": ["Electronics", "Clothes"],
+        "segments": ["loyal", "returning"],
+        "channels": ["organic", "vk"],
+        "devices": ["mobile"],
+        "payment_methods": ["card", "sbp"],
+        "suppliers": ["Supplier_1", "Supplier_2", "Supplier_3"],
+        "campaigns": ["Campaign_1", "Campaign_2"],
+    },
+    "narrow_month": {
+        "start_date": "2025-11-01",
+        "end_date": "2025-11-30",
+        "regions": ["Kazan"],
+        "categories": ["Food"],
+        "segments": ["new"],
+    },
+    "partial_day": {
+        "start_date": "2025-02-10 08:00:00",
+        "end_date": "2025-02-20 18:30:00",
+    },
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _load(data_dir, use_cache):
+    """Загрузка данных без вывода DataManager; (DataManager, секунды)"""
+    dm = DataManager(data_dir, use_cache=use_cache)
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        loaded = dm.load_data()
+        elapsed = time.perf_counter() - started
+    if not loaded:
+        raise RuntimeError(f"данные из {data_dir} не загружены")
+    return dm, elapsed
+
+
+def _methods(tabs):
+    """Имя Класс.метод -> (метод, имена параметров) для вкладок tabs"""
+    methods = {}
+    for tab in tabs:
+        for component in (tab.calculations, tab.charts):
+            for name, method in inspect.getmembers(component, inspect.ismethod):
+                if name.startswith("_"):
+                    continue
+                parameters = set(inspect.signature(method).parameters)
+                methods[f"{type(component).__name__}.{name}"] = (method, parameters)
+    return methods
+
+
+def _time_call(method, kwargs):
+    started = time.perf_counter()
+    method(**kwargs)
+    return (time.perf_counter() - started) * 1000
+
+
+def run_benchmarks(data_dir, repeat=3, scenarios=None, only=None):
+    """
+    Прогон бенчмарков: словарь с метаданными (meta), временем загрузки
+    (load) и временем методов (methods: метод -> сценарий -> cold_ms и
+    warm_ms - медиана по repeat вызовам, cold_min_ms - лучший из них)
+    """
+    scenarios = scenarios or list(FILTER_SCENARIOS)
+    # Загрузка с разбором CSV и загрузка из кэша таблиц (data/.cache):
+    # первая загрузка с кэшем записывает его, замеряется вторая
+    csv_dm, csv_seconds = _load(data_dir, use_cache=False)
+    table_seconds = dict(csv_dm.load_report)
+    del csv_dm
+    _load(data_dir, use_cache=True)
+    dm, cached_seconds = _load(data_dir, use_cache=True)
+
+    tabs = [tab_class(dm) for tab_class in TABS]
+    methods = _methods(tabs)
+    if only:
+        methods = {k: v for k, v in methods.items() if any(s in k for s in only)}
+
+    results = {}
+    for name, (method, parameters) in sorted(methods.items()):
+        results[name] = {}
+        for scenario in scenarios:
+            kwargs = {
+                k: v for k, v in FILTER_SCENARIOS[scenario].items() if k in parameters
+            }
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    # Прогрев: импорт модулей, первые обращения к индексам
+                    method(**kwargs)
+                    cold = []
+                    for _ in range(repeat):
+                        dm.calculation_cache.clear()
+                        dm.figure_cache.clear()
+                        cold.append(_time_call(method, kwargs))
+                    warm = [_time_call(method, kwargs) for _ in range(repeat)]
+            except Exception as e:
+                print(f"Error in {name} ({scenario}): {e}")
+                results[name][scenario] = {"error": str(e)}
+                continue
+            results[name][scenario] = {
+                "cold_ms": round(statistics.median(cold), 3),
+                "cold_min_ms": round(min(cold), 3),
+                "warm_ms": round(statistics.median(warm), 3),
+            }
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "data_dir": os.path.abspath(data_dir),
+            "rows": {
+                name: len(getattr(dm, f"df_{name}"))
+                for name in SHARED_TABLES
+                if getattr(dm, f"df_{name}", None) is not None
+            },
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "plotly": plotly.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "load": {
+            "csv_seconds": round(csv_seconds, 3),
+            "table_cache_seconds": round(cached_seconds, 3),
+            "tables": {k: round(v, 3) for k, v in table_seconds.items()},
+        },
+        "methods": results,
+    }
+
+
+def _measurements(result):
+    """
+    Замеры прогона для сравнения, мс. Холодный вызов сравнивается по лучшему
+    из повторов: медиана нескольких холодных вызовов слишком шумная
+    """
+    measurements = {
+        f"load.{name}": result["load"][name] * 1000
+        for name in ("csv_seconds", "table_cache_seconds")
+    }
+    for method, scenarios in result["methods"].items():
+        for scenario, timings in scenarios.items():
+            for metric in ("cold_min_ms", "warm_ms"):
+                if metric in timings:
+                    measurements[f"{method}[{scenario}].{metric}"] = timings[metric]
+    return measurements
+
+
+def compare(result, baseline, threshold=0.2, min_ms=1.0):
+    """
+    Замеры result, которые медленнее baseline больше чем на threshold
+    (доля) и больше чем на min_ms: список (имя, было мс, стало мс)
+    """
+    before = _measurements(baseline)
+    regressions = []
+    for name, after in _measurements(result).items():
+        old = before.get(name)
+        if old is not None and after - old > min_ms and after > old * (1 + threshold):
+            regressions.append((name, round(old, 3), round(after, 3)))
+    return regressions
+
+
+def _print_summary(result):
+    load = result["load"]
+    print(
+        f"Загрузка: CSV {load['csv_seconds']:.2f} с, "
+        f"кэш таблиц {load['table_cache_seconds']:.2f} с"
+    )
+    rows = []
+    for method, scenarios in result["methods"].items():
+        cold = [t["cold_ms"] for t in scenarios.values() if "cold_ms" in t]
+        warm = [t["warm_ms"] for t in scenarios.values() if "warm_ms" in t]
+        if cold:
+            rows.append((max(cold), method, statistics.median(cold), max(warm)))
+    print(f"{'метод':<60} {'cold med':>9} {'cold max':>9} {'warm max':>9}")
+    for cold_max, method, cold_median, warm_max in sorted(rows, reverse=True):
+        print(f"{method:<60} {cold_median:>9.1f} {cold_max:>9.1f} {warm_max:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default="data", help="каталог с CSV")
+    parser.add_argument("--output", help="файл JSON для результатов")
+    parser.add_argument("--repeat", type=int, default=3, help="повторов замера")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=list(FILTER_SCENARIOS),
+        help="только эти сценарии фильтров (можно несколько раз)",
+    )
+    parser.add_argument(
+        "--only", action="append", help="только методы, в имени которых есть строка"
+    )
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="допустимое замедление при сравнении, доля (0.2 - 20%%)",
+    )
+    args = parser.parse_args(argv)
+
+    result = run_benchmarks(args.data, args.repeat, args.scenario, args.only)
+    _print_summary(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"Результаты записаны в {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.threshold)
+        commit = baseline["meta"].get("commit")
+        for name, before, after in regressions:
+            print(f"Замедление {name}: {before} -> {after} мс")
+        print(f"Замедлений относительно {commit}: {len(regressions)}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
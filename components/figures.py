@@ -0,0 +1,292 @@
+import pandas as pd
+import plotly.io as pio
+from plotly.colors import get_colorscale, make_colorscale
+
+# Фигуры собираются как обычные словари, без plotly.express и graph_objects:
+# для маленьких агрегатов их валидация стоит дороже самих расчетов. Результат
+# совпадает с тем, что строил plotly.express. Словари фигур и их части
+# (шаблоны, THEME) общие - менять их можно только через update_layout и
+# update_traces, которые копируют вложенные словари перед изменением.
+
+DEFAULT_TEMPLATE = pio.templates.default
+
+# Оформление дашборда: прозрачный фон, цвет текста и всплывающие подсказки
+THEME = {
+    "plot_bgcolor": "rgba(0,0,0,0)",
+    "paper_bgcolor": "rgba(0,0,0,0)",
+    "font": {"color": "#2c3e50"},
+    "hoverlabel": {
+        "bgcolor": "white",
+        "bordercolor": "black",
+        "font": {"color": "black", "size": 12},
+    },
+}
+
+# Как в plotly.express: линии длиннее этого числа точек рисуются через WebGL
+WEBGL_THRESHOLD = 1000
+
+_TEMPLATES = {}
+_COLORSCALES = {}
+
+
+def _template(name):
+    """Шаблон plotly в виде словаря; разворачивается один раз"""
+    template = _TEMPLATES.get(name)
+    if template is None:
+        template = _TEMPLATES[name] = pio.templates[name].to_plotly_json()
+    return template
+
+
+# Шаблоны дашборда компилируются при импорте, до запуска потоков: ленивая
+# загрузка шаблонов plotly не потокобезопасна
+for _name in (DEFAULT_TEMPLATE, "plotly_white"):
+    _template(_name)
+
+COLORWAY = _template(DEFAULT_TEMPLATE)["layout"]["colorway"]
+
+
+def _colorscale(scale):
+    """Непрерывная шкала: имя шкалы plotly, список цветов или None (из шаблона)"""
+    if scale is None:
+        return _template(DEFAULT_TEMPLATE)["layout"]["colorscale"]["sequential"]
+    key = scale if isinstance(scale, str) else tuple(scale)
+    colorscale = _COLORSCALES.get(key)
+    if colorscale is None:
+        if isinstance(scale, str):
+            colorscale = get_colorscale(scale)
+        else:
+            colorscale = make_colorscale(list(scale))
+        _COLORSCALES[key] = colorscale
+    return colorscale
+
+
+def _merge(target, updates):
+    for key, value in updates.items():
+        current = target.get(key)
+        if isinstance(value, dict) and isinstance(current, dict):
+            value = _merge(dict(current), value)
+        target[key] = value
+    return target
+
+
+def _figure(traces, title, **layout):
+    layout = {
+        "template": _template(DEFAULT_TEMPLATE),
+        "legend": {"tracegroupgap": 0},
+        **layout,
+    }
+    if title is not None:
+        layout["title"] = {"text": title}
+    return {"data": traces, "layout": layout}
+
+
+def _axes(x_title, y_title):
+    return {
+        "xaxis": {"anchor": "y", "domain": [0.0, 1.0], "title": {"text": x_title}},
+        "yaxis": {"anchor": "x", "domain": [0.0, 1.0], "title": {"text": y_title}},
+    }
+
+
+def _coloraxis(title, scale):
+    return {"colorbar": {"title": {"text": title}}, "colorscale": _colorscale(scale)}
+
+
+def _hover(*fields):
+    return "<br>".join(fields) + "<extra></extra>"
+
+
+def update_layout(fig, **updates):
+    """
+    Аналог Figure.update_layout для словаря: вложенные словари сливаются,
+    имя шаблона заменяется готовым шаблоном, строка title - {"text": title}
+    """
+    if isinstance(updates.get("template"), str):
+        updates["template"] = _template(updates["template"])
+    if isinstance(updates.get("title"), str):
+        updates["title"] = {"text": updates["title"]}
+    fig["layout"] = _merge(dict(fig["layout"]), updates)
+    return fig
+
+
+def update_traces(fig, **updates):
+    """Аналог Figure.update_traces для словаря: изменения во всех трассах"""
+    fig["data"] = [_merge(dict(trace), updates) for trace in fig["data"]]
+    return fig
+
+
+def bar(
+    data,
+    x,
+    y,
+    title=None,
+    labels=None,
+    orientation="v",
+    color=None,
+    color_continuous_scale=None,
+    color_discrete_map=None,
+):
+    """
+    Столбчатая диаграмма. Числовой color окрашивает столбцы по непрерывной
+    шкале, остальные - отдельной трассой на каждое значение, как в px.bar
+    """
+    labels = labels or {}
+    names = {column: labels.get(column, column) for column in (x, y, color)}
+    refs = {x: "%{x}", y: "%{y}"}
+    trace = {
+        "type": "bar",
+        "orientation": orientation,
+        "alignmentgroup": "True",
+        "textposition": "auto",
+        "xaxis": "x",
+        "yaxis": "y",
+    }
+    layout = _axes(names[x], names[y])
+    layout["barmode"] = "relative"
+
+    if color is None or pd.api.types.is_numeric_dtype(data[color]):
+        if color is None:
+            marker = {"color": COLORWAY[0]}
+        else:
+            marker = {"color": data[color].to_numpy(), "coloraxis": "coloraxis"}
+            refs[color] = "%{marker.color}"
+            layout["coloraxis"] = _coloraxis(names[color], color_continuous_scale)
+        fields = [f"{names[c]}={refs[c]}" for c in dict.fromkeys((x, y, color)) if c]
+        trace.update(
+            x=data[x].to_numpy(),
+            y=data[y].to_numpy(),
+            marker={**marker, "pattern": {"shape": ""}},
+            name="",
+            legendgroup="",
+            offsetgroup="",
+            showlegend=False,
+            hovertemplate=_hover(*fields),
+        )
+        return _figure([trace], title, **layout)
+
+    color_map = color_discrete_map or {}
+    groups = data[color]
+    traces = []
+    for i, value in enumerate(groups.unique()):
+        rows = data[(groups == value).to_numpy()]
+        ref = refs.get(color, str(value))
+        fields = [f"{names[color]}={ref}"]
+        fields += [f"{names[c]}={refs[c]}" for c in (x, y) if c != color]
+        traces.append(
+            {
+                **trace,
+                "x": rows[x].to_numpy(),
+                "y": rows[y].to_numpy(),
+                "marker": {
+                    "color": color_map.get(value, COLORWAY[i % len(COLORWAY)]),
+                    "pattern": {"shape": ""},
+                },
+                "name": str(value),
+                "legendgroup": str(value),
+                "offsetgroup": str(value),
+                "showlegend": True,
+                "hovertemplate": _hover(*fields),
+            }
+        )
+    layout["legend"] = {"title": {"text": names[color]}, "tracegroupgap": 0}
+    return _figure(traces, title, **layout)
+
+
+def line(data, x, y, title=None, labels=None, color_discrete_sequence=None):
+    """Линейный график одной серии"""
+    labels = labels or {}
+    x_title, y_title = labels.get(x, x), labels.get(y, y)
+    webgl = len(data) > WEBGL_THRESHOLD
+    trace = {
+        "type": "scattergl" if webgl else "scatter",
+        "mode": "lines",
+        "x": data[x].to_numpy(),
+        "y": data[y].to_numpy(),
+        "line": {"color": (color_discrete_sequence or COLORWAY)[0], "dash": "solid"},
+        "marker": {"symbol": "circle"},
+        "name": "",
+        "legendgroup": "",
+        "showlegend": False,
+        "xaxis": "x",
+        "yaxis": "y",
+        "hovertemplate": _hover(f"{x_title}=%{{x}}", f"{y_title}=%{{y}}"),
+    }
+    if not webgl:
+        trace["orientation"] = "v"
+    return _figure([trace], title, **_axes(x_title, y_title))
+
+
+def pie(
+    data,
+    values,
+    names,
+    title=None,
+    hole=None,
+    color=None,
+    color_discrete_map=None,
+    color_discrete_sequence=None,
+):
+    """
+    Круговая диаграмма. Цвета секторов берутся из color_discrete_map по
+    значению color или по порядку из color_discrete_sequence
+    """
+    trace = {
+        "type": "pie",
+        "labels": data[names].to_numpy(),
+        "values": data[values].to_numpy(),
+        "domain": {"x": [0.0, 1.0], "y": [0.0, 1.0]},
+        "name": "",
+        "legendgroup": "",
+        "showlegend": True,
+        "hovertemplate": _hover(f"{names}=%{{label}}", f"{values}=%{{value}}"),
+    }
+    if hole is not None:
+        trace["hole"] = hole
+    layout = {}
+    if color is not None:
+        color_map = color_discrete_map or {}
+        trace["marker"] = {
+            "colors": [
+                color_map.get(value, COLORWAY[i % len(COLORWAY)])
+                for i, value in enumerate(data[color])
+            ]
+        }
+    elif color_discrete_sequence:
+        layout["piecolorway"] = list(color_discrete_sequence)
+    return _figure([trace], title, **layout)
+
+
+def density_heatmap(data, x, y, z, title=None, color_continuous_scale=None):
+    """Тепловая карта: сумма z в каждой клетке (x, y)"""
+    trace = {
+        "type": "histogram2d",
+        "histfunc": "sum",
+        "x": data[x].to_numpy(),
+        "y": data[y].to_numpy(),
+        "z": data[z].to_numpy(),
+        "coloraxis": "coloraxis",
+        "xbingroup": "x",
+        "ybingroup": "y",
+        "name": "",
+        "xaxis": "x",
+        "yaxis": "y",
+        "hovertemplate": _hover(f"{x}=%{{x}}", f"{y}=%{{y}}", f"sum of {z}=%{{z}}"),
+    }
+    return _figure(
+        [trace],
+        title,
+        coloraxis=_coloraxis(f"sum of {z}", color_continuous_scale),
+        **_axes(x, y),
+    )
+
+
+def empty(message):
+    """Пустой график с сообщением вместо данных"""
+    return update_layout(
+        {"data": [], "layout": {"template": _template(DEFAULT_TEMPLATE)}},
+        title=message,
+        xaxis={"visible": False},
+        yaxis={"visible": False},
+        plot_bgcolor=THEME["plot_bgcolor"],
+        paper_bgcolor=THEME["paper_bgcolor"],
+        font=THEME["font"],
+    )
@@ -0,0 +1,263 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.io as pio
+from plotly.io.json import to_json_plotly
+
+from core.instrumentation import measure_phase
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Готовый JSON вставляется в ответ Dash через orjson.Fragment (orjson >= 3.9)
+_Fragment = getattr(orjson, "Fragment", None)
+_fragments_enabled = True
+
+# Расчеты без кэшей в текущем контексте (см. bypass_caches)
+_bypass = contextvars.ContextVar("cache_bypass", default=False)
+
+
+def _normalize_value(name, value):
+    """Приводит значение фильтра к каноническому хешируемому виду"""
+    if name.endswith("_date"):
+        if not value:
+            return None
+        return pd.Timestamp(value).isoformat()
+
+    if isinstance(value, (list, tuple, set)):
+        if len(value) == 0:
+            return None
+        return tuple(sorted(set(value), key=str))
+
+    return value
+
+
+def make_filters_key(filters):
+    """
+    Канонический ключ состояния фильтров: списки отсортированы, пустые списки
+    и None равнозначны, даты приведены к одному формату.
+    """
+    return tuple(
+        sorted((name, _normalize_value(name, value)) for name, value in filters.items())
+    )
+
+
+def _estimate_size(value):
+    """Примерный размер результата в байтах (для ограничения памяти кэша)"""
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        try:
+            usage = value.memory_usage(index=True, deep=False)
+            return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+        except Exception:
+            return 0
+    return 0
+
+
+@contextlib.contextmanager
+def bypass_caches():
+    """
+    Внутри блока кэши расчетов и графиков не читаются и не пополняются: все
+    считается заново. Действует на текущий контекст и потоки пула графиков,
+    в которые он переносится (профилирование, см. core/profiling.py)
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+class CalculationCache:
+    """
+    LRU-кэш результатов расчетов. Ограничен числом записей и примерным объемом
+    памяти; одновременные запросы с одинаковым ключом считаются один раз.
+    """
+
+    def __init__(self, maxsize=512, max_bytes=256 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        if _bypass.get():
+            return compute()
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+
+            event = self._pending.get(key)
+            owner = event is None
+            if owner:
+                event = self._pending[key] = threading.Event()
+                self.misses += 1
+
+        if not owner:
+            # Тот же расчет уже выполняется в другом потоке - ждем его результат
+            event.wait()
+            with self._lock:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return self._data[key][0]
+                self.misses += 1
+            return compute()
+
+        try:
+            value = compute()
+            self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            event.set()
+
+    def _store(self, key, value):
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+
+            while self._data and (
+                len(self._data) > self.maxsize or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def cached_calculation(method):
+    """
+    Кэширует результат метода *Calculations в кэше DataManager. Ключ - класс,
+    метод, версия данных и канонический вид аргументов-фильтров.
+    Результат общий для всех вызывающих - изменять его нельзя.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        arguments.pop("self", None)
+
+        key = (
+            type(self).__name__,
+            method.__name__,
+            self.dm.data_version,
+            make_filters_key(arguments),
+        )
+        with measure_phase("calculation"):
+            return self.dm.calculation_cache.get_or_compute(
+                key, lambda: method(self, *args, **kwargs)
+            )
+
+    return wrapper
+
+
+class EncodedFigure(bytes):
+    """
+    Закодированный JSON фигуры из процесса пула графиков: orjson.Fragment не
+    сериализуется, поэтому байты передаются как есть и оборачиваются в
+    Fragment уже в процессе запроса (см. figure_response)
+    """
+
+
+def disable_figure_fragments():
+    """
+    Графики текущего процесса возвращаются как EncodedFigure, а не
+    orjson.Fragment - для воркеров пула процессов. Ключи кэша графиков от
+    этого не меняются: записи, прогретые до fork, остаются в силе
+    """
+    global _fragments_enabled
+    _fragments_enabled = False
+
+
+def _encode_figures():
+    return _Fragment is not None and pio.json.config.default_engine in (
+        "auto",
+        "orjson",
+    )
+
+
+def figure_response(figure):
+    """Фигура для ответа Dash: EncodedFigure из процесса пула - как Fragment"""
+    if isinstance(figure, EncodedFigure):
+        return _Fragment(bytes(figure))
+    return figure
+
+
+def cached_figure(method):
+    """
+    Кэширует график метода *Charts в кэше графиков DataManager. Ключ - класс,
+    метод, версия данных и канонический вид фильтров, как у cached_calculation.
+
+    С orjson в кэше хранится уже закодированный JSON фигуры, а метод возвращает
+    его как orjson.Fragment: Dash вставляет эти байты в ответ как есть, без
+    повторного построения и кодирования. Без orjson кэшируется сама фигура.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        arguments.pop("self", None)
+
+        encode = _encode_figures()
+        key = (
+            type(self).__name__,
+            method.__name__,
+            self.dm.data_version,
+            make_filters_key(arguments),
+            encode,
+        )
+        with measure_phase("figure"):
+            if not encode:
+                return self.dm.figure_cache.get_or_compute(
+                    key, lambda: method(self, *args, **kwargs)
+                )
+
+            encoded = self.dm.figure_cache.get_or_compute(
+                key,
+                lambda: to_json_plotly(method(self, *args, **kwargs)).encode("utf-8"),
+            )
+        if not _fragments_enabled:
+            return EncodedFigure(encoded)
+        return _Fragment(encoded)
+
+    return wrapper
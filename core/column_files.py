@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def _save_array(path, values):
+    values = np.asarray(values)
+    # Массивы дат из pandas несут пустые метаданные dtype, которые np.save
+    # отказывается сохранять - пишем тот же dtype без них
+    np.save(path, values.view(np.dtype(values.dtype.str)), allow_pickle=False)
+
+
+def write_columns(path, df):
+    """
+    Записывает таблицу df в новый каталог path: каждая колонка - отдельный
+    файл .npy без pickle. Числа, даты и bool пишутся как есть, у category -
+    коды и категории, колонки object - коды и строки. Возвращает описание
+    колонок для read_columns (его хранит вызывающий, например в JSON)
+    """
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0:
+        raise ValueError("поддерживаются только таблицы с индексом 0..n-1")
+    os.mkdir(path)
+    columns = []
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            kind, values, categories = "category", series.cat.codes, dtype.categories
+        elif dtype == object:
+            values, categories = pd.factorize(series)
+            kind = "object"
+        elif isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+            kind, values, categories = "array", series, None
+        else:
+            raise TypeError(f"колонка {column}: тип {dtype} не поддерживается")
+
+        _save_array(os.path.join(path, f"{i}.npy"), values)
+        if categories is not None:
+            categories = categories.to_numpy()
+            if categories.dtype == object:
+                # Строки сохраняются как юникодный массив, без pickle
+                if not all(isinstance(value, str) for value in categories):
+                    raise TypeError(f"колонка {column}: нестроковые значения")
+                categories = categories.astype(str)
+            _save_array(os.path.join(path, f"{i}.categories.npy"), categories)
+        columns.append(
+            {
+                "name": column,
+                "kind": kind,
+                "ordered": bool(getattr(dtype, "ordered", False)),
+            }
+        )
+    return columns
+
+
+def read_columns(path, columns, mmap=False):
+    """
+    Таблица из каталога path, записанного write_columns. С mmap колонки
+    отображаются из файлов без копирования и доступны только для чтения
+    (колонки object собираются копией в любом случае)
+    """
+    mmap_mode = "r" if mmap else None
+    data = {}
+    for i, column in enumerate(columns):
+        # np.asarray снимает подкласс memmap, оставляя данные в mmap
+        values = np.asarray(
+            np.load(
+                os.path.join(path, f"{i}.npy"), mmap_mode=mmap_mode, allow_pickle=False
+            )
+        )
+        if column["kind"] != "array":
+            categories = np.load(
+                os.path.join(path, f"{i}.categories.npy"), allow_pickle=False
+            )
+            if categories.dtype.kind == "U":
+                categories = categories.astype(object)
+            values = pd.Categorical.from_codes(
+                values,
+                dtype=pd.CategoricalDtype(categories, column["ordered"]),
+            )
+            if column["kind"] == "object":
+                values = np.asarray(values, dtype=object)
+        data[column["name"]] = values
+    # copy=False: каждая колонка остается отдельным блоком поверх своего файла
+    return pd.DataFrame(data, copy=False)
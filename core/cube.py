@@ -0,0 +1,157 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from core.ingest import append_rows
+from core.rollups import value_codes
+
+
+class AggregateCube:
+    """
+    Агрегатный куб таблицы: суммы мер и число строк по каждой комбинации
+    измерений, без разбивки по дням - иначе куб почти так же велик, как сама
+    таблица. Поэтому куб отвечает только на запросы без диапазона дат или с
+    диапазоном, покрывающим все даты таблицы (начальное состояние фильтров);
+    для остальных нужен путь по строкам через индекс фильтров с двоичным
+    поиском по дате. Метрики по уникальным значениям (клиенты, заказы с
+    повторяющимся id) из куба не получить - для них тоже нужен исходный путь.
+
+    min_reduction - во сколько раз куб должен быть меньше таблицы, чтобы им
+    пользоваться: на маленьких таблицах почти все комбинации уникальны, и
+    группировка строк куба не быстрее группировки строк таблицы.
+    """
+
+    # Наибольшее число комбинаций кодов измерений (с пропусками), при котором
+    # куб считается np.bincount по номеру комбинации, а не группировкой pandas
+    DENSE_CELLS = 1 << 22
+
+    def __init__(
+        self, df, date_column, dimensions, measures, orders_column=None, min_reduction=1
+    ):
+        self.date_column = date_column
+        self.dimensions = list(dimensions)
+        self.measures = list(measures)
+        self.orders_column = orders_column
+        self.min_reduction = min_reduction
+        self._set_flags(df)
+        self.cube = self._aggregate(df)
+        self._set_size(df)
+
+    def _set_flags(self, df):
+        self._integer = {m: pd.api.types.is_integer_dtype(df[m]) for m in self.measures}
+        # Число строк равно числу заказов, только если id заказа уникален
+        self.orders_are_rows = bool(
+            self.orders_column and df[self.orders_column].is_unique
+        )
+        # Границы дат таблицы: диапазон фильтра, покрывающий их, ничего не
+        # отсекает. Строки без даты любой диапазон отсекает - тогда куб
+        # отвечает только на запросы без дат
+        dates = df[self.date_column]
+        self._first_date = dates.min()
+        self._last_date = dates.max()
+        self._dates_complete = not dates.isna().any()
+
+    def _set_size(self, df):
+        self.compact = len(self.cube) * self.min_reduction <= len(df)
+
+    def _aggregate(self, df):
+        codes = [value_codes(df[dimension]) for dimension in self.dimensions]
+        cells = 1
+        for _, dtype in codes:
+            cells *= len(dtype.categories) + 1
+        if cells > self.DENSE_CELLS:
+            return self._group(df)
+
+        # Номер комбинации: коды измерений со сдвигом на 1 (0 - пропуск) как
+        # разряды числа со смешанным основанием
+        key = np.zeros(len(df), dtype=np.int64)
+        for column_codes, dtype in codes:
+            key = key * (len(dtype.categories) + 1) + column_codes + 1
+        rows = np.bincount(key, minlength=cells)
+        present = np.flatnonzero(rows)
+
+        columns = {}
+        remaining = present
+        for dimension, (_, dtype) in reversed(list(zip(self.dimensions, codes))):
+            remaining, code = np.divmod(remaining, len(dtype.categories) + 1)
+            columns[dimension] = pd.Categorical.from_codes(code - 1, dtype=dtype)
+        cube = pd.DataFrame({d: columns[d] for d in self.dimensions})
+        for m in self.measures:
+            values = np.nan_to_num(df[m].to_numpy(dtype="float64"))
+            cube[m] = np.bincount(key, values, minlength=cells)[present]
+        cube["rows"] = rows[present]
+        return cube
+
+    def _group(self, df):
+        source = df[self.dimensions].assign(
+            **{m: df[m].astype("float64") for m in self.measures}
+        )
+        grouped = source.groupby(self.dimensions, observed=True, dropna=False)
+        cube = grouped[self.measures].sum()
+        cube["rows"] = grouped.size()
+        return cube.reset_index()
+
+    def appended(self, df, start):
+        """
+        Куб таблицы df, строки [0, start) которой уже учтены, а остальные
+        дописаны: к строкам куба добавляются агрегаты новых строк, и
+        совпавшие комбинации складываются. Текущий куб не меняется
+        """
+        new = self._aggregate(df.iloc[start:])
+        cube = copy.copy(self)
+        cube._set_flags(df)
+        if len(new):
+            cube.cube = (
+                append_rows(self.cube, new)
+                .groupby(self.dimensions, observed=True, dropna=False)[
+                    self.measures + ["rows"]
+                ]
+                .sum()
+                .reset_index()
+            )
+        cube._set_size(df)
+        return cube
+
+    def _covers_all_dates(self, start_date, end_date):
+        if not self._dates_complete:
+            return False
+        if pd.isna(self._first_date):
+            # Пустая таблица: отсекать нечего
+            return True
+        return (
+            pd.Timestamp(start_date) <= self._first_date
+            and pd.Timestamp(end_date) >= self._last_date
+        )
+
+    def select(self, filters=None, start_date=None, end_date=None):
+        """
+        Строки куба под фильтрами (колонки измерений и мер называются как в
+        исходной таблице) или None, если диапазон дат отсекает часть строк
+        таблицы или куб не меньше таблицы в min_reduction раз
+        """
+        if not self.compact:
+            return None
+        if start_date and end_date and not self._covers_all_dates(start_date, end_date):
+            return None
+
+        cube = self.cube
+        for dimension, values in (filters or {}).items():
+            if values:
+                cube = cube[cube[dimension].isin(values)]
+        return cube
+
+    def totals(self, filters=None, start_date=None, end_date=None):
+        """Суммы мер и число строк (и заказов, если это одно и то же) или None"""
+        cube = self.select(filters, start_date, end_date)
+        if cube is None:
+            return None
+
+        result = {
+            m: int(round(cube[m].sum())) if self._integer[m] else float(cube[m].sum())
+            for m in self.measures
+        }
+        result["rows"] = int(cube["rows"].sum())
+        if self.orders_are_rows:
+            result["orders"] = result["rows"]
+        return result
@@ -1,9 +1,217 @@
-import pandas as pd
+import copy
+import functools
+import glob
 import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.cache import CalculationCache
+from core.cube import AggregateCube
+from core.filter_index import FilterIndex, date_slice
+from core.ingest import (
+    append_rows,
+    appended_range,
+    complete_offset,
+    read_csv_range,
+    source_state,
+)
+from core.loader import load_workers, run_tasks
+from core.rollups import DailyRollup
+from core.schema import memory_bytes, optimize_dtypes
+from core.shared_store import SharedStore
+from core.table_cache import TableCache, source_fingerprint
+
+# Таблицы DataManager общие для всех запросов и вкладок. В режиме
+# copy-on-write срезы и выборки из них не копируют данные, а любая запись в
+# производный DataFrame копирует только затронутые колонки и не может
+# изменить общую таблицу
+pd.set_option("mode.copy_on_write", True)
+
+# Схема исходных таблиц: имя (атрибут df_<имя>), CSV-файл, колонки с датами,
+# строковые измерения, которые храним как category, целочисленные
+# идентификаторы, которые храним в минимальном типе (downcast; меры остаются
+# int64/float64, см. optimize_dtypes), и колонка времени, по
+# которой таблица хранится отсортированной (см. slice_by_date). append_only -
+# файл только дописывается целыми строками, при обновлении разбираются лишь
+# новые строки (см. _append_source_table). events загружается отдельно - см.
+# _load_combined_events
+SOURCE_TABLES = {
+    "suppliers": {
+        "file": "suppliers.csv",
+        "categories": ["supplier_name", "region"],
+        "downcast": ["supplier_id"],
+    },
+    "products": {
+        "file": "products.csv",
+        "categories": ["category"],
+        "downcast": ["product_id", "supplier_id"],
+    },
+    "user_segments": {
+        "file": "user_segments.csv",
+        "parse_dates": ["registration_date"],
+        "sort_by": "registration_date",
+        "categories": ["segment", "region"],
+        "downcast": ["customer_id"],
+    },
+    "sales": {
+        "file": "sales.csv",
+        "parse_dates": ["transaction_date"],
+        "sort_by": "transaction_date",
+        "categories": ["payment_method"],
+        "downcast": ["transaction_id", "customer_id", "product_id"],
+        "append_only": True,
+    },
+    "ad_revenue": {
+        "file": "ad_revenue.csv",
+        "parse_dates": ["date"],
+        "sort_by": "date",
+        "categories": ["campaign_name"],
+        "downcast": ["ad_id", "product_id"],
+    },
+    "returns": {
+        "file": "returns.csv",
+        "categories": ["reason"],
+        "downcast": ["return_id", "transaction_id", "customer_id", "product_id"],
+    },
+    "traffic": {
+        "file": "traffic.csv",
+        "parse_dates": ["session_start"],
+        "sort_by": "session_start",
+        "categories": ["channel", "device"],
+        "downcast": ["traffic_id", "customer_id"],
+        "append_only": True,
+    },
+    "inventory": {
+        "file": "inventory.csv",
+        "parse_dates": ["last_updated"],
+        "downcast": ["product_id", "warehouse_id"],
+    },
+    "customer_support": {
+        "file": "customer_support.csv",
+        "parse_dates": ["support_date"],
+        "sort_by": "support_date",
+        "categories": ["issue_type"],
+        "downcast": ["ticket_id", "customer_id"],
+        "append_only": True,
+    },
+}
+
+EVENTS_TABLE = {
+    "parse_dates": ["event_timestamp"],
+    "categories": ["event_type", "page_url"],
+    "downcast": ["event_id", "customer_id", "product_id"],
+    "sort_by": "event_timestamp",
+    "append_only": True,
+}
+
+# Таблицы, отсортированные по времени: имя (атрибут df_<имя>) -> колонка времени.
+# Денормализованные таблицы строятся left merge и сохраняют порядок исходных
+TIME_COLUMNS = {
+    **{
+        name: spec["sort_by"]
+        for name, spec in SOURCE_TABLES.items()
+        if "sort_by" in spec
+    },
+    "events": EVENTS_TABLE["sort_by"],
+    "sales_fact": "transaction_date",
+    "ad_fact": "date",
+    "traffic_fact": "session_start",
+}
+
+# Измерения фильтров вкладки продаж
+SALES_DIMENSIONS = ["region", "segment", "category", "supplier_name", "payment_method"]
+
+# Индексы фильтров: имя -> (атрибут DataManager, измерения, колонка даты)
+FILTER_INDEXES = {
+    "sales": ("df_sales_fact", SALES_DIMENSIONS, "transaction_date"),
+    "ad_revenue": ("df_ad_fact", ["campaign_name", "category"], "date"),
+    "traffic": (
+        "df_traffic_fact",
+        ["channel", "device", "region", "segment"],
+        "session_start",
+    ),
+    "user_segments": ("df_user_segments", ["region", "segment"], "registration_date"),
+    "returns": ("df_returns_fact", SALES_DIMENSIONS, "transaction_date"),
+}
+
+# Во сколько раз куб продаж должен быть меньше таблицы, чтобы распределения и
+# KPI считались по нему (см. core/cube.py): при 130 тыс. и 1,3 млн продаж в нем
+# около 7 и 9 тыс. комбинаций измерений
+SALES_CUBE_MIN_REDUCTION = 10
+
+# Дневные агрегаты для KPI (см. core/rollups.py)
+DAILY_ROLLUPS = {
+    "sales": {
+        "table": "df_sales_fact",
+        "date_column": "transaction_date",
+        "measures": ["revenue", "quantity"],
+        "dimensions": SALES_DIMENSIONS,
+        "orders_column": "transaction_id",
+    },
+    "ad_revenue": {
+        "table": "df_ad_fact",
+        "date_column": "date",
+        "measures": ["spend", "revenue", "clicks", "impressions"],
+        # Без campaign_name: тысячи кампаний - это десятки МБ агрегатов, а
+        # фильтр по кампаниям быстро считается по строкам через индекс
+        "dimensions": ["category"],
+    },
+}
+
+# Денормализованные таблицы (атрибут df_<имя>, строится _build_<имя>) и
+# таблицы, из которых они собираются, в порядке построения
+FACT_SOURCES = {
+    "sales_fact": ["sales", "products", "suppliers", "user_segments"],
+    "ad_fact": ["ad_revenue", "products"],
+    "traffic_fact": ["traffic", "user_segments"],
+    "returns_fact": ["returns", "sales", "products", "suppliers", "user_segments"],
+}
+
+# Версия построения денормализованных таблиц: бинарный кэш хранит их вместе с
+# исходными (см. _load_fact_table), поэтому при изменении _build_<имя> ее нужно
+# увеличить, чтобы кэш не отдавал таблицы, построенные прежним кодом
+FACT_TABLES_VERSION = 1
+
+# Денормализованные таблицы, строки которых один к одному соответствуют строкам
+# первой из исходных таблиц: при дозаписи в нее строятся только новые строки
+ROW_WISE_FACTS = {"sales_fact", "ad_fact", "traffic_fact"}
+
+# Таблицы, которые публикуются в общее хранилище (см. core/shared_store.py):
+# исходные и денормализованные. Индексы и агрегаты каждый процесс строит сам
+SHARED_TABLES = [*SOURCE_TABLES, "events", *FACT_SOURCES]
+
+EVENTS_COLUMNS = [
+    "event_id",
+    "customer_id",
+    "event_type",
+    "event_timestamp",
+    "page_url",
+    "product_id",
+]
 
 
 class DataManager:
-    def __init__(self):
+    """
+    Загружает таблицы дашборда и строит производные структуры: денормализованные
+    таблицы, индексы фильтров, агрегаты. Атрибуты df_* - общие таблицы только
+    для чтения: расчеты работают с их срезами и не изменяют их на месте.
+    """
+
+    def __init__(self, data_dir="data", use_cache=True, shared_dir=None):
+        self.data_dir = data_dir
+        # Бинарный кэш разобранных CSV (см. core/table_cache.py)
+        self.table_cache = (
+            TableCache(os.path.join(data_dir, ".cache")) if use_cache else None
+        )
+        # Общее для процессов хранилище таблиц в mmap (см. core/shared_store.py)
+        self.shared_store = SharedStore(shared_dir) if shared_dir else None
+        # Версия хранилища, из которой отображены таблицы
+        self.shared_version = None
+
         self.df_suppliers = None
         self.df_products = None
         self.df_user_segments = None
@@ -14,80 +222,674 @@ class DataManager:
         self.df_traffic = None
         self.df_inventory = None
         self.df_customer_support = None
+        # Денормализованные таблицы (см. _build_fact_tables)
+        self.df_sales_fact = None
+        self.df_ad_fact = None
+        self.df_traffic_fact = None
+        self.df_returns_fact = None
+        # Индексы фильтров по таблицам (см. FILTER_INDEXES)
+        self.filter_indexes = {}
+        # Дневные агрегаты по таблицам (см. DAILY_ROLLUPS)
+        self.rollups = {}
+        # Куб продаж по комбинациям измерений SALES_DIMENSIONS
+        self.sales_cube = None
+
+        # Объем памяти таблиц до и после оптимизации типов, байты
+        self.memory_report = {}
+        # Время загрузки или построения каждой таблицы, секунды
+        self.load_report = {}
+        # Загружены ли данные из файлов (иначе - тестовые данные) и отпечатки
+        # исходных файлов на момент загрузки (см. changed_tables)
+        self.data_loaded = False
+        self.source_fingerprints = {}
+        # Сколько байт и строк каждого исходного файла прочитано (см. core/ingest.py)
+        self.ingest_state = {}
+
+        self._create_caches()
+        self.data_version = 0
+        # Время (time.time()) последней загрузки снимка данных
+        self.loaded_at = None
+
+    def _create_caches(self):
+        # Кэш результатов расчетов; версия данных растет при каждой загрузке
+        self.calculation_cache = CalculationCache()
+        # Кэш готовых графиков (см. cached_figure), тот же ключ версии данных
+        self.figure_cache = CalculationCache(max_bytes=64 * 1024 * 1024)
 
     def load_data(self):
+        # Отпечатки снимаются до чтения: файл, измененный во время загрузки,
+        # будет перечитан при следующей проверке
+        fingerprints = self._source_fingerprints()
         try:
-            data_dir = "data"
+            if self.shared_store is None:
+                self._load_tables(fingerprints)
+            else:
+                self._load_shared_tables(fingerprints)
+            self._build_lookups()
+
+            print("Все данные успешно загружены!")
+            self._print_memory_report()
+            self._print_load_report()
+            loaded = True
+
+        except Exception as e:
+            print(f"Ошибка загрузки данных: {e}")
+            self._create_sample_data()
+            loaded = False
+
+        self.data_loaded = loaded
+        self.source_fingerprints = fingerprints if loaded else {}
+        self._invalidate_caches()
+        return loaded
+
+    def changed_tables(self):
+        """
+        Исходные таблицы, файлы которых изменились после загрузки: словарь
+        имя -> новый отпечаток файлов (None - файлы недоступны)
+        """
+        return {
+            name: fingerprint
+            for name, fingerprint in self._source_fingerprints().items()
+            if fingerprint != self.source_fingerprints.get(name)
+        }
 
-            self.df_suppliers = pd.read_csv(f"{data_dir}/suppliers.csv")
-            self.df_products = pd.read_csv(f"{data_dir}/products.csv")
-            self.df_user_segments = pd.read_csv(
-                f"{data_dir}/user_segments.csv", parse_dates=["registration_date"]
+    def reloaded(self, tables):
+        """
+        Новый снимок данных, в котором перечитаны исходные таблицы tables и
+        перестроено только то, что от них зависит; остальное общее с текущим
+        снимком. Текущий снимок не меняется - запросы, которые с ним работают,
+        доводят расчеты на старых данных. Ошибки загрузки пробрасываются.
+        """
+        fingerprints = self._source_fingerprints()
+        new = copy.copy(self)
+        new.memory_report = dict(self.memory_report)
+        new.load_report = dict(self.load_report)
+        new.ingest_state = dict(self.ingest_state)
+        new._create_caches()
+
+        if self.shared_store is not None or not self.data_loaded:
+            # Хранилище публикует и отображает версию целиком
+            if self.shared_store is None:
+                new._load_tables(fingerprints)
+            else:
+                new._load_shared_tables(fingerprints)
+            new._build_lookups()
+        else:
+            # Дописанные таблицы: имя -> номер первой новой строки
+            starts = new._run_load_tasks(
+                {
+                    name: (functools.partial(new._refresh_table, name), ())
+                    for name in tables
+                }
             )
-            self.df_sales = pd.read_csv(
-                f"{data_dir}/sales.csv", parse_dates=["transaction_date"]
+            appended = {
+                name: start for name, start in starts.items() if start is not None
+            }
+            changed = new._build_fact_tables(set(tables), appended)
+            new._build_lookups(changed, appended)
+
+        new.data_loaded = True
+        new.source_fingerprints = fingerprints
+        new._invalidate_caches()
+        return new
+
+    def _table_sources(self):
+        """Исходные файлы каждой таблицы"""
+        sources = {
+            name: [os.path.join(self.data_dir, spec["file"])]
+            for name, spec in SOURCE_TABLES.items()
+        }
+        sources["events"] = self._events_sources(self.data_dir)
+        return sources
+
+    def _source_fingerprints(self):
+        fingerprints = {}
+        for name, sources in self._table_sources().items():
+            try:
+                fingerprints[name] = source_fingerprint(sources)
+            except OSError:
+                fingerprints[name] = None
+        return fingerprints
+
+    def _load_tables(self, fingerprints=None):
+        """
+        Исходные таблицы из CSV (или бинарного кэша) и денормализованные.
+        Таблицы загружаются параллельно, денормализованные строятся, как только
+        готовы их исходные (FACT_SOURCES). fingerprints - отпечатки исходных
+        файлов, снятые до загрузки: с ними денормализованные таблицы тоже
+        берутся из бинарного кэша (см. _load_fact_table)
+        """
+        tasks = {
+            name: (functools.partial(self._load_source_table, name), ())
+            for name in [*SOURCE_TABLES, "events"]
+        }
+        for fact, sources in FACT_SOURCES.items():
+            tasks[fact] = (
+                functools.partial(self._load_fact_table, fact, fingerprints),
+                sources,
             )
-            
+        self._run_load_tasks(tasks)
+
+    def _run_load_tasks(self, tasks):
+        """Выполняет задачи загрузки (см. core/loader.py), время - в load_report"""
+        started = time.perf_counter()
+        try:
+            results, timings = run_tasks(tasks)
+        except Exception:
+            self.load_report = {}
+            raise
+        self.load_report.update(timings)
+        self.load_report["total"] = time.perf_counter() - started
+        return results
+
+    def _refresh_table(self, name):
+        """
+        Дочитывает дописанные строки таблицы или перечитывает ее целиком.
+        Возвращает номер первой дописанной строки или None
+        """
+        start = self._append_source_table(name)
+        if start is None:
+            self._load_source_table(name)
+        return start
+
+    def _load_source_table(self, name):
+        if name == "events":
             # Загружаем и объединяем части events
-            self.df_events = self._load_combined_events(data_dir)
-            
-            self.df_ad_revenue = pd.read_csv(
-                f"{data_dir}/ad_revenue.csv", parse_dates=["date"]
-            )
-            self.df_returns = pd.read_csv(f"{data_dir}/returns.csv")
-            self.df_traffic = pd.read_csv(
-                f"{data_dir}/traffic.csv", parse_dates=["session_start"]
+            self.df_events = self._load_combined_events(self.data_dir)
+            return
+
+        spec = SOURCE_TABLES[name]
+        path = os.path.join(self.data_dir, spec["file"])
+        setattr(self, f"df_{name}", self._read_table(name, [path], spec))
+
+    def _append_source_table(self, name):
+        """
+        Дочитывает строки, дописанные в конец файлов таблицы после загрузки,
+        и добавляет их в конец таблицы. Возвращает номер первой новой строки
+        или None, если так обновить таблицу нельзя: файл не append_only,
+        перезаписан, или новые строки раньше последней по времени.
+        """
+        spec = EVENTS_TABLE if name == "events" else SOURCE_TABLES[name]
+        states = self.ingest_state.get(name)
+        if not spec.get("append_only") or not states:
+            return None
+        sources = [os.path.abspath(path) for path in self._table_sources()[name]]
+        if sources[: len(states)] != [state["path"] for state in states]:
+            return None
+
+        # Новые строки - хвосты прочитанных файлов и новые файлы (части events)
+        ranges = [appended_range(state) for state in states]
+        if None in ranges:
+            return None
+        ranges += [(0, os.path.getsize(path)) for path in sources[len(states) :]]
+
+        new_states, parts = [], []
+        for i, (path, (start, end)) in enumerate(zip(sources, ranges)):
+            part = read_csv_range(path, start, end, parse_dates=spec.get("parse_dates"))
+            read_rows = states[i]["rows"] if i < len(states) else 0
+            new_states.append(source_state(path, end, read_rows + len(part)))
+            if len(part):
+                # У пустой части колонки object и испортили бы типы при concat
+                parts.append(part)
+
+        df = getattr(self, f"df_{name}")
+        if not parts:
+            self.ingest_state[name] = new_states
+            return len(df)
+        rows = pd.concat(parts, ignore_index=True)
+        rows = optimize_dtypes(
+            rows, spec.get("categories", []), spec.get("downcast", [])
+        )
+        if list(rows.columns) != list(df.columns):
+            return None
+        sort_by = spec.get("sort_by")
+        if sort_by and len(rows) and len(df):
+            # Дописать в конец можно, только если порядок по времени сохранится
+            rows = rows.sort_values(sort_by, kind="stable", ignore_index=True)
+            last = df[sort_by].iloc[-1]
+            if pd.isna(last) or rows[sort_by].iloc[0] < last:
+                return None
+
+        start = len(df)
+        combined = append_rows(df, rows)
+        setattr(self, f"df_{name}", combined)
+        self.ingest_state[name] = new_states
+        print(f"Таблица {name}: дочитано строк {len(rows)}")
+
+        if self.table_cache is not None:
+            self.table_cache.save(
+                name,
+                sources,
+                combined,
+                schema=spec,
+                meta={"memory": self.memory_report.get(name), "ingest": new_states},
+                fingerprint=[
+                    {**entry, "size": state["offset"]}
+                    for entry, state in zip(source_fingerprint(sources), new_states)
+                ],
             )
-            self.df_inventory = pd.read_csv(
-                f"{data_dir}/inventory.csv", parse_dates=["last_updated"]
+        return start
+
+    def _load_shared_tables(self, fingerprints=None):
+        """
+        Таблицы из общего хранилища. Если там нет версии для текущих исходных
+        файлов, первый процесс загружает CSV и публикует новую версию, а
+        остальные ждут ее под блокировкой. Затем таблицы подменяются на
+        отображенные из файлов - и в публикующем процессе тоже, чтобы данные
+        занимали одну копию в кэше ОС на все процессы.
+        """
+        sources = [
+            path for paths in self._table_sources().values() for path in paths
+        ]
+
+        with self.shared_store.lock():
+            version, tables = self.shared_store.load(sources)
+            if tables is None:
+                self._load_tables(fingerprints)
+                try:
+                    self.shared_store.publish(
+                        sources,
+                        {name: getattr(self, f"df_{name}") for name in SHARED_TABLES},
+                    )
+                except Exception as e:
+                    # Без хранилища процесс работает со своей копией таблиц
+                    print(f"Не удалось опубликовать таблицы в общее хранилище: {e}")
+                    return
+                version, tables = self.shared_store.load(sources)
+                if tables is None:
+                    return
+
+        for name in SHARED_TABLES:
+            setattr(self, f"df_{name}", tables.get(name))
+        self.shared_version = version
+        print(f"Таблицы отображены из общего хранилища, версия {version}")
+
+    def _read_table(self, name, sources, spec):
+        """
+        Читает таблицу из бинарного кэша, если исходные файлы и схема не менялись,
+        иначе разбирает CSV, приводит типы по схеме и обновляет кэш. Из файлов
+        читаются байты, записанные к началу загрузки, - их число запоминается
+        в ingest_state для дочитывания новых строк
+        """
+        if self.table_cache is not None:
+            df, meta = self.table_cache.load(name, sources, schema=spec)
+            if df is not None:
+                self.memory_report[name] = meta.get(
+                    "memory", {"before": None, "after": memory_bytes(df)}
+                )
+                self.ingest_state[name] = meta.get("ingest")
+                return df
+
+        fingerprint = source_fingerprint(sources)
+        offsets = [entry["size"] for entry in fingerprint]
+        if spec.get("append_only"):
+            # Строка без перевода строки в конце может быть еще не дописана
+            offsets = [
+                complete_offset(entry["path"], end)
+                for entry, end in zip(fingerprint, offsets)
+            ]
+
+        def read_part(entry, end):
+            if len(sources) > 1:
+                print(f"Загружаем {os.path.basename(entry['path'])}")
+            return read_csv_range(
+                entry["path"], 0, end, parse_dates=spec.get("parse_dates")
             )
-            self.df_customer_support = pd.read_csv(
-                f"{data_dir}/customer_support.csv", parse_dates=["support_date"]
+
+        if len(sources) > 1:
+            # Части одной таблицы разбираются параллельно
+            with ThreadPoolExecutor(
+                max_workers=min(len(sources), load_workers())
+            ) as pool:
+                parts = list(pool.map(read_part, fingerprint, offsets))
+        else:
+            parts = [read_part(fingerprint[0], offsets[0])]
+        if len(parts) == 1:
+            df = parts[0]
+        else:
+            df = pd.concat(parts, ignore_index=True)
+            print(f"Объединено {len(parts)} частей {name}, всего строк: {len(df)}")
+        ingest_state = [
+            source_state(entry["path"], end, len(part))
+            for entry, end, part in zip(fingerprint, offsets, parts)
+        ]
+
+        before = memory_bytes(df)
+        df = optimize_dtypes(df, spec.get("categories", []), spec.get("downcast", []))
+        if spec.get("sort_by"):
+            # Стабильная сортировка: строки с одинаковым временем в порядке файла
+            df = df.sort_values(spec["sort_by"], kind="stable", ignore_index=True)
+        report = {"before": before, "after": memory_bytes(df)}
+        self.memory_report[name] = report
+        self.ingest_state[name] = ingest_state
+
+        if self.table_cache is not None:
+            self.table_cache.save(
+                name,
+                sources,
+                df,
+                schema=spec,
+                meta={"memory": report, "ingest": ingest_state},
+                fingerprint=fingerprint,
             )
+        return df
 
-            print("Все данные успешно загружены!")
-            return True
+    def _print_memory_report(self):
+        """Печатает экономию памяти от оптимизации типов по каждой таблице"""
+        for name, report in self.memory_report.items():
+            before, after = report["before"], report["after"]
+            if before:
+                print(
+                    f"Память {name}: {before / 2**20:.1f} МБ -> "
+                    f"{after / 2**20:.1f} МБ (-{(1 - after / before) * 100:.0f}%)"
+                )
 
-        except Exception as e:
-            print(f"Ошибка загрузки данных: {e}")
-            self._create_sample_data()
-            return False
+    def _print_load_report(self):
+        """Печатает время загрузки таблиц: общее и по каждой таблице"""
+        timings = {k: v for k, v in self.load_report.items() if k != "total"}
+        if not timings:
+            return
+        print(
+            f"Таблицы загружены за {self.load_report['total']:.2f} с "
+            f"(сумма по таблицам {sum(timings.values()):.2f} с)"
+        )
+        for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+            print(f"  {name}: {seconds:.2f} с")
+
+    def _invalidate_caches(self):
+        """Сбрасывает кэши расчетов и графиков после (пере)загрузки данных"""
+        self.data_version += 1
+        self.loaded_at = time.time()
+        self.calculation_cache.clear()
+        self.figure_cache.clear()
+
+    @staticmethod
+    def _events_sources(data_dir):
+        """Файлы events: оригинальный events.csv или его части events_partN.csv"""
+        original_path = os.path.join(data_dir, "events.csv")
+        if os.path.exists(original_path):
+            return [original_path]
+
+        def part_number(path):
+            match = re.search(r"events_part(\d+)\.csv$", path)
+            return int(match.group(1)) if match else 0
+
+        return sorted(
+            glob.glob(os.path.join(data_dir, "events_part*.csv")), key=part_number
+        )
 
     def _load_combined_events(self, data_dir):
         """
         Загружает и объединяет части events из нескольких файлов
         """
-        events_parts = []
-        
-        # Проверяем существование частей events
-        part1_path = f"{data_dir}/events_part1.csv"
-        part2_path = f"{data_dir}/events_part2.csv"
-        original_path = f"{data_dir}/events.csv"
-        
-        # Если есть оригинальный файл, используем его
-        if os.path.exists(original_path):
-            print("Загружаем оригинальный events.csv")
-            return pd.read_csv(original_path, parse_dates=["event_timestamp"])
-        
-        # Загружаем части если они существуют
-        if os.path.exists(part1_path):
-            print("Загружаем events_part1.csv")
-            events_parts.append(pd.read_csv(part1_path, parse_dates=["event_timestamp"]))
-        
-        if os.path.exists(part2_path):
-            print("Загружаем events_part2.csv")
-            events_parts.append(pd.read_csv(part2_path, parse_dates=["event_timestamp"]))
-        
-        if events_parts:
-            # Объединяем все части
-            combined_events = pd.concat(events_parts, ignore_index=True)
-            print(f"Объединено {len(events_parts)} частей events, всего строк: {len(combined_events)}")
-            return combined_events
-        else:
+        sources = self._events_sources(data_dir)
+
+        if not sources:
             # Если нет ни одного файла events
             print("Файлы events не найдены, создаем пустой DataFrame")
-            return pd.DataFrame(columns=["event_id", "customer_id", "event_type", 
-                                       "event_timestamp", "page_url", "product_id"])
+            return pd.DataFrame(columns=EVENTS_COLUMNS)
+
+        return self._read_table("events", sources, EVENTS_TABLE)
+
+    def select(self, table, filters=None, start_date=None, end_date=None):
+        """
+        Строки таблицы из FILTER_INDEXES, прошедшие фильтры: filters - словарь
+        измерение -> список значений. Результат изменять нельзя.
+        """
+        return self.filter_indexes[table].select(filters, start_date, end_date)
+
+    def slice_by_date(self, table, start_date=None, end_date=None):
+        """
+        Строки таблицы из TIME_COLUMNS с временем в [start_date, end_date]:
+        двоичный поиск по отсортированной колонке и срез без копирования.
+        Без дат возвращается вся таблица. Изменять результат нельзя.
+        """
+        df = getattr(self, f"df_{table}")
+        if not (start_date and end_date):
+            return df
+        lo, hi = date_slice(df[TIME_COLUMNS[table]], start_date, end_date)
+        return df.iloc[lo:hi]
+
+    def rollup_totals(self, table, filters=None, start_date=None, end_date=None):
+        """
+        Суммы мер таблицы из DAILY_ROLLUPS по дневным агрегатам или None, если
+        фильтры не позволяют ответить без просмотра строк
+        """
+        rollup = self.rollups.get(table)
+        if rollup is None:
+            return None
+        return rollup.query(start_date, end_date, filters)
+
+    def _build_derived_tables(self):
+        """Денормализованные таблицы, индексы фильтров, дневные агрегаты и куб"""
+        self._build_fact_tables()
+        self._build_lookups()
+
+    def _build_fact_tables(self, changed=None, appended=None):
+        """
+        Денормализованные таблицы: все или только зависящие от таблиц changed.
+        Если из них изменилась только основная таблица (ROW_WISE_FACTS) и в нее
+        лишь дописаны строки (appended: имя -> первая новая строка), к таблице
+        достраиваются только новые строки, и она тоже попадает в appended.
+        Возвращает changed вместе с перестроенными таблицами
+        """
+        changed = set(changed) if changed is not None else None
+        appended = appended if appended is not None else {}
+        for fact, sources in FACT_SOURCES.items():
+            if changed is not None and not changed.intersection(sources):
+                continue
+            build = getattr(self, f"_build_{fact}")
+            main, fact_df = sources[0], getattr(self, f"df_{fact}")
+            if (
+                fact in ROW_WISE_FACTS
+                and changed is not None
+                and changed.intersection(sources) == {main}
+                and main in appended
+                and fact_df is not None
+                and len(fact_df) == appended[main]
+            ):
+                rows = getattr(self, f"df_{main}").iloc[appended[main] :]
+                appended[fact] = len(fact_df)
+                setattr(self, f"df_{fact}", append_rows(fact_df, build(rows)))
+            else:
+                self._build_fact_table(fact)
+            if changed is not None:
+                changed.add(fact)
+        return changed
+
+    def _build_fact_table(self, fact):
+        setattr(self, f"df_{fact}", getattr(self, f"_build_{fact}")())
+
+    def _load_fact_table(self, fact, fingerprints=None):
+        """
+        Денормализованная таблица из бинарного кэша, если файлы ее исходных
+        таблиц с момента снятия отпечатков fingerprints не менялись, иначе она
+        строится и сохраняется в кэш. Отпечатки сняты до чтения исходных
+        таблиц: если файл изменился во время загрузки, отпечаток в кэше уже не
+        совпадет с файлом и таблица будет построена заново
+        """
+        names = FACT_SOURCES[fact]
+        if (
+            self.table_cache is None
+            or fingerprints is None
+            or any(fingerprints.get(name) is None for name in names)
+        ):
+            self._build_fact_table(fact)
+            return
+
+        fingerprint = [entry for name in names for entry in fingerprints[name]]
+        sources = [entry["path"] for entry in fingerprint]
+        # Схемы исходных таблиц определяют типы колонок денормализованной
+        schema = {
+            "version": FACT_TABLES_VERSION,
+            "sources": {name: SOURCE_TABLES[name] for name in names},
+        }
+        df, _ = self.table_cache.load(fact, sources, schema=schema)
+        if df is None:
+            df = getattr(self, f"_build_{fact}")()
+            if df is not None:
+                self.table_cache.save(
+                    fact, sources, df, schema=schema, fingerprint=fingerprint
+                )
+        setattr(self, f"df_{fact}", df)
+
+    def _build_lookups(self, changed=None, appended=None):
+        """
+        Индексы фильтров, дневные агрегаты и куб: все или только по таблицам
+        из changed, остальные берутся из текущего снимка. Для таблиц из
+        appended (имя -> первая новая строка) в них добавляются новые строки
+        """
+        appended = appended or {}
+
+        def stale(attr):
+            return changed is None or attr.removeprefix("df_") in changed
+
+        filter_indexes = dict(self.filter_indexes) if changed is not None else {}
+        for name, (attr, dimensions, date_column) in FILTER_INDEXES.items():
+            df = getattr(self, attr)
+            start = appended.get(attr.removeprefix("df_"))
+            if df is None:
+                filter_indexes.pop(name, None)
+            elif start is not None and name in filter_indexes:
+                filter_indexes[name] = filter_indexes[name].appended(df, start)
+            elif stale(attr):
+                filter_indexes[name] = FilterIndex(df, dimensions, date_column)
+        self.filter_indexes = filter_indexes
+
+        rollups = dict(self.rollups) if changed is not None else {}
+        for name, spec in DAILY_ROLLUPS.items():
+            df = getattr(self, spec["table"])
+            start = appended.get(spec["table"].removeprefix("df_"))
+            if df is None:
+                rollups.pop(name, None)
+            elif start is not None and name in rollups:
+                rollups[name] = rollups[name].appended(df, start)
+            elif stale(spec["table"]):
+                rollups[name] = DailyRollup(
+                    df,
+                    spec["date_column"],
+                    spec["measures"],
+                    spec["dimensions"],
+                    spec.get("orders_column"),
+                )
+        self.rollups = rollups
+
+        start = appended.get("sales_fact")
+        if start is not None and self.sales_cube is not None:
+            self.sales_cube = self.sales_cube.appended(self.df_sales_fact, start)
+        elif stale("df_sales_fact"):
+            self.sales_cube = AggregateCube(
+                self.df_sales_fact,
+                "transaction_date",
+                SALES_DIMENSIONS,
+                ["revenue", "quantity"],
+                orders_column="transaction_id",
+                min_reduction=SALES_CUBE_MIN_REDUCTION,
+            )
+
+    def _supplier_names(self):
+        """Названия поставщиков по supplier_id (пустая таблица, если их нет)"""
+        if self.df_suppliers is not None:
+            return self.df_suppliers[["supplier_id", "supplier_name"]]
+        return pd.DataFrame(
+            {
+                "supplier_id": pd.Series(dtype="int64"),
+                "supplier_name": pd.Series(dtype="object"),
+            }
+        )
+
+    def _build_sales_fact(self, sales=None):
+        """
+        Строит широкую таблицу продаж один раз при загрузке: к каждой транзакции
+        присоединены товар, цена, категория, поставщик, регион и сегмент клиента,
+        а выручка посчитана заранее. Вкладки фильтруют её напрямую, без merge
+        на каждый запрос. Таблица общая для всех запросов - изменять её нельзя.
+        sales - строки продаж, по умолчанию вся df_sales.
+        """
+        if sales is None:
+            sales = self.df_sales
+        suppliers = self._supplier_names()
+
+        df = sales.merge(
+            self.df_products[
+                ["product_id", "product_name", "category", "price", "supplier_id"]
+            ],
+            on="product_id",
+            how="left",
+        )
+        df = df.merge(suppliers, on="supplier_id", how="left")
+        df = df.merge(
+            self.df_user_segments[["customer_id", "region", "segment"]],
+            on="customer_id",
+            how="left",
+        )
+        df["revenue"] = df["quantity"] * df["price"]
+
+        # Названия товаров и поставщиков - категории: их коды лежат в обычном
+        # массиве чисел, а колонка object держит ссылки на строки Python, чьи
+        # счетчики ссылок меняются при каждом чтении - в воркерах gunicorn это
+        # копировало бы общие с мастером страницы памяти
+        return df.astype({"product_name": "category", "supplier_name": "category"})
+
+    def _build_returns_fact(self):
+        """
+        Возвраты с измерениями фильтров продаж: категория и поставщик - по
+        товару возврата, регион и сегмент - по клиенту возврата, а из продажи
+        с той же транзакцией берутся только дата и способ оплаты (у строк одной
+        транзакции они общие). Возвраты без найденной продажи остаются в
+        таблице с пропусками даты и способа оплаты: они входят в итоги без
+        фильтров и не проходят фильтры по этим колонкам.
+        """
+        if self.df_returns is None:
+            return None
+
+        transactions = self.df_sales[
+            ["transaction_id", "transaction_date", "payment_method"]
+        ].drop_duplicates("transaction_id")
+        returns = self.df_returns.merge(transactions, on="transaction_id", how="left")
+        returns = returns.merge(
+            self.df_products[["product_id", "category", "supplier_id"]],
+            on="product_id",
+            how="left",
+        )
+        returns = returns.merge(self._supplier_names(), on="supplier_id", how="left")
+        returns = returns.merge(
+            self.df_user_segments[["customer_id", "region", "segment"]],
+            on="customer_id",
+            how="left",
+        )
+        returns = returns.astype({"supplier_name": "category"})
+        return returns.sort_values(
+            "transaction_date", kind="stable", ignore_index=True
+        )
+
+    def _build_ad_fact(self, ad_revenue=None):
+        """Рекламные расходы (по умолчанию все) с категорией рекламируемого товара"""
+        if ad_revenue is None:
+            ad_revenue = self.df_ad_revenue
+        if ad_revenue is None:
+            return None
+        return ad_revenue.merge(
+            self.df_products[["product_id", "category"]], on="product_id", how="left"
+        )
+
+    def _build_traffic_fact(self, traffic=None):
+        """
+        Сессии (по умолчанию все) с регионом, сегментом и датой регистрации
+        клиента. Клиенты без записи в user_segments остаются с пропусками в
+        этих колонках.
+        """
+        if traffic is None:
+            traffic = self.df_traffic
+        if traffic is None:
+            return None
+        return traffic.merge(
+            self.df_user_segments[
+                ["customer_id", "region", "segment", "registration_date"]
+            ],
+            on="customer_id",
+            how="left",
+        )
 
     def _create_sample_data(self):
         """Создание тестовых данных если CSV не найдены"""
@@ -145,4 +947,6 @@ class DataManager:
                 "page_url": ["/home", "/product/1", "/checkout", "/product/2"],
                 "product_id": [None, 1, 1, 2],
             }
-        )
\ No newline at end of file
+        )
+
+        self._build_derived_tables()
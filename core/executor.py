@@ -0,0 +1,212 @@
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from core.cache import disable_figure_fragments, figure_response
+from core.instrumentation import measure_phase
+from core.profiling import profile_thread
+
+# Построители графиков по имени (id компонента). Реестр модульный, чтобы
+# процессы пула, запущенные через fork, находили функции без их сериализации
+_CHARTS = {}
+
+
+def error_figure(message):
+    """Пустая фигура с текстом ошибки вместо графика"""
+    return {
+        "data": [],
+        "layout": {
+            "title": message,
+            "xaxis": {"visible": False},
+            "yaxis": {"visible": False},
+        },
+    }
+
+
+def _build_chart(name, args, deadline=None):
+    if deadline is not None and time.monotonic() > deadline:
+        # Запрос уже ответил ошибкой по таймауту - не занимаем поток пула
+        raise FutureTimeoutError()
+    with measure_phase("figure"), profile_thread():
+        return _CHARTS[name](*args)
+
+
+class ChartExecutor:
+    """
+    Параллельное построение графиков одного callback. Режимы:
+    "thread" - пул потоков (по умолчанию), "process" - пул процессов через fork
+    для тяжелых графиков, "serial" - по очереди в потоке запроса.
+
+    Каждый график строится независимо: если он упал или не уложился в timeout
+    секунд, вместо него возвращается фигура с ошибкой, остальные отрисуются.
+    Поток, строящий график дольше timeout, прервать нельзя: он дорабатывает
+    в фоне, а пул заменяется новым (см. _abandon). Задачи, дождавшиеся
+    очереди после таймаута своего запроса, не выполняются.
+    В режиме "process" пул создается через start() до запуска других потоков
+    процесса и видит данные на момент запуска. Позже, в работающем процессе,
+    пул процессов не создается: fork из многопоточного процесса может
+    унаследовать блокировку, захваченную другим потоком (например,
+    CalculationCache._lock), и процесс пула навсегда зависнет на ней. Поэтому
+    после shutdown() (перезагрузка данных) графики строятся в пуле потоков.
+    """
+
+    KINDS = ("thread", "process", "serial")
+
+    def __init__(self, kind="thread", max_workers=6, timeout=30.0):
+        if kind not in self.KINDS:
+            print(f"Неизвестный режим построения графиков {kind}, используем thread")
+            kind = "thread"
+        if kind == "process" and "fork" not in multiprocessing.get_all_start_methods():
+            print("Пул процессов требует fork, используем пул потоков")
+            kind = "thread"
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool = None
+        self._lock = threading.Lock()
+        # Задачи, брошенные по таймауту и еще не завершившиеся
+        self._abandoned = set()
+
+    @classmethod
+    def from_env(cls):
+        """Настройки из DASHBOARD_CHART_EXECUTOR, _WORKERS и _TIMEOUT"""
+        return cls(
+            kind=os.environ.get("DASHBOARD_CHART_EXECUTOR", "thread"),
+            max_workers=int(os.environ.get("DASHBOARD_CHART_WORKERS", "6")),
+            timeout=float(os.environ.get("DASHBOARD_CHART_TIMEOUT", "30")),
+        )
+
+    @staticmethod
+    def register(name, build):
+        """Регистрирует построитель графика под именем (обычно id компонента)"""
+        _CHARTS[name] = build
+
+    def start(self):
+        """
+        Создает пул заранее. В режиме "process" вызывается, пока в процессе
+        нет других потоков: в post_fork воркера gunicorn или перед app.run
+        """
+        with self._lock:
+            if self.kind == "process" and threading.active_count() > 1:
+                print("В процессе уже работают потоки, используем пул потоков")
+                self.kind = "thread"
+            if self._pool is None and self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    self.max_workers,
+                    mp_context=multiprocessing.get_context("fork"),
+                    initializer=disable_figure_fragments,
+                )
+        pool = self._get_pool()
+        if self.kind == "process":
+            # Процессы пула с fork запускаются при первой задаче - сейчас
+            pool.submit(int).result()
+
+    def _get_pool(self):
+        # Пул потоков создается при первом запросе, а не при импорте: так
+        # потоки не переживают fork воркеров веб-сервера
+        with self._lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    print("Пул процессов не запущен, используем пул потоков")
+                    self.kind = "thread"
+                self._pool = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="charts"
+                )
+            return self._pool
+
+    @staticmethod
+    def _submit(pool, name, args, deadline):
+        if isinstance(pool, ProcessPoolExecutor):
+            return pool.submit(_build_chart, name, args, deadline)
+        # Контекст (contextvars) запроса Dash переносим в поток пула
+        context = contextvars.copy_context()
+        return pool.submit(context.run, _build_chart, name, args, deadline)
+
+    def _submit_all(self, tasks, deadline):
+        """Пул и futures задач tasks"""
+        while True:
+            pool = self._get_pool()
+            futures = []
+            try:
+                for name, args in tasks:
+                    futures.append(self._submit(pool, name, args, deadline))
+                return pool, futures
+            except RuntimeError:
+                for future in futures:
+                    future.cancel()
+                # Пул заменили (_abandon, shutdown) между _get_pool и submit
+                if self._pool is pool:
+                    raise
+
+    def _abandon(self, pool, future):
+        """
+        Задача future не уложилась в timeout и уже выполняется. Чтобы
+        следующие запросы не ждали в очереди за ней, пул заменяется новым,
+        а старый завершится сам, когда его задачи доработают. Пока брошенных
+        задач больше max_workers, пул не заменяется, чтобы не плодить потоки
+        """
+        if future.done():
+            return
+        with self._lock:
+            self._abandoned = {f for f in self._abandoned if not f.done()}
+            self._abandoned.add(future)
+            if self._pool is not pool or isinstance(pool, ProcessPoolExecutor):
+                return
+            if len(self._abandoned) > self.max_workers:
+                print(f"Брошенных по таймауту графиков: {len(self._abandoned)}")
+                return
+            self._pool = None
+        pool.shutdown(wait=False)
+
+    @staticmethod
+    def _failed(name, e):
+        print(f"Error building chart {name}: {e}")
+        return error_figure(f"Ошибка при загрузке данных: {str(e)}")
+
+    def _run_serial(self, name, args):
+        try:
+            return _build_chart(name, args)
+        except Exception as e:
+            return self._failed(name, e)
+
+    def run(self, tasks):
+        """
+        Строит графики tasks - список (имя, аргументы) - и возвращает фигуры
+        в том же порядке
+        """
+        if self.kind == "serial" or len(tasks) <= 1:
+            return [self._run_serial(name, args) for name, args in tasks]
+
+        deadline = time.monotonic() + self.timeout
+        pool, futures = self._submit_all(tasks, deadline)
+
+        results = []
+        for (name, _), future in zip(tasks, futures):
+            try:
+                figure = future.result(timeout=max(deadline - time.monotonic(), 0))
+                results.append(figure_response(figure))
+            except FutureTimeoutError:
+                if not future.cancel():
+                    self._abandon(pool, future)
+                print(f"Chart {name} timed out after {self.timeout} s")
+                results.append(error_figure("Превышено время построения графика"))
+            except Exception as e:
+                results.append(self._failed(name, e))
+        return results
+
+    def shutdown(self):
+        """Останавливает пул; следующий запрос создаст новый пул потоков"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            if self.kind == "process":
+                self.kind = "thread"
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+chart_executor = ChartExecutor.from_env()
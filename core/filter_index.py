@@ -0,0 +1,150 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+
+def date_slice(dates, start_date, end_date):
+    """
+    Границы [lo, hi) строк отсортированной колонки дат, попадающих в диапазон
+    [start_date, end_date] включительно
+    """
+    values = dates.to_numpy()
+    lo = int(values.searchsorted(pd.Timestamp(start_date).to_datetime64(), "left"))
+    hi = int(values.searchsorted(pd.Timestamp(end_date).to_datetime64(), "right"))
+    return lo, max(hi, lo)
+
+
+class FilterIndex:
+    """
+    Инвертированный индекс таблицы по измерениям фильтров. Для каждого значения
+    измерения (регион, сегмент, категория, ...) заранее хранится битовая карта
+    строк. Фильтр по нескольким измерениям - это OR карт внутри измерения, AND
+    между измерениями и одна итоговая выборка строк через take.
+    """
+
+    def __init__(self, df, dimensions, date_column=None):
+        self.df = df
+        self.size = len(df)
+        self.date_column = date_column
+        self._sorted = bool(date_column) and df[date_column].is_monotonic_increasing
+        self._bitmaps = {}
+
+        for dimension in dimensions:
+            if dimension in df.columns:
+                self._bitmaps[dimension] = self._build_bitmaps(df[dimension])
+
+    @staticmethod
+    def _value_masks(column):
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy()
+            values = column.cat.categories
+        else:
+            codes, values = pd.factorize(column)
+
+        # Пропуски (код -1) не попадают ни в одну карту - как и при isin
+        return {value: codes == code for code, value in enumerate(values)}
+
+    @classmethod
+    def _build_bitmaps(cls, column):
+        return {
+            value: np.packbits(mask) for value, mask in cls._value_masks(column).items()
+        }
+
+    @classmethod
+    def _extend_bitmaps(cls, bitmaps, size, column):
+        """Карты size строк, дополненные строками column"""
+        full_bytes, tail_bits = divmod(size, 8)
+        empty = np.zeros((size + 7) // 8, dtype=np.uint8)
+        no_rows = np.zeros(len(column), dtype=bool)
+        masks = cls._value_masks(column)
+
+        extended = {}
+        for value in dict.fromkeys([*bitmaps, *masks]):
+            bitmap = bitmaps.get(value, empty)
+            # Неполный последний байт распаковываем и дописываем к нему новые биты
+            tail = np.unpackbits(bitmap[full_bytes:])[:tail_bits].astype(bool)
+            bits = np.concatenate([tail, masks.get(value, no_rows)])
+            extended[value] = np.concatenate([bitmap[:full_bytes], np.packbits(bits)])
+        return extended
+
+    def appended(self, df, start):
+        """
+        Индекс таблицы df, строки [0, start) которой совпадают с уже
+        проиндексированными, а остальные дописаны: карты значений дополняются
+        битами только новых строк. Текущий индекс не меняется
+        """
+        index = copy.copy(self)
+        index.df = df
+        index.size = len(df)
+        if self._sorted:
+            # Порядок сохраняется, если новые строки не раньше последней старой
+            dates = df[self.date_column].iloc[max(start - 1, 0) :]
+            index._sorted = dates.is_monotonic_increasing
+        rows = df.iloc[start:]
+        index._bitmaps = {
+            dimension: self._extend_bitmaps(bitmaps, start, rows[dimension])
+            for dimension, bitmaps in self._bitmaps.items()
+        }
+        return index
+
+    def _dimension_bitmap(self, dimension, values):
+        bitmaps = self._bitmaps[dimension]
+        result = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        for value in values:
+            bitmap = bitmaps.get(value)
+            if bitmap is not None:
+                np.bitwise_or(result, bitmap, out=result)
+        return result
+
+    def _combined_bitmap(self, filters):
+        """Карта строк под фильтрами измерений или None, если их нет"""
+        combined = None
+        for dimension, values in (filters or {}).items():
+            if not values:
+                continue
+            bitmap = self._dimension_bitmap(dimension, values)
+            combined = bitmap if combined is None else np.bitwise_and(combined, bitmap)
+        return combined
+
+    @staticmethod
+    def _unpack(bitmap, lo, hi):
+        """Булева маска строк [lo, hi) из упакованной карты"""
+        first_byte = lo // 8
+        bits = np.unpackbits(bitmap[first_byte : (hi + 7) // 8])
+        offset = lo - first_byte * 8
+        return bits[offset : offset + max(hi - lo, 0)].astype(bool)
+
+    def select(self, filters=None, start_date=None, end_date=None):
+        """
+        Строки таблицы, прошедшие фильтры. Пустые списки значений означают
+        "без фильтра", диапазон дат применяется, только если заданы обе
+        границы. Если таблица отсортирована по дате, диапазон находится
+        двоичным поиском, а без фильтров измерений возвращается срез без
+        копирования. Изменять результат нельзя.
+        """
+        combined = self._combined_bitmap(filters)
+
+        lo, hi, date_mask = 0, self.size, None
+        if self.date_column and start_date and end_date:
+            dates = self.df[self.date_column]
+            if self._sorted:
+                lo, hi = date_slice(dates, start_date, end_date)
+            else:
+                date_mask = (
+                    (dates >= pd.to_datetime(start_date))
+                    & (dates <= pd.to_datetime(end_date))
+                ).to_numpy()
+
+        if combined is None and date_mask is None:
+            if (lo, hi) == (0, self.size):
+                return self.df
+            return self.df.iloc[lo:hi]
+
+        if combined is None:
+            mask = date_mask
+        else:
+            mask = self._unpack(combined, lo, hi)
+            if date_mask is not None:
+                mask &= date_mask
+        return self.df.take(np.flatnonzero(mask) + lo)
@@ -0,0 +1,131 @@
+import io
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Сколько байт перед границей прочитанного хранится для проверки, что файл
+# только дописывали, а не перезаписали
+TAIL_BYTES = 64
+
+_CHUNK = 64 * 1024
+
+
+class _RangeReader(io.RawIOBase):
+    """Файл как поток из нескольких диапазонов байт [start, end)"""
+
+    def __init__(self, f, ranges):
+        self._f = f
+        self._ranges = [(start, end) for start, end in ranges if end > start]
+        self._position = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self._ranges:
+            start, end = self._ranges[0]
+            if self._position is None:
+                self._f.seek(start)
+                self._position = start
+            size = min(len(buffer), end - self._position)
+            if size > 0:
+                data = self._f.read(size)
+                if data:
+                    buffer[: len(data)] = data
+                    self._position += len(data)
+                    return len(data)
+            self._ranges.pop(0)
+            self._position = None
+        return 0
+
+
+def _header_end(f):
+    """Смещение конца строки заголовка CSV"""
+    f.seek(0)
+    return len(f.readline())
+
+
+def complete_offset(path, size):
+    """Конец последней целой строки файла в пределах первых size байт"""
+    with open(path, "rb") as f:
+        end = size
+        while end > 0:
+            start = max(end - _CHUNK, 0)
+            f.seek(start)
+            position = f.read(end - start).rfind(b"\n")
+            if position >= 0:
+                return start + position + 1
+            end = start
+    return 0
+
+
+def read_csv_range(path, start, end, **kwargs):
+    """
+    Строки CSV из байт [start, end) файла; заголовок берется из начала файла,
+    поэтому колонки и их разбор те же, что при чтении всего файла
+    """
+    with open(path, "rb") as f:
+        ranges = [(start, end)]
+        if start > 0:
+            ranges.insert(0, (0, _header_end(f)))
+        return pd.read_csv(io.BufferedReader(_RangeReader(f, ranges)), **kwargs)
+
+
+def _tail(f, offset):
+    f.seek(max(offset - TAIL_BYTES, 0))
+    return f.read(min(offset, TAIL_BYTES)).hex()
+
+
+def source_state(path, offset, rows):
+    """Сколько байт и строк файла прочитано и чем заканчивается прочитанное"""
+    with open(path, "rb") as f:
+        tail = _tail(f, offset)
+    return {"path": os.path.abspath(path), "offset": offset, "rows": rows, "tail": tail}
+
+
+def appended_range(state):
+    """
+    Диапазон [offset, конец целых строк) дописанных байт или None, если файл
+    укоротился или прочитанная часть изменилась
+    """
+    try:
+        size = os.path.getsize(state["path"])
+        if size < state["offset"]:
+            return None
+        with open(state["path"], "rb") as f:
+            if _tail(f, state["offset"]) != state["tail"]:
+                return None
+    except OSError:
+        return None
+    end = complete_offset(state["path"], size)
+    return state["offset"], max(end, state["offset"])
+
+
+def append_rows(df, rows):
+    """
+    Таблица df с дописанными в конец строками rows. Категориальные колонки
+    объединяются через union_categoricals: новые значения добавляются в конец
+    списка категорий, коды прежних не меняются. Остальные колонки приводятся
+    к общему типу, как при pd.concat.
+    """
+    if len(rows) == 0:
+        return df
+    if len(df) == 0:
+        return rows.reset_index(drop=True)
+
+    columns = {}
+    for column in df.columns:
+        old, new = df[column], rows[column]
+        if isinstance(old.dtype, pd.CategoricalDtype):
+            if new.isna().all():
+                # У пустой колонки нет категорий нужного типа
+                new = new.astype(old.dtype)
+            elif not isinstance(new.dtype, pd.CategoricalDtype):
+                new = new.astype("category")
+            columns[column] = union_categoricals([old, new], ignore_order=True)
+        else:
+            if isinstance(new.dtype, pd.CategoricalDtype):
+                new = new.astype(object)
+            columns[column] = pd.concat([old, new], ignore_index=True)
+    return pd.DataFrame(columns)
@@ -0,0 +1,321 @@
+import bisect
+import collections
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+from dash.exceptions import PreventUpdate
+
+# Фазы callback: расчеты (методы *Calculations), построение графиков
+# (методы *Charts) и сериализация ответа Dash в JSON. Остальное время
+# функции callback (разбор фильтров, сборка компонентов) - "other"
+PHASES = ("calculation", "figure", "serialization", "other")
+
+# Верхние границы корзин гистограмм времени, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Текущий вызов callback и текущая фаза. Пул графиков переносит контекст
+# запроса в свои потоки (см. ChartExecutor._submit), поэтому время графиков,
+# построенных параллельно, тоже попадает в вызов
+_current_call = contextvars.ContextVar("callback_call", default=None)
+_current_phase = contextvars.ContextVar("callback_phase", default=None)
+
+
+class Histogram:
+    """Гистограмма значений по корзинам bounds (как histogram в Prometheus)"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """Накопленные счетчики по корзинам (последняя - +Inf), сумма и число"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = [sum(counts[: i + 1]) for i in range(len(counts))]
+        return list(zip([*self.bounds, float("inf")], cumulative)), total, count
+
+
+class _Call:
+    """Замеры одного вызова callback"""
+
+    def __init__(self, name):
+        self.name = name
+        self.thread = threading.get_ident()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.phases_cpu = dict.fromkeys(PHASES, 0.0)
+        # Процессорное время фаз, выполненных в других потоках
+        self.other_cpu = 0.0
+        # Время самой функции callback в потоке запроса, без сериализации
+        self.function_wall = 0.0
+        self.function_cpu = 0.0
+        self.arguments = None
+        self._lock = threading.Lock()
+
+    def add(self, phase, wall, cpu):
+        with self._lock:
+            self.phases[phase] += wall
+            self.phases_cpu[phase] += cpu
+            if threading.get_ident() != self.thread:
+                self.other_cpu += cpu
+
+
+@contextlib.contextmanager
+def measure_phase(name):
+    """
+    Засчитывает время блока в фазу name текущего вызова callback. Вложенная
+    фаза приостанавливает внешнюю: график, который внутри вызывает расчеты,
+    делит время между figure и calculation без двойного счета. Вне callback
+    ничего не делает
+    """
+    call = _current_call.get()
+    if call is None:
+        yield
+        return
+
+    thread = threading.get_ident()
+    outer = _current_phase.get()
+    if outer is not None and outer[3] != thread:
+        # Фаза потока запроса, из которого контекст скопирован в пул
+        outer = None
+    now, cpu = time.perf_counter(), time.thread_time()
+    if outer is not None:
+        call.add(outer[0], now - outer[1], cpu - outer[2])
+
+    phase = [name, now, cpu, thread]
+    token = _current_phase.set(phase)
+    try:
+        yield
+    finally:
+        _current_phase.reset(token)
+        now, cpu = time.perf_counter(), time.thread_time()
+        call.add(name, now - phase[1], cpu - phase[2])
+        if outer is not None:
+            outer[1], outer[2] = now, cpu
+
+
+def _payload_size(response):
+    if isinstance(response, bytes):
+        return len(response)
+    if isinstance(response, str):
+        return len(response) if response.isascii() else len(response.encode())
+    return 0
+
+
+def callback_name(func):
+    """Имя callback с вкладкой: tabs.sales.callbacks -> sales.update_charts"""
+    module = func.__module__.removeprefix("tabs.").removesuffix(".callbacks")
+    return f"{module}.{func.__name__}"
+
+
+class CallbackInstrumentation:
+    """
+    Замеры callbacks Dash: на каждый callback - число вызовов, время (общее,
+    процессорное и по фазам, см. PHASES) и размер ответа. Вызовы дольше
+    slow_ms попадают в журнал медленных вызовов вместе с аргументами callback
+    (состоянием фильтров): последние slow_log_size хранятся в памяти, а если
+    задан slow_log_path, каждый дописывается туда строкой JSON.
+
+    Время фаз (phases) суммируется по потокам: графики, построенные в пуле
+    параллельно, вместе могут занять больше общего времени вызова, а
+    ожидание GIL и чужого расчета того же ключа кэша тоже засчитывается.
+    Процессорное время (cpu, phases_cpu) - поток запроса плюс фазы в пуле
+    потоков графиков, его фазы в сумме дают cpu; графики в пуле процессов
+    не учитываются.
+    """
+
+    def __init__(self, enabled=True, slow_ms=1000.0, slow_log_path=None):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.slow_log_path = slow_log_path
+        self.slow_log_size = 100
+        self.slow_calls = collections.deque(maxlen=self.slow_log_size)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Настройки из DASHBOARD_INSTRUMENTATION (0 - выключить),
+        DASHBOARD_SLOW_CALLBACK_MS и DASHBOARD_SLOW_CALLBACK_LOG
+        """
+        return cls(
+            enabled=os.environ.get("DASHBOARD_INSTRUMENTATION", "1") != "0",
+            slow_ms=float(os.environ.get("DASHBOARD_SLOW_CALLBACK_MS", "1000")),
+            slow_log_path=os.environ.get("DASHBOARD_SLOW_CALLBACK_LOG") or None,
+        )
+
+    def install(self, app):
+        """
+        Подменяет app.callback так, что каждый регистрируемый дальше callback
+        замеряется. Вызывать до регистрации callbacks вкладок
+        """
+        if not self.enabled:
+            return
+        register = app.callback
+
+        @functools.wraps(register)
+        def callback(*args, **kwargs):
+            registered = set(app.callback_map)
+            decorator = register(*args, **kwargs)
+            callback_ids = set(app.callback_map) - registered
+
+            def wrap(func):
+                name = callback_name(func)
+                result = decorator(self._wrap_function(func))
+                # Dash хранит обертку, которая вызывает функцию и сериализует
+                # ответ, - замер снаружи нее включает сериализацию
+                for callback_id in callback_ids:
+                    entry = app.callback_map[callback_id]
+                    entry["callback"] = self._wrap_dispatch(name, entry["callback"])
+                return result
+
+            return wrap
+
+        app.callback = callback
+
+    @staticmethod
+    def _wrap_function(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            call = _current_call.get()
+            if call is None:
+                return func(*args, **kwargs)
+            call.arguments = args
+            started, cpu_started = time.perf_counter(), time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                call.function_wall = time.perf_counter() - started
+                call.function_cpu = time.thread_time() - cpu_started
+
+        return wrapper
+
+    def _wrap_dispatch(self, name, dispatch):
+        @functools.wraps(dispatch)
+        def wrapper(*args, **kwargs):
+            call = _Call(name)
+            token = _current_call.set(call)
+            started, cpu_started = time.perf_counter(), time.thread_time()
+            response, error = None, None
+            try:
+                response = dispatch(*args, **kwargs)
+                return response
+            except PreventUpdate:
+                raise
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                _current_call.reset(token)
+                wall = time.perf_counter() - started
+                cpu = time.thread_time() - cpu_started
+                self._record(call, wall, cpu, _payload_size(response), error)
+
+        return wrapper
+
+    def _record(self, call, wall, cpu, payload, error):
+        phases, phases_cpu = dict(call.phases), dict(call.phases_cpu)
+        phases["serialization"] = max(wall - call.function_wall, 0.0)
+        phases_cpu["serialization"] = max(cpu - call.function_cpu, 0.0)
+        # Фазы в пуле идут параллельно потоку запроса, поэтому other не меньше 0
+        phases["other"] = max(
+            call.function_wall - phases["calculation"] - phases["figure"], 0.0
+        )
+        phases_cpu["other"] = max(
+            call.function_cpu
+            + call.other_cpu
+            - phases_cpu["calculation"]
+            - phases_cpu["figure"],
+            0.0,
+        )
+        cpu += call.other_cpu
+
+        with self._lock:
+            stats = self._stats.setdefault(
+                call.name,
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "wall": 0.0,
+                    "cpu": 0.0,
+                    "max_wall": 0.0,
+                    "payload": 0,
+                    "max_payload": 0,
+                    "phases": dict.fromkeys(PHASES, 0.0),
+                    "phases_cpu": dict.fromkeys(PHASES, 0.0),
+                    "latency": Histogram(),
+                },
+            )
+            stats["latency"].observe(wall)
+            stats["calls"] += 1
+            stats["errors"] += error is not None
+            stats["wall"] += wall
+            stats["cpu"] += cpu
+            stats["max_wall"] = max(stats["max_wall"], wall)
+            stats["payload"] += payload
+            stats["max_payload"] = max(stats["max_payload"], payload)
+            for phase in PHASES:
+                stats["phases"][phase] += phases[phase]
+                stats["phases_cpu"][phase] += phases_cpu[phase]
+
+        if wall * 1000 >= self.slow_ms:
+            self._log_slow_call(call, wall, cpu, payload, phases, phases_cpu, error)
+
+    def _log_slow_call(self, call, wall, cpu, payload, phases, phases_cpu, error):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "callback": call.name,
+            "wall_ms": round(wall * 1000, 1),
+            "cpu_ms": round(cpu * 1000, 1),
+            "payload_bytes": payload,
+            "phases_ms": {k: round(v * 1000, 1) for k, v in phases.items()},
+            "phases_cpu_ms": {k: round(v * 1000, 1) for k, v in phases_cpu.items()},
+            "arguments": call.arguments,
+            "error": None if error is None else str(error),
+        }
+        self.slow_calls.append(entry)
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        print(f"Медленный callback: {line}")
+        if self.slow_log_path:
+            try:
+                with self._lock, open(self.slow_log_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                print(f"Error writing slow callback log: {e}")
+
+    def stats(self):
+        """
+        Копия накопленной статистики: имя callback -> счетчики; latency -
+        гистограмма времени вызовов (Histogram, общая с накопителем)
+        """
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    "phases": dict(stats["phases"]),
+                    "phases_cpu": dict(stats["phases_cpu"]),
+                }
+                for name, stats in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+        self.slow_calls.clear()
+
+
+callback_instrumentation = CallbackInstrumentation.from_env()
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class LoadError(Exception):
+    """Ошибки загрузки таблиц: errors - имя таблицы -> исключение"""
+
+    def __init__(self, errors, skipped=()):
+        self.errors = dict(errors)
+        self.skipped = list(skipped)
+        message = "; ".join(f"{name}: {e}" for name, e in self.errors.items())
+        if self.skipped:
+            message += f"; не построены: {', '.join(self.skipped)}"
+        super().__init__(message)
+
+
+def load_workers():
+    """
+    Число потоков загрузки из DASHBOARD_LOAD_WORKERS (по умолчанию - число
+    ядер, не больше 8); 1 - по очереди
+    """
+    default = min(8, os.cpu_count() or 1)
+    return max(int(os.environ.get("DASHBOARD_LOAD_WORKERS", default)), 1)
+
+
+def run_tasks(tasks, max_workers=None):
+    """
+    Выполняет задачи загрузки в пуле потоков с учетом зависимостей: tasks -
+    словарь имя -> (функция, имена задач, от которых она зависит). Задача
+    запускается, как только готовы все ее зависимости, поэтому общее время
+    ограничено самой длинной цепочкой, а не суммой. Токенизатор CSV в pandas
+    отпускает GIL, так что файлы разбираются одновременно; разбор дат и
+    приведение типов идут под GIL. Пул процессов не используется: таблицы
+    пришлось бы копировать обратно через pickle.
+
+    Упавшая задача не останавливает остальные; зависящие от нее пропускаются.
+    Возвращает (результаты, время задач в секундах) или бросает LoadError
+    со всеми ошибками после завершения остальных задач.
+    """
+    max_workers = max_workers or load_workers()
+    results, timings, errors = {}, {}, {}
+    lock = threading.Lock()
+
+    def run(name, function):
+        started = time.perf_counter()
+        try:
+            return function()
+        finally:
+            with lock:
+                timings[name] = time.perf_counter() - started
+
+    pending = dict(tasks)
+    running = {}
+    skipped = []
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="data-load"
+    ) as pool:
+        while pending or running:
+            for name, (function, deps) in list(pending.items()):
+                failed = [dep for dep in deps if dep in errors or dep in skipped]
+                if failed:
+                    print(f"Таблица {name} не построена: нет {', '.join(failed)}")
+                    skipped.append(name)
+                    del pending[name]
+                elif all(dep in results for dep in deps):
+                    running[pool.submit(run, name, function)] = name
+                    del pending[name]
+            if not running:
+                # Зависимости оставшихся задач никогда не выполнятся
+                skipped.extend(pending)
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"Ошибка загрузки {name}: {e}")
+                    errors[name] = e
+
+    if errors or skipped:
+        raise LoadError(errors, skipped)
+    return results, timings
@@ -0,0 +1,287 @@
+import math
+import os
+import threading
+import time
+
+import flask
+
+from core.data_manager import SHARED_TABLES
+from core.instrumentation import PHASES, callback_instrumentation
+from core.schema import memory_bytes
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Память таблиц снимка считается один раз на версию данных: таблицы снимка
+# не меняются, а deep-подсчет строковых колонок на каждый опрос дорог
+_table_memory = {"version": None, "tables": {}}
+_table_memory_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(int(value))
+
+
+class _Writer:
+    """
+    Текст метрик в формате Prometheus. Образцы одной метрики собираются в
+    группу под ее HELP и TYPE, в каком бы порядке их ни добавляли; метки
+    labels добавляются к каждому образцу
+    """
+
+    def __init__(self, labels=None):
+        self.labels = dict(labels or {})
+        self._families = {}
+
+    def sample(self, name, kind, help_text, value, labels=None, suffix=""):
+        family = self._families.setdefault(
+            name, [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        )
+        labels = {**self.labels, **(labels or {})}
+        label_text = ""
+        if labels:
+            pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            label_text = f"{{{pairs}}}"
+        family.append(f"{name}{suffix}{label_text} {_number(value)}")
+
+    def histogram(self, name, help_text, histogram, labels=None):
+        labels = labels or {}
+        buckets, total, count = histogram.snapshot()
+        for bound, cumulative in buckets:
+            le = "+Inf" if math.isinf(bound) else repr(bound)
+            self.sample(
+                name,
+                "histogram",
+                help_text,
+                cumulative,
+                {**labels, "le": le},
+                "_bucket",
+            )
+        self.sample(name, "histogram", help_text, total, labels, "_sum")
+        self.sample(name, "histogram", help_text, count, labels, "_count")
+
+    def text(self):
+        return "".join(
+            line + "\n" for family in self._families.values() for line in family
+        )
+
+
+def _table_sizes(snapshot):
+    """Таблица -> (байты, строки) для снимка данных"""
+    with _table_memory_lock:
+        if _table_memory["version"] == (id(snapshot), snapshot.data_version):
+            return _table_memory["tables"]
+
+    tables = {}
+    for name in SHARED_TABLES:
+        df = getattr(snapshot, f"df_{name}", None)
+        if df is not None:
+            tables[name] = (memory_bytes(df), len(df))
+
+    with _table_memory_lock:
+        _table_memory["version"] = (id(snapshot), snapshot.data_version)
+        _table_memory["tables"] = tables
+    return tables
+
+
+def _write_callbacks(out, instrumentation):
+    for name, stats in sorted(instrumentation.stats().items()):
+        labels = {"callback": name}
+        out.histogram(
+            "dashboard_callback_duration_seconds",
+            "Callback wall time, including response serialization.",
+            stats["latency"],
+            labels,
+        )
+        out.sample(
+            "dashboard_callback_requests_total",
+            "counter",
+            "Callback calls.",
+            stats["calls"],
+            labels,
+        )
+        out.sample(
+            "dashboard_callback_errors_total",
+            "counter",
+            "Callback calls that raised an error.",
+            stats["errors"],
+            labels,
+        )
+        out.sample(
+            "dashboard_callback_cpu_seconds_total",
+            "counter",
+            "Callback CPU time (request thread and chart thread pool).",
+            stats["cpu"],
+            labels,
+        )
+        out.sample(
+            "dashboard_callback_response_bytes_total",
+            "counter",
+            "Callback response payload size.",
+            stats["payload"],
+            labels,
+        )
+        for phase in PHASES:
+            out.sample(
+                "dashboard_callback_phase_seconds_total",
+                "counter",
+                "Callback wall time by phase, summed over threads.",
+                stats["phases"][phase],
+                {**labels, "phase": phase},
+            )
+            out.sample(
+                "dashboard_callback_phase_cpu_seconds_total",
+                "counter",
+                "Callback CPU time by phase.",
+                stats["phases_cpu"][phase],
+                {**labels, "phase": phase},
+            )
+
+
+def _write_caches(out, snapshot):
+    caches = {
+        "calculation": snapshot.calculation_cache,
+        "figure": snapshot.figure_cache,
+    }
+    for cache_name, cache in caches.items():
+        stats = cache.stats()
+        labels = {"cache": cache_name}
+        lookups = stats["hits"] + stats["misses"]
+        out.sample(
+            "dashboard_cache_hits_total",
+            "counter",
+            "Cache hits since the current data snapshot was loaded.",
+            stats["hits"],
+            labels,
+        )
+        out.sample(
+            "dashboard_cache_misses_total",
+            "counter",
+            "Cache misses since the current data snapshot was loaded.",
+            stats["misses"],
+            labels,
+        )
+        out.sample(
+            "dashboard_cache_hit_ratio",
+            "gauge",
+            "Share of cache lookups served from the cache.",
+            stats["hits"] / lookups if lookups else None,
+            labels,
+        )
+        out.sample(
+            "dashboard_cache_entries",
+            "gauge",
+            "Cached entries.",
+            stats["entries"],
+            labels,
+        )
+        out.sample(
+            "dashboard_cache_bytes",
+            "gauge",
+            "Approximate size of cached values.",
+            stats["bytes"],
+            labels,
+        )
+
+
+def _write_data(out, snapshot, reloader):
+    for name, (size, rows) in _table_sizes(snapshot).items():
+        out.sample(
+            "dashboard_table_memory_bytes",
+            "gauge",
+            "DataFrame memory, including strings in object columns.",
+            size,
+            {"table": name},
+        )
+        out.sample(
+            "dashboard_table_rows", "gauge", "DataFrame rows.", rows, {"table": name}
+        )
+    for name, seconds in snapshot.load_report.items():
+        out.sample(
+            "dashboard_table_load_seconds",
+            "gauge",
+            "Time to load or build each table; table=total is the whole load.",
+            seconds,
+            {"table": name},
+        )
+
+    out.sample(
+        "dashboard_data_loaded",
+        "gauge",
+        "1 if data was loaded from files, 0 for sample data.",
+        int(snapshot.data_loaded),
+    )
+    out.sample(
+        "dashboard_data_version",
+        "gauge",
+        "Data snapshot version in this process.",
+        snapshot.data_version,
+    )
+    out.sample(
+        "dashboard_data_snapshot_age_seconds",
+        "gauge",
+        "Seconds since the current data snapshot was loaded.",
+        time.time() - snapshot.loaded_at if snapshot.loaded_at else None,
+    )
+    if reloader is not None:
+        out.histogram(
+            "dashboard_data_reload_duration_seconds",
+            "Background reload time, including cache warm-up.",
+            reloader.reload_duration,
+        )
+        out.sample(
+            "dashboard_data_reload_failures_total",
+            "counter",
+            "Background reloads that failed.",
+            reloader.reload_failures,
+        )
+
+
+def render_metrics(live_data, reloader=None, instrumentation=None):
+    """
+    Метрики процесса в текстовом формате Prometheus. Счетчики и гистограммы
+    свои у каждого процесса, поэтому все образцы помечены pid: под gunicorn
+    каждый воркер - отдельные ряды, и опрос то одного, то другого воркера не
+    выглядит для Prometheus как сброс счетчиков
+    """
+    out = _Writer({"pid": os.getpid()})
+    out.sample(
+        "dashboard_process_info",
+        "gauge",
+        "Process that served this scrape.",
+        1,
+    )
+    _write_callbacks(out, instrumentation or callback_instrumentation)
+    snapshot = live_data.current
+    _write_caches(out, snapshot)
+    _write_data(out, snapshot, reloader)
+    return out.text()
+
+
+def install_metrics(server, live_data, reloader=None, path="/metrics"):
+    """
+    Добавляет на сервер Flask страницу метрик path. Метрики свои у каждого
+    процесса и помечены его pid (см. render_metrics): под gunicorn с
+    несколькими воркерами опрос попадает в один из них, и ряды каждого
+    воркера обновляются не при каждом опросе. Окно rate() должно вмещать
+    несколько опросов каждого воркера; по всем воркерам ряды складываются
+    запросом, например sum without (pid) (rate(...))
+    """
+
+    @server.route(path)
+    def metrics():
+        try:
+            body = render_metrics(live_data, reloader)
+        except Exception as e:
+            print(f"Error rendering metrics: {e}")
+            return flask.Response(f"# error: {e}\n", 500, content_type=CONTENT_TYPE)
+        return flask.Response(body, content_type=CONTENT_TYPE)
@@ -0,0 +1,299 @@
+import contextlib
+import contextvars
+import cProfile
+import hmac
+import itertools
+import json
+import os
+import pstats
+import re
+import threading
+import time
+
+import flask
+
+from core.cache import bypass_caches
+from core.instrumentation import callback_name
+
+HEADER = "X-Dashboard-Profile"
+UPDATE_PATH = "/_dash-update-component"
+# Файл включения профилирования в output_dir: его видят все воркеры
+TOGGLE_FILE = "toggle.json"
+
+# Профиль текущего вызова. Пул графиков переносит контекст запроса в свои
+# потоки, и графики, построенные там, добавляются в тот же профиль
+_current_profile = contextvars.ContextVar("callback_profile", default=None)
+
+
+class _Profile:
+    """Профиль одного вызова callback: поток запроса и потоки пула графиков"""
+
+    def __init__(self, name, payload):
+        self.name = name
+        self.payload = payload
+        self.thread = threading.get_ident()
+        self.profiles = [cProfile.Profile()]
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        # Кэши отключены на время вызова: иначе повторный вызов с теми же
+        # фильтрами покажет в профиле только поиск в кэше
+        self.scope = contextlib.ExitStack()
+
+    def add(self, profile):
+        with self._lock:
+            self.profiles.append(profile)
+
+    def stats(self):
+        stats = None
+        with self._lock:
+            profiles = list(self.profiles)
+        for profile in profiles:
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            except TypeError:
+                # Профилировщик не успел ничего записать
+                continue
+        return stats
+
+
+@contextlib.contextmanager
+def profile_thread():
+    """
+    Профилирует блок в потоке пула, если профилируется вызов callback, из
+    которого блок запущен: cProfile видит только свой поток
+    """
+    current = _current_profile.get()
+    if current is None or current.thread == threading.get_ident():
+        yield
+        return
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        current.add(profile)
+
+
+def _top_functions(stats, limit):
+    rows = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:limit]
+    return [
+        {
+            "function": f"{filename}:{line}({function})",
+            "calls": calls,
+            "total_ms": round(total * 1000, 2),
+            "cumulative_ms": round(cumulative * 1000, 2),
+        }
+        for (filename, line, function), (_, calls, total, cumulative, _) in rows
+    ]
+
+
+class CallbackProfiler:
+    """
+    Профилирование отдельных вызовов callbacks (cProfile) на живом трафике.
+    Вызов профилируется, если в запросе есть заголовок X-Dashboard-Profile
+    с токеном или если профилирование включено через /_profiling для
+    callbacks с заданным префиксом имени (например, "marketing."). Без токена
+    (DASHBOARD_PROFILE_TOKEN) профилирование недоступно.
+
+    Профиль сохраняется в output_dir файлом pstats (python -m pstats,
+    snakeviz), а рядом - файл .json с именем callback, его входами и
+    состоянием (фильтрами), временем вызова и самыми дорогими функциями.
+    Профилируемый вызов идет мимо кэшей расчетов и графиков, чтобы профиль
+    показывал сами расчеты, а не поиск в кэше. Одновременно в процессе
+    профилируется один вызов, остальные идут без профилировщика. Графики из
+    пула потоков попадают в профиль, из пула процессов - нет.
+    """
+
+    def __init__(self, token=None, output_dir="profiles", top=30):
+        self.token = token
+        self.output_dir = output_dir
+        self.top = top
+        self._busy = threading.Lock()
+        self._counter = itertools.count(1)
+        # (mtime, содержимое) файла включения
+        self._toggle_cache = (None, None)
+
+    @classmethod
+    def from_env(cls):
+        """Токен из DASHBOARD_PROFILE_TOKEN, каталог - DASHBOARD_PROFILE_DIR"""
+        return cls(
+            token=os.environ.get("DASHBOARD_PROFILE_TOKEN") or None,
+            output_dir=os.environ.get("DASHBOARD_PROFILE_DIR", "profiles"),
+        )
+
+    def _authorized(self, value):
+        return value is not None and hmac.compare_digest(value, self.token)
+
+    def _toggle(self):
+        """Действующее включение через /_profiling или None"""
+        path = os.path.join(self.output_dir, TOGGLE_FILE)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        if self._toggle_cache[0] != mtime:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    toggle = json.load(f)
+            except (OSError, ValueError):
+                toggle = None
+            self._toggle_cache = (mtime, toggle)
+        toggle = self._toggle_cache[1]
+        if not toggle or toggle.get("until", 0) < time.time():
+            return None
+        return toggle
+
+    def _set_toggle(self, toggle):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, TOGGLE_FILE)
+        if toggle is None:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            return
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(toggle, f)
+        os.replace(temp, path)
+
+    def _requested(self, name):
+        header = flask.request.headers.get(HEADER)
+        if header is not None:
+            return self._authorized(header)
+        toggle = self._toggle()
+        return toggle is not None and name.startswith(toggle.get("callback", ""))
+
+    def _start(self, app):
+        body = flask.request.get_json(silent=True) or {}
+        entry = app.callback_map.get(body.get("output"))
+        if entry is None:
+            return
+        name = callback_name(entry["callback"])
+        if not self._requested(name) or not self._busy.acquire(blocking=False):
+            return
+        profile = _Profile(name, body)
+        _current_profile.set(profile)
+        profile.scope.enter_context(bypass_caches())
+        flask.g.callback_profile = profile
+        profile.profiles[0].enable()
+
+    def _finish(self, profile, status):
+        """Останавливает профиль и сохраняет его; имя файла или None"""
+        profile.profiles[0].disable()
+        wall = time.perf_counter() - profile.started
+        _current_profile.set(None)
+        profile.scope.close()
+        self._busy.release()
+        try:
+            return self._save(profile, wall, status)
+        except Exception as e:
+            print(f"Error saving callback profile: {e}")
+            return None
+
+    def _save(self, profile, wall, status):
+        stats = profile.stats()
+        if stats is None:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe_name = re.sub(r"[^\w.-]", "_", profile.name)
+        base = (
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_name}"
+            f"-{os.getpid()}-{next(self._counter)}"
+        )
+        stats.dump_stats(os.path.join(self.output_dir, f"{base}.prof"))
+        payload = profile.payload
+        details = {
+            "callback": profile.name,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "pid": os.getpid(),
+            "status": status,
+            "wall_ms": round(wall * 1000, 1),
+            "profile": f"{base}.prof",
+            "output": payload.get("output"),
+            "inputs": payload.get("inputs"),
+            "state": payload.get("state"),
+            "changed": payload.get("changedPropIds"),
+            "top": _top_functions(stats, self.top),
+        }
+        with open(
+            os.path.join(self.output_dir, f"{base}.json"), "w", encoding="utf-8"
+        ) as f:
+            json.dump(details, f, ensure_ascii=False, indent=1, default=str)
+        print(f"Профиль {profile.name} ({details['wall_ms']} мс): {base}.prof")
+        return f"{base}.prof"
+
+    def _admin(self):
+        """
+        GET - состояние и последние профили; POST с callback (префикс имени)
+        и seconds - включить профилирование на seconds секунд; DELETE -
+        выключить. Токен - только в заголовке X-Dashboard-Profile: в адресе
+        он попал бы в журналы доступа и историю браузера
+        """
+        request = flask.request
+        if not self._authorized(request.headers.get(HEADER)):
+            return flask.jsonify({"error": "forbidden"}), 403
+
+        if request.method == "POST":
+            params = {
+                **request.args,
+                **request.form,
+                **(request.get_json(silent=True) or {}),
+            }
+            try:
+                seconds = float(params.get("seconds", 300))
+            except (TypeError, ValueError):
+                return flask.jsonify({"error": "seconds must be a number"}), 400
+            self._set_toggle(
+                {"callback": params.get("callback", ""), "until": time.time() + seconds}
+            )
+        elif request.method == "DELETE":
+            self._set_toggle(None)
+
+        try:
+            files = sorted(
+                name for name in os.listdir(self.output_dir) if name.endswith(".prof")
+            )
+        except OSError:
+            files = []
+        return flask.jsonify({"toggle": self._toggle(), "profiles": files[-20:]})
+
+    def install(self, app, path="/_profiling"):
+        """
+        Подключает профилирование к серверу Flask приложения Dash app и
+        добавляет страницу управления path. Без токена ничего не делает
+        """
+        if not self.token:
+            return
+        server = app.server
+
+        @server.before_request
+        def start_callback_profile():
+            if flask.request.path.endswith(UPDATE_PATH):
+                self._start(app)
+
+        @server.after_request
+        def save_callback_profile(response):
+            profile = flask.g.pop("callback_profile", None)
+            if profile is not None:
+                saved = self._finish(profile, response.status_code)
+                if saved:
+                    response.headers["X-Dashboard-Profile-File"] = saved
+            return response
+
+        @server.teardown_request
+        def stop_callback_profile(exc=None):
+            # Запрос упал раньше after_request
+            profile = flask.g.pop("callback_profile", None)
+            if profile is not None:
+                self._finish(profile, 500)
+
+        server.add_url_rule(
+            path, "callback_profiling", self._admin, methods=["GET", "POST", "DELETE"]
+        )
+
+
+callback_profiler = CallbackProfiler.from_env()
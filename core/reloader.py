@@ -0,0 +1,166 @@
+import contextvars
+import os
+import threading
+import time
+
+import flask
+
+from core.executor import chart_executor
+from core.instrumentation import Histogram
+from core.warmup import warm_up_tabs
+
+
+class LiveData:
+    """
+    Заместитель DataManager для вкладок: атрибуты берутся из снимка данных,
+    закрепленного за текущим запросом (pin), а вне запроса - из последнего.
+    Новый снимок подменяется целиком (swap), поэтому запрос от начала до
+    конца видит одну версию таблиц, индексов и кэшей.
+    """
+
+    def __init__(self, data_manager):
+        self._current = data_manager
+        self._pinned = contextvars.ContextVar("data_snapshot", default=None)
+
+    @property
+    def snapshot(self):
+        """Снимок текущего запроса или последний загруженный"""
+        return self._pinned.get() or self._current
+
+    @property
+    def current(self):
+        return self._current
+
+    def __getattr__(self, name):
+        return getattr(self.snapshot, name)
+
+    def pin(self, snapshot=None):
+        """Закрепляет снимок (по умолчанию последний) за текущим контекстом"""
+        return self._pinned.set(snapshot or self._current)
+
+    def unpin(self, token):
+        self._pinned.reset(token)
+
+    def swap(self, data_manager):
+        self._current = data_manager
+
+
+class DataReloader:
+    """
+    Фоновая перезагрузка данных: раз в interval секунд сравнивает отпечатки
+    исходных CSV и, если файлы изменились, собирает новый снимок с
+    перечитанными таблицами (DataManager.reloaded), прогревает на нем кэши
+    вкладок и подменяет им текущий. Запросы не ждут загрузки: до подмены они
+    работают со старым снимком.
+
+    Воркеры веб-сервера (workers > 1) следят за файлами каждый сам, поэтому
+    перезагрузка в них работает только с общим хранилищем таблиц: первый
+    заметивший изменения воркер публикует новую версию, остальные отображают
+    ее (см. DataManager._load_shared_tables). Без хранилища каждый воркер
+    разбирал бы CSV и держал свою копию таблиц - перезагрузка отключается.
+    """
+
+    def __init__(self, live_data, tabs=(), interval=30.0, workers=1):
+        self.live_data = live_data
+        self.tabs = list(tabs)
+        self.interval = interval
+        if interval > 0 and workers > 1 and live_data.current.shared_store is None:
+            print(
+                "Перезагрузка данных в нескольких воркерах требует "
+                "DASHBOARD_SHARED_DIR, перезагрузка отключена"
+            )
+            self.interval = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        # Отпечатки файлов, загрузка которых не удалась: повторяем, только
+        # когда файлы снова изменятся
+        self._failed = None
+        # Длительность удачных перезагрузок (с прогревом) и число неудачных
+        self.reload_duration = Histogram()
+        self.reload_failures = 0
+
+    @classmethod
+    def from_env(cls, live_data, tabs=()):
+        """
+        Интервал из DASHBOARD_RELOAD_INTERVAL, секунды (0 - не следить), и
+        число воркеров из DASHBOARD_WORKERS (задает gunicorn.conf.py)
+        """
+        interval = float(os.environ.get("DASHBOARD_RELOAD_INTERVAL", "30"))
+        workers = int(os.environ.get("DASHBOARD_WORKERS", "1"))
+        return cls(live_data, tabs, interval, workers)
+
+    def install(self, server):
+        """
+        Подключает перезагрузку к Flask: поток наблюдения запускается с
+        первым запросом процесса, а каждый запрос закрепляет за собой снимок
+        """
+
+        @server.before_request
+        def pin_data_snapshot():
+            self.ensure_running()
+            flask.g.data_snapshot_token = self.live_data.pin()
+
+        @server.teardown_request
+        def unpin_data_snapshot(exc=None):
+            token = flask.g.pop("data_snapshot_token", None)
+            if token is not None:
+                self.live_data.unpin(token)
+
+    def ensure_running(self):
+        """
+        Запускает поток наблюдения в текущем процессе. Потоки не переживают
+        fork, поэтому воркеры gunicorn запускают свой поток сами
+        """
+        if self.interval <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._thread = threading.Thread(
+                target=self._watch, name="data-reload", daemon=True
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error checking data files: {e}")
+
+    def check(self):
+        """Перезагружает изменившиеся таблицы; True, если снимок подменен"""
+        current = self.live_data.current
+        changed = current.changed_tables()
+        if not changed or changed == self._failed:
+            return False
+
+        started = time.perf_counter()
+        try:
+            snapshot = current.reloaded(list(changed))
+        except Exception as e:
+            print(f"Error reloading tables {', '.join(changed)}: {e}")
+            self._failed = changed
+            self.reload_failures += 1
+            return False
+        self._failed = None
+
+        if self.tabs:
+            token = self.live_data.pin(snapshot)
+            try:
+                warm_up_tabs(self.tabs)
+            finally:
+                self.live_data.unpin(token)
+
+        self.live_data.swap(snapshot)
+        if chart_executor.kind == "process":
+            # Процессы пула видят данные на момент своего запуска; дальше
+            # графики строятся в пуле потоков
+            chart_executor.shutdown()
+        duration = time.perf_counter() - started
+        self.reload_duration.observe(duration)
+        print(f"Данные обновлены ({', '.join(changed)}) за {duration:.1f} с")
+        return True
@@ -0,0 +1,286 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+DAY = np.timedelta64(1, "D")
+
+
+def value_codes(column):
+    """
+    Коды значений колонки (int64, -1 - пропуск) и их тип category. У
+    категориальной колонки это ее собственные коды и категории, включая
+    категории без строк, у остальных - результат pd.factorize
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy().astype(np.int64), column.dtype
+    codes, uniques = pd.factorize(column)
+    return codes.astype(np.int64), pd.CategoricalDtype(uniques)
+
+
+def day_bounds(start_date, end_date):
+    """
+    Диапазон фильтра дат в днях: (первый день, последний день, последний день
+    целиком). Фильтр включает обе границы, поэтому конец "2025-06-30" (полночь)
+    берет из последнего дня только строки ровно в полночь, а конец в последнюю
+    наносекунду суток - весь день. None, если границы не на начале/конце суток.
+    """
+    start = pd.Timestamp(start_date)
+    end = pd.Timestamp(end_date)
+    if start != start.normalize():
+        return None
+
+    first_day = start.to_datetime64().astype("datetime64[D]")
+    last_day = end.to_datetime64().astype("datetime64[D]")
+    if end == end.normalize():
+        return first_day, last_day, False
+    next_ns = end + pd.Timedelta(1, "ns")
+    if next_ns == next_ns.normalize():
+        return first_day, last_day, True
+    return None
+
+
+class DailyRollup:
+    """
+    Дневные агрегаты таблицы с накопленными суммами: сумма мер за любой
+    диапазон дат - это разность двух префиксных сумм. Агрегаты хранятся для
+    всей таблицы и для каждого значения каждого измерения, поэтому без фильтров
+    или с фильтром по одному измерению KPI считаются без просмотра строк.
+
+    Для границ диапазона (см. day_bounds) отдельно храним суммы строк, попавших
+    ровно на полночь.
+
+    Агрегаты всех значений измерения строятся за один проход np.bincount по
+    ключу "код значения x число дней + день", а памяти они занимают по два
+    массива дни x меры на значение - поэтому измерения с тысячами значений
+    (названия кампаний) сюда передавать не стоит.
+    """
+
+    def __init__(self, df, date_column, measures, dimensions=(), orders_column=None):
+        self.date_column = date_column
+        self.measures = list(measures) + ["rows"]
+        self.dimensions = set(dimensions)
+        self.orders_column = orders_column
+        self._set_flags(df)
+
+        days = self._days(df)
+        self.first_day = days.min() if len(days) else np.datetime64(0, "D")
+        self.size = int((days.max() - self.first_day) // DAY) + 1 if len(days) else 0
+
+        self._rollups = {
+            key: self._build(*sums)
+            for key, sums in self._group_sums(df, self._rows(df)).items()
+        }
+
+    def _set_flags(self, df):
+        self._integer = {
+            m: m == "rows" or pd.api.types.is_integer_dtype(df[m])
+            for m in self.measures
+        }
+        # Число строк равно числу заказов, только если id заказа уникален
+        self.orders_are_rows = bool(
+            self.orders_column and df[self.orders_column].is_unique
+        )
+
+    def _days(self, df):
+        """Дни строк с датой"""
+        dates = df[self.date_column].to_numpy(dtype="datetime64[ns]")
+        return dates[~np.isnat(dates)].astype("datetime64[D]")
+
+    def _rows(self, df):
+        """Номер дня от first_day, признаки "есть дата" и "ровно полночь", меры"""
+        dates = df[self.date_column].to_numpy(dtype="datetime64[ns]")
+        valid = ~np.isnat(dates)
+        days = dates.astype("datetime64[D]")
+        day_index = np.zeros(len(dates), dtype=np.int64)
+        day_index[valid] = (days[valid] - self.first_day) // DAY
+        midnight = valid & (dates == days.astype("datetime64[ns]"))
+
+        # Меры по строкам: массив меры x строки, строки каждой меры подряд
+        values = np.empty((len(self.measures), len(df)))
+        for i, m in enumerate(self.measures):
+            if m == "rows":
+                values[i] = 1
+            else:
+                values[i] = np.nan_to_num(df[m].to_numpy(dtype="float64"))
+        return day_index, valid, midnight, values
+
+    def _sums(self, rows, codes, count):
+        """
+        Дневные суммы, суммы строк ровно в полночь и итоги для count групп
+        строк: codes - номер группы каждой строки (-1 - ни в одной). Массивы
+        (count, дни, меры), (count, дни, меры) и (count, меры)
+        """
+        day_index, valid, midnight, values = rows
+        grouped = codes >= 0
+        cells = count * self.size
+        # Строки вне групп и без даты попадают в лишнюю последнюю ячейку: так
+        # меры не приходится выбирать по маске
+        daily_key = np.where(grouped & valid, codes * self.size + day_index, cells)
+        # Строк ровно в полночь и строк без даты обычно мало - их выбираем
+        at_midnight = grouped & midnight
+        midnight_key = daily_key[at_midnight]
+        midnight_values = values[:, at_midnight]
+        undated = grouped & ~valid
+        undated_codes = codes[undated]
+        undated_values = values[:, undated]
+
+        shape = (count, self.size, len(values))
+        daily, midnight_daily = np.empty(shape), np.empty(shape)
+        undated_totals = np.empty((count, len(values)))
+        for m in range(len(values)):
+            daily[:, :, m] = np.bincount(daily_key, values[m], minlength=cells + 1)[
+                :cells
+            ].reshape(count, self.size)
+            midnight_daily[:, :, m] = np.bincount(
+                midnight_key, midnight_values[m], minlength=cells
+            ).reshape(count, self.size)
+            undated_totals[:, m] = np.bincount(
+                undated_codes, undated_values[m], minlength=count
+            )
+        totals = daily.sum(axis=1) + undated_totals
+        return daily, midnight_daily, totals
+
+    def _group_sums(self, df, rows):
+        """
+        Суммы (см. _sums) строк df: ключ None - все строки, (измерение,
+        значение) - строки с этим значением
+        """
+        everything = self._sums(rows, np.zeros(len(df), dtype=np.int64), 1)
+        groups = {None: tuple(part[0] for part in everything)}
+        for dimension in self.dimensions:
+            codes, dtype = value_codes(df[dimension])
+            values = dtype.categories
+            daily, midnight_daily, totals = self._sums(rows, codes, len(values))
+            for code, value in enumerate(values):
+                if not totals[code, -1]:
+                    # Категория без строк
+                    continue
+                groups[(dimension, value)] = (
+                    daily[code],
+                    midnight_daily[code],
+                    totals[code],
+                )
+        return groups
+
+    def _build(self, daily, midnight_daily, totals, base=None):
+        """
+        Префиксные суммы по дневным суммам; base - агрегаты предыдущих строк
+        той же таблицы, к которым прибавляются эти
+        """
+        if base is not None:
+            base_prefix, base_midnight, base_totals = base
+            days = len(base_midnight)
+            daily = daily.copy()
+            daily[:days] += np.diff(base_prefix, axis=0)
+            midnight_daily = midnight_daily.copy()
+            midnight_daily[:days] += base_midnight
+            totals = totals + base_totals
+
+        prefix = np.zeros((self.size + 1, daily.shape[1]))
+        np.cumsum(daily, axis=0, out=prefix[1:])
+        return prefix, midnight_daily, totals
+
+    def appended(self, df, start):
+        """
+        Агрегаты таблицы df, строки [0, start) которой уже учтены, а остальные
+        дописаны: к дневным суммам прибавляются только новые строки. Если новые
+        строки раньше первого дня агрегатов, они строятся заново. Текущие
+        агрегаты не меняются
+        """
+        new_rows = df.iloc[start:]
+        days = self._days(new_rows)
+        if len(days) and (self.size == 0 or days.min() < self.first_day):
+            return DailyRollup(
+                df,
+                self.date_column,
+                self.measures[:-1],
+                self.dimensions,
+                self.orders_column,
+            )
+
+        rollup = copy.copy(self)
+        rollup._set_flags(df)
+        if len(days):
+            last = int((days.max() - self.first_day) // DAY) + 1
+            rollup.size = max(self.size, last)
+
+        sums = rollup._group_sums(new_rows, rollup._rows(new_rows))
+        no_rows = (
+            np.zeros((rollup.size, len(self.measures))),
+            np.zeros((rollup.size, len(self.measures))),
+            np.zeros(len(self.measures)),
+        )
+        rollup._rollups = {}
+        for key in dict.fromkeys([*self._rollups, *sums]):
+            base = self._rollups.get(key)
+            if key not in sums and rollup.size == self.size:
+                # Значение не встретилось в новых строках
+                rollup._rollups[key] = base
+            else:
+                rollup._rollups[key] = rollup._build(*sums.get(key, no_rows), base)
+        return rollup
+
+    def _window(self, rollup, start_date, end_date):
+        prefix, midnight_daily, totals = rollup
+        if not (start_date and end_date):
+            return totals
+
+        bounds = day_bounds(start_date, end_date)
+        if bounds is None:
+            return None
+
+        first_day, last_day, last_day_full = bounds
+        start = int((first_day - self.first_day) // DAY)
+        end = int((last_day - self.first_day) // DAY)
+        if last_day_full:
+            full_end, extra = end + 1, 0
+        else:
+            # Полные сутки [start, end) и строки ровно в полночь дня end
+            full_end = end
+            extra = midnight_daily[end] if 0 <= end < self.size and start <= end else 0
+
+        if full_end <= start:
+            return np.zeros_like(totals) + extra
+
+        lo = min(max(start, 0), self.size)
+        hi = min(max(full_end, 0), self.size)
+        return prefix[hi] - prefix[lo] + extra
+
+    def query(self, start_date=None, end_date=None, filters=None):
+        """
+        Суммы мер за диапазон дат в виде словаря или None, если запрос нельзя
+        ответить по агрегатам: фильтры больше чем по одному измерению, фильтр по
+        измерению без агрегатов или границы дат не на начале/конце суток.
+        """
+        active = {d: v for d, v in (filters or {}).items() if v}
+        if len(active) > 1:
+            return None
+
+        if active:
+            ((dimension, values),) = active.items()
+            if dimension not in self.dimensions:
+                return None
+            # Значения без строк (в т.ч. "all") дают ноль, как и isin
+            rollups = [
+                self._rollups[(dimension, value)]
+                for value in dict.fromkeys(values)
+                if (dimension, value) in self._rollups
+            ]
+        else:
+            rollups = [self._rollups[None]]
+
+        sums = np.zeros(len(self.measures))
+        for rollup in rollups:
+            window = self._window(rollup, start_date, end_date)
+            if window is None:
+                return None
+            sums = sums + window
+
+        result = {
+            m: int(round(v)) if self._integer[m] else float(v)
+            for m, v in zip(self.measures, sums)
+        }
+        if self.orders_are_rows:
+            result["orders"] = result["rows"]
+        return result
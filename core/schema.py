@@ -0,0 +1,33 @@
+import pandas as pd
+
+# Колонку из списка categories переводим в category, только если уникальных
+# значений не больше этой доли от числа строк - иначе выигрыша по памяти нет
+MAX_CATEGORY_RATIO = 0.5
+
+
+def memory_bytes(df):
+    """Полный объем памяти DataFrame, включая строки в object-колонках"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def optimize_dtypes(df, categories=(), downcast=()):
+    """
+    Приводит таблицу к компактным типам: низкокардинальные строковые измерения
+    становятся category, целочисленные идентификаторы и коды из downcast
+    ужимаются до минимального знакового типа. Остальные числа (меры:
+    количества, цены, суммы) остаются int64/float64: их перемножают и
+    суммируют, и в узком типе произведение переполнилось бы без ошибки.
+    """
+    df = df.copy()
+
+    for column in categories:
+        if column not in df.columns or df[column].dtype != object:
+            continue
+        if df[column].nunique(dropna=True) <= MAX_CATEGORY_RATIO * max(len(df), 1):
+            df[column] = df[column].astype("category")
+
+    for column in downcast:
+        if column in df.columns and pd.api.types.is_integer_dtype(df[column].dtype):
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+
+    return df
@@ -0,0 +1,135 @@
+import contextlib
+import json
+import os
+import shutil
+import time
+
+from core.column_files import read_columns, write_columns
+from core.table_cache import source_fingerprint
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class SharedStore:
+    """
+    Общее хранилище таблиц для нескольких процессов: каждая колонка лежит на
+    диске отдельным файлом .npy, а процессы открывают их через mmap без
+    копирования. Страницы файлов находятся в кэше ОС один раз, сколько бы
+    воркеров их ни отобразило - в том числе запущенных позже или
+    перезапущенных. Для хранения в памяти каталог можно разместить в /dev/shm.
+
+    Каждая публикация - новый каталог версии; ссылка current атомарно
+    переключается на него, так что читатель видит либо старую, либо новую
+    версию целиком. Старые версии удаляются, кроме keep последних: процессы,
+    которые их уже отобразили, продолжают работать со своими страницами.
+
+    Числа, даты и bool отображаются как есть, у category - коды (категории
+    читаются в память). Колонки object отображать нельзя: они хранятся как
+    коды и строки и при чтении собираются копией, поэтому годятся только для
+    небольших справочников.
+    """
+
+    FORMAT_VERSION = 1
+    CURRENT = "current"
+
+    def __init__(self, root, keep=2):
+        self.root = root
+        self.keep = keep
+
+    @contextlib.contextmanager
+    def lock(self):
+        """
+        Межпроцессная блокировка хранилища: под ней процесс проверяет версию
+        и при необходимости публикует новую, пока остальные ждут
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "w") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def current_version(self):
+        """Имя опубликованной версии или None"""
+        try:
+            return os.readlink(os.path.join(self.root, self.CURRENT))
+        except OSError:
+            return None
+
+    def load(self, sources):
+        """
+        Отображает таблицы текущей версии: возвращает (версия, {имя: таблица})
+        или (None, None), если версии нет или она собрана из других исходных
+        файлов. Таблицы только для чтения - запись в массивы mmap запрещена.
+        """
+        version = self.current_version()
+        if version is None:
+            return None, None
+        path = os.path.join(self.root, version)
+        try:
+            with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("format") != self.FORMAT_VERSION:
+                return None, None
+            if manifest.get("sources") != source_fingerprint(sources):
+                return None, None
+            tables = {
+                name: read_columns(os.path.join(path, name), columns, mmap=True)
+                for name, columns in manifest["tables"].items()
+            }
+            return version, tables
+        except Exception as e:
+            print(f"Не удалось открыть общее хранилище {path}: {e}")
+            return None, None
+
+    def publish(self, sources, tables):
+        """
+        Записывает таблицы новой версией и делает ее текущей. Таблицы None
+        пропускаются. Возвращает имя версии. Вызывать под lock()
+        """
+        version = f"{time.time_ns():020d}-{os.getpid()}"
+        staging = os.path.join(self.root, f".{version}.tmp")
+        try:
+            os.makedirs(staging)
+            manifest = {
+                "format": self.FORMAT_VERSION,
+                "sources": source_fingerprint(sources),
+                "tables": {},
+            }
+            for name, df in tables.items():
+                if df is not None:
+                    manifest["tables"][name] = write_columns(
+                        os.path.join(staging, name), df
+                    )
+            with open(
+                os.path.join(staging, "manifest.json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump(manifest, f)
+            os.rename(staging, os.path.join(self.root, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        # Ссылка создается рядом и подменяет current одним rename
+        link = os.path.join(self.root, f".{version}.link")
+        os.symlink(version, link)
+        os.replace(link, os.path.join(self.root, self.CURRENT))
+        self._remove_old_versions()
+        return version
+
+    def _remove_old_versions(self):
+        versions = sorted(
+            name
+            for name in os.listdir(self.root)
+            if not name.startswith(".") and name != self.CURRENT
+        )
+        current = self.current_version()
+        for name in versions[: -self.keep]:
+            if name != current:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
@@ -0,0 +1,104 @@
+import json
+import os
+import re
+import shutil
+import time
+
+from core.column_files import read_columns, write_columns
+
+
+def source_fingerprint(sources):
+    """Путь, размер и время модификации исходных файлов - признак их изменения"""
+    fingerprint = []
+    for path in sources:
+        stat = os.stat(path)
+        fingerprint.append(
+            {
+                "path": os.path.abspath(path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+        )
+    return fingerprint
+
+
+class TableCache:
+    """
+    Бинарный кэш загруженных таблиц рядом с CSV. Таблица сохраняется после
+    первого успешного разбора CSV и читается из кэша, пока у исходных файлов
+    не изменились размер и время модификации. Формат - колонки в файлах .npy
+    и манифест JSON (см. core/column_files.py): каталог данных доступен на
+    запись не только процессу дашборда, поэтому в кэше нет ничего, что при
+    чтении исполняет код, как pickle. Типы колонок, включая категориальные и
+    даты, сохраняются.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _manifest_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def load(self, name, sources, schema=None):
+        """
+        Возвращает (таблица, метаданные) из кэша или (None, None), если кэша нет
+        или он устарел: изменились исходные файлы или схема таблицы
+        """
+        try:
+            with open(self._manifest_path(name), encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("format") != self.FORMAT_VERSION:
+                return None, None
+            if manifest.get("schema") != schema:
+                return None, None
+            if manifest.get("sources") != source_fingerprint(sources):
+                return None, None
+            data = manifest["data"]
+            if data != os.path.basename(data) or not data.startswith(f"{name}-"):
+                return None, None
+            df = read_columns(os.path.join(self.cache_dir, data), manifest["columns"])
+            return df, manifest.get("meta") or {}
+        except Exception:
+            return None, None
+
+    def save(self, name, sources, df, schema=None, meta=None, fingerprint=None):
+        """
+        Сохраняет таблицу; ошибки записи не мешают работе приложения.
+        fingerprint - отпечаток файлов, из которых таблица прочитана, если он
+        снят до чтения (иначе - текущий)
+        """
+        manifest_path = self._manifest_path(name)
+        data = f"{name}-{time.time_ns()}-{os.getpid()}"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            manifest = {
+                "format": self.FORMAT_VERSION,
+                "schema": schema,
+                "sources": (
+                    fingerprint
+                    if fingerprint is not None
+                    else source_fingerprint(sources)
+                ),
+                "meta": meta or {},
+                "data": data,
+                "columns": write_columns(os.path.join(self.cache_dir, data), df),
+            }
+
+            # Колонки пишутся в новый каталог, а манифест подменяется атомарно,
+            # чтобы параллельно стартующий процесс не прочитал недописанный кэш
+            with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(f"{manifest_path}.tmp", manifest_path)
+        except Exception as e:
+            shutil.rmtree(os.path.join(self.cache_dir, data), ignore_errors=True)
+            print(f"Не удалось сохранить кэш таблицы {name}: {e}")
+            return
+        self._remove_old_data(name, data)
+
+    def _remove_old_data(self, name, current):
+        """Удаляет прежние каталоги колонок таблицы"""
+        for entry in os.listdir(self.cache_dir):
+            if entry != current and re.fullmatch(rf"{re.escape(name)}-\d+-\d+", entry):
+                shutil.rmtree(os.path.join(self.cache_dir, entry), ignore_errors=True)
@@ -0,0 +1,48 @@
+import os
+import threading
+import time
+
+# Методы вкладок, результаты которых нужны в состоянии без фильтров: KPI
+# (calculate_*) и графики (create_*). Все их параметры имеют значения по
+# умолчанию, а ключ кэша не различает None и пустой список фильтра - вызов
+# без аргументов заполняет те же записи, что и первый запрос пользователя
+WARM_UP_METHODS = (("calculations", "calculate_"), ("charts", "create_"))
+
+
+def warm_up_tabs(tabs):
+    """Считает KPI и графики всех вкладок без фильтров, заполняя кэши"""
+    started = time.perf_counter()
+    for tab in tabs:
+        for attribute, prefix in WARM_UP_METHODS:
+            target = getattr(tab, attribute, None)
+            if target is None:
+                continue
+            for name in dir(type(target)):
+                if not name.startswith(prefix):
+                    continue
+                try:
+                    getattr(target, name)()
+                except Exception as e:
+                    print(f"Error warming up {type(target).__name__}.{name}: {e}")
+    print(f"Кэш прогрет за {time.perf_counter() - started:.1f} с")
+
+
+def start_warm_up(tabs, mode=None):
+    """
+    Прогрев кэшей по режиму mode или DASHBOARD_WARMUP: "sync" (по умолчанию) -
+    сразу, до приема запросов; "background" - в фоновом потоке, не задерживая
+    старт; "off" - без прогрева. Возвращает фоновый поток или None
+    """
+    mode = mode or os.environ.get("DASHBOARD_WARMUP", "sync")
+    if mode == "off":
+        return None
+    if mode == "background":
+        thread = threading.Thread(
+            target=warm_up_tabs, args=(tabs,), name="warm-up", daemon=True
+        )
+        thread.start()
+        return thread
+    if mode != "sync":
+        print(f"Неизвестный режим прогрева {mode}, прогреваем сразу")
+    warm_up_tabs(tabs)
+    return None
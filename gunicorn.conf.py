@@ -0,0 +1,48 @@
+import gc
+import multiprocessing
+import os
+
+# Приложение импортируется в мастере до fork: DataManager загружает данные один
+# раз, а воркеры делят страницы памяти с мастером по copy-on-write, пока их не
+# изменяют. Таблицы после загрузки только читаются.
+preload_app = True
+
+bind = os.environ.get("DASHBOARD_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("DASHBOARD_WORKERS", multiprocessing.cpu_count()))
+# Приложение узнает число воркеров отсюда: перезагрузка данных в нескольких
+# воркерах требует DASHBOARD_SHARED_DIR (см. core/reloader.py)
+os.environ["DASHBOARD_WORKERS"] = str(workers)
+worker_class = "gthread"
+threads = int(os.environ.get("DASHBOARD_THREADS", "4"))
+timeout = int(os.environ.get("DASHBOARD_TIMEOUT", "60"))
+
+# Поток фонового прогрева не переживает fork - в мастере прогреваем синхронно,
+# и каждый воркер стартует с заполненными кэшами
+if os.environ.get("DASHBOARD_WARMUP") == "background":
+    os.environ["DASHBOARD_WARMUP"] = "sync"
+
+# Сборщик мусора пишет служебные поля в заголовки всех отслеживаемых объектов,
+# и каждый его проход в воркере копировал бы страницы с данными мастера. До fork
+# сборщик выключен, загруженные объекты замораживаются (gc.freeze) и больше не
+# просматриваются; в воркере сборщик снова работает только с новыми объектами.
+gc.disable()
+
+
+def when_ready(server):
+    gc.collect()
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    # Объекты, созданные мастером после старта (например, при перезапуске
+    # воркера), тоже не должны попадать в проходы сборщика в воркерах
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
+    # Пул процессов графиков (DASHBOARD_CHART_EXECUTOR=process) запускается
+    # сразу после fork, пока в воркере нет других потоков
+    from core.executor import chart_executor
+
+    chart_executor.start()
@@ -1,7 +1,11 @@
+from core.cache import cached_calculation
+
+
 class CustomersCalculations:
     def __init__(self, data_manager):
         self.dm = data_manager
 
+    @cached_calculation
     def get_filtered_data(
         self,
         start_date=None,
@@ -13,28 +17,17 @@ class CustomersCalculations:
     ):
         """Получает отфильтрованные данные клиентов с учетом ВСЕХ фильтров"""
 
-        df_users = self.dm.df_user_segments.copy()
-
-        if start_date and end_date:
-            df_users = df_users[
-                (df_users["registration_date"] >= start_date)
-                & (df_users["registration_date"] <= end_date)
-            ]
-
-        if regions and len(regions) > 0:
-            df_users = df_users[df_users["region"].isin(regions)]
-
-        if segments and len(segments) > 0:
-            df_users = df_users[df_users["segment"].isin(segments)]
+        df_users = self.dm.select(
+            "user_segments",
+            {"region": regions, "segment": segments},
+            start_date,
+            end_date,
+        )
 
         if (channels and len(channels) > 0) or (devices and len(devices) > 0):
-            df_traffic = self.dm.df_traffic.copy()
-
-            if channels and len(channels) > 0:
-                df_traffic = df_traffic[df_traffic["channel"].isin(channels)]
-
-            if devices and len(devices) > 0:
-                df_traffic = df_traffic[df_traffic["device"].isin(devices)]
+            df_traffic = self.dm.select(
+                "traffic", {"channel": channels, "device": devices}
+            )
 
             df_users = df_users.merge(
                 df_traffic[["customer_id"]].drop_duplicates(),
@@ -44,6 +37,7 @@ class CustomersCalculations:
 
         return df_users
 
+    @cached_calculation
     def get_filtered_traffic_data(
         self,
         start_date=None,
@@ -55,36 +49,28 @@ class CustomersCalculations:
     ):
         """Получает отфильтрованные данные трафика с учетом ВСЕХ фильтров"""
 
-        df_traffic = self.dm.df_traffic.copy()
-
-        df_traffic = df_traffic.merge(
-            self.dm.df_user_segments[
-                ["customer_id", "region", "segment", "registration_date"]
-            ],
-            on="customer_id",
-            how="inner",
+        df_traffic = self.dm.select(
+            "traffic",
+            {
+                "region": regions,
+                "segment": segments,
+                "channel": channels,
+                "device": devices,
+            },
         )
 
+        # Только сессии клиентов из user_segments (у остальных нет даты регистрации)
+        df_traffic = df_traffic[df_traffic["registration_date"].notna()]
+
         if start_date and end_date:
             df_traffic = df_traffic[
                 (df_traffic["registration_date"] >= start_date)
                 & (df_traffic["registration_date"] <= end_date)
             ]
 
-        if regions and len(regions) > 0:
-            df_traffic = df_traffic[df_traffic["region"].isin(regions)]
-
-        if segments and len(segments) > 0:
-            df_traffic = df_traffic[df_traffic["segment"].isin(segments)]
-
-        if channels and len(channels) > 0:
-            df_traffic = df_traffic[df_traffic["channel"].isin(channels)]
-
-        if devices and len(devices) > 0:
-            df_traffic = df_traffic[df_traffic["device"].isin(devices)]
-
         return df_traffic
 
+    @cached_calculation
     def calculate_total_customers(
         self,
         start_date=None,
@@ -99,6 +85,7 @@ class CustomersCalculations:
         )
         return df["customer_id"].nunique()
 
+    @cached_calculation
     def calculate_new_customers(
         self,
         start_date=None,
@@ -113,6 +100,7 @@ class CustomersCalculations:
         )
         return df[df["segment"] == "new"]["customer_id"].nunique()
 
+    @cached_calculation
     def calculate_loyal_customers(
         self,
         start_date=None,
@@ -127,6 +115,7 @@ class CustomersCalculations:
         )
         return df[df["segment"] == "loyal"]["customer_id"].nunique()
 
+    @cached_calculation
     def calculate_risk_customers(
         self,
         start_date=None,
@@ -141,6 +130,7 @@ class CustomersCalculations:
         )
         return df[df["segment"] == "churn_risk"]["customer_id"].nunique()
 
+    @cached_calculation
     def calculate_high_spender_customers(
         self,
         start_date=None,
@@ -155,6 +145,7 @@ class CustomersCalculations:
         )
         return df[df["segment"] == "high_spender"]["customer_id"].nunique()
 
+    @cached_calculation
     def calculate_discount_hunter_customers(
         self,
         start_date=None,
@@ -169,6 +160,7 @@ class CustomersCalculations:
         )
         return df[df["segment"] == "discount_hunter"]["customer_id"].nunique()
 
+    @cached_calculation
     def get_segments_distribution(
         self,
         start_date=None,
@@ -181,8 +173,11 @@ class CustomersCalculations:
         df = self.get_filtered_data(
             start_date, end_date, regions, segments, channels, devices
         )
-        return df.groupby("segment")["customer_id"].nunique().reset_index()
+        return (
+            df.groupby("segment", observed=True)["customer_id"].nunique().reset_index()
+        )
 
+    @cached_calculation
     def get_registrations_trend(
         self,
         start_date=None,
@@ -203,6 +198,7 @@ class CustomersCalculations:
         daily_registrations.columns = ["date", "registrations"]
         return daily_registrations.sort_values("date")
 
+    @cached_calculation
     def get_regions_distribution(
         self,
         start_date=None,
@@ -215,8 +211,11 @@ class CustomersCalculations:
         df = self.get_filtered_data(
             start_date, end_date, regions, segments, channels, devices
         )
-        return df.groupby("region")["customer_id"].nunique().reset_index()
+        return (
+            df.groupby("region", observed=True)["customer_id"].nunique().reset_index()
+        )
 
+    @cached_calculation
     def get_channels_distribution(
         self,
         start_date=None,
@@ -231,12 +230,13 @@ class CustomersCalculations:
         )
 
         channels_distribution = (
-            df.groupby("channel")["customer_id"].nunique().reset_index()
+            df.groupby("channel", observed=True)["customer_id"].nunique().reset_index()
         )
         channels_distribution.columns = ["channel", "unique_customers"]
 
         return channels_distribution
 
+    @cached_calculation
     def get_segments_by_channels_distribution(
         self,
         start_date=None,
@@ -252,7 +252,9 @@ class CustomersCalculations:
         )
 
         segments_by_channels = (
-            df.groupby(["channel", "segment"])["customer_id"].nunique().reset_index()
+            df.groupby(["channel", "segment"], observed=True)["customer_id"]
+            .nunique()
+            .reset_index()
         )
         segments_by_channels.columns = ["channel", "segment", "unique_customers"]
 
@@ -1,6 +1,6 @@
-import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
+from components import figures
+from core.cache import cached_figure
 from .calculations import CustomersCalculations
 
 
@@ -9,6 +9,7 @@ class CustomersCharts:
         self.dm = data_manager
         self.calculations = CustomersCalculations(data_manager)
 
+    @cached_figure
     def create_segments_chart(
         self,
         start_date=None,
@@ -43,7 +44,7 @@ class CustomersCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.pie(
+        fig = figures.pie(
             segments_data,
             values="customer_id",
             names="segment",
@@ -52,25 +53,23 @@ class CustomersCharts:
             color_discrete_map=segment_colors,
         )
 
-        fig.update_traces(
+        figures.update_traces(
+            fig,
             textposition="inside",
             textinfo="percent+label",
             marker=dict(line=dict(color="#ffffff", width=2)),
             hovertemplate="<b>%{label}</b><br>Клиентов: <b>%{value}</b><br>Доля: <b>%{percent}</b><extra></extra>",
         )
 
-        fig.update_layout(
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+        figures.update_layout(
+            fig,
+            **figures.THEME,
             showlegend=True,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
         return fig
 
+    @cached_figure
     def create_registrations_chart(
         self,
         start_date=None,
@@ -96,7 +95,7 @@ class CustomersCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.line(
+        fig = figures.line(
             registrations_data,
             x="date",
             y="registrations",
@@ -105,20 +104,17 @@ class CustomersCharts:
             color_discrete_sequence=["#8a2be2"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             template="plotly_white",
             hovermode="x unified",
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1", tickformat="%d.%m.%Y"),
             yaxis=dict(gridcolor="#ecf0f1"),
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
+        figures.update_traces(
+            fig,
             line=dict(width=3),
             marker=dict(size=6),
             hovertemplate="<b>%{x|%d.%m.%Y}</b><br>Регистраций: <b>%{y}</b><extra></extra>",
@@ -126,6 +122,7 @@ class CustomersCharts:
 
         return fig
 
+    @cached_figure
     def create_regions_chart(
         self,
         start_date=None,
@@ -151,7 +148,7 @@ class CustomersCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.bar(
+        fig = figures.bar(
             regions_data,
             x="customer_id",
             y="region",
@@ -162,24 +159,21 @@ class CustomersCharts:
             color_continuous_scale=["#9370db", "#8a2be2", "#4b0082"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             yaxis={"categoryorder": "total ascending"},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1"),
             showlegend=False,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
-            hovertemplate="<b>%{y}</b><br>Клиентов: <b>%{x}</b><extra></extra>"
+        figures.update_traces(
+            fig, hovertemplate="<b>%{y}</b><br>Клиентов: <b>%{x}</b><extra></extra>"
         )
 
         return fig
 
+    @cached_figure
     def create_channels_chart(
         self,
         start_date=None,
@@ -205,7 +199,7 @@ class CustomersCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.bar(
+        fig = figures.bar(
             channels_data,
             x="unique_customers",
             y="channel",
@@ -216,36 +210,23 @@ class CustomersCharts:
             color_continuous_scale=["#FF6B6B", "#FF9999", "#FFCCCC"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             yaxis={"categoryorder": "total ascending"},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1"),
             showlegend=False,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
-            hovertemplate="<b>%{y}</b><br>Клиентов: <b>%{x}</b><extra></extra>"
+        figures.update_traces(
+            fig, hovertemplate="<b>%{y}</b><br>Клиентов: <b>%{x}</b><extra></extra>"
         )
 
         return fig
 
     def _create_empty_chart(self, message):
         """Создает пустой график с сообщением"""
-        fig = go.Figure()
-        fig.update_layout(
-            title=message,
-            xaxis={"visible": False},
-            yaxis={"visible": False},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
-        )
-        return fig
+        return figures.empty(message)
 
     def _get_filter_info(
         self, start_date, end_date, regions, segments, channels, devices
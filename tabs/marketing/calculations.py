@@ -1,10 +1,13 @@
 import pandas as pd
 
+from core.cache import cached_calculation
+
 
 class MarketingCalculations:
     def __init__(self, data_manager):
         self.dm = data_manager
 
+    @cached_calculation
     def get_filtered_ad_data(
         self,
         start_date=None,
@@ -18,33 +21,44 @@ class MarketingCalculations:
         """Получает отфильтрованные данные рекламы с учетом ВСЕХ фильтров"""
 
         try:
-            df_ads = self.dm.df_ad_revenue.copy()
-
-            df_ads = df_ads.merge(
-                self.dm.df_products[["product_id", "category"]],
-                on="product_id",
-                how="left",
+            return self.dm.select(
+                "ad_revenue",
+                {"campaign_name": campaigns, "category": categories},
+                start_date,
+                end_date,
             )
 
-            if start_date and end_date:
-                start_date = pd.to_datetime(start_date)
-                end_date = pd.to_datetime(end_date)
-                df_ads = df_ads[
-                    (df_ads["date"] >= start_date) & (df_ads["date"] <= end_date)
-                ]
-
-            if campaigns and len(campaigns) > 0:
-                df_ads = df_ads[df_ads["campaign_name"].isin(campaigns)]
-
-            if categories and len(categories) > 0:
-                df_ads = df_ads[df_ads["category"].isin(categories)]
-
-            return df_ads
-
         except Exception as e:
             print(f"Error in get_filtered_ad_data: {e}")
             return pd.DataFrame()
 
+    def _ad_totals(
+        self, start_date, end_date, channels, campaigns, categories, devices, segments
+    ):
+        """
+        Суммы расходов, выручки, кликов и показов: по дневным агрегатам, если
+        фильтры это позволяют, иначе по отфильтрованным строкам. None - нет данных.
+        """
+        totals = self.dm.rollup_totals(
+            "ad_revenue",
+            {"campaign_name": campaigns, "category": categories},
+            start_date,
+            end_date,
+        )
+        if totals is not None:
+            return totals if totals["rows"] else None
+
+        df_ads = self.get_filtered_ad_data(
+            start_date, end_date, channels, campaigns, categories, devices, segments
+        )
+        if df_ads.empty:
+            return None
+        return {
+            column: df_ads[column].sum()
+            for column in ["spend", "revenue", "clicks", "impressions"]
+        }
+
+    @cached_calculation
     def get_filtered_traffic_data(
         self,
         start_date=None,
@@ -58,37 +72,18 @@ class MarketingCalculations:
         """Получает отфильтрованные данные трафика с учетом ВСЕХ фильтров"""
 
         try:
-            df_traffic = self.dm.df_traffic.copy()
-
-            df_traffic = df_traffic.merge(
-                self.dm.df_user_segments[["customer_id", "segment"]],
-                on="customer_id",
-                how="left",
+            return self.dm.select(
+                "traffic",
+                {"channel": channels, "device": devices, "segment": segments},
+                start_date,
+                end_date,
             )
 
-            if start_date and end_date:
-                start_date = pd.to_datetime(start_date)
-                end_date = pd.to_datetime(end_date)
-                df_traffic = df_traffic[
-                    (df_traffic["session_start"] >= start_date)
-                    & (df_traffic["session_start"] <= end_date)
-                ]
-
-            if channels and len(channels) > 0:
-                df_traffic = df_traffic[df_traffic["channel"].isin(channels)]
-
-            if devices and len(devices) > 0:
-                df_traffic = df_traffic[df_traffic["device"].isin(devices)]
-
-            if segments and len(segments) > 0:
-                df_traffic = df_traffic[df_traffic["segment"].isin(segments)]
-
-            return df_traffic
-
         except Exception as e:
             print(f"Error in get_filtered_traffic_data: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def calculate_total_romi(
         self,
         start_date=None,
@@ -100,14 +95,14 @@ class MarketingCalculations:
         segments=None,
     ):
         try:
-            df_ads = self.get_filtered_ad_data(
+            totals = self._ad_totals(
                 start_date, end_date, channels, campaigns, categories, devices, segments
             )
-            if df_ads.empty:
+            if totals is None:
                 return 0
 
-            total_spend = df_ads["spend"].sum()
-            total_revenue = df_ads["revenue"].sum()
+            total_spend = totals["spend"]
+            total_revenue = totals["revenue"]
 
             return (
                 round(((total_revenue - total_spend) / total_spend) * 100, 2)
@@ -118,6 +113,7 @@ class MarketingCalculations:
             print(f"Error calculating total ROMI: {e}")
             return 0
 
+    @cached_calculation
     def calculate_total_spend(
         self,
         start_date=None,
@@ -129,16 +125,17 @@ class MarketingCalculations:
         segments=None,
     ):
         try:
-            df_ads = self.get_filtered_ad_data(
+            totals = self._ad_totals(
                 start_date, end_date, channels, campaigns, categories, devices, segments
             )
-            if df_ads.empty:
+            if totals is None:
                 return 0
-            return round(df_ads["spend"].sum(), 2)
+            return round(totals["spend"], 2)
         except Exception as e:
             print(f"Error calculating total spend: {e}")
             return 0
 
+    @cached_calculation
     def calculate_total_revenue(
         self,
         start_date=None,
@@ -150,16 +147,17 @@ class MarketingCalculations:
         segments=None,
     ):
         try:
-            df_ads = self.get_filtered_ad_data(
+            totals = self._ad_totals(
                 start_date, end_date, channels, campaigns, categories, devices, segments
             )
-            if df_ads.empty:
+            if totals is None:
                 return 0
-            return round(df_ads["revenue"].sum(), 2)
+            return round(totals["revenue"], 2)
         except Exception as e:
             print(f"Error calculating total revenue: {e}")
             return 0
 
+    @cached_calculation
     def calculate_ctr(
         self,
         start_date=None,
@@ -171,14 +169,14 @@ class MarketingCalculations:
         segments=None,
     ):
         try:
-            df_ads = self.get_filtered_ad_data(
+            totals = self._ad_totals(
                 start_date, end_date, channels, campaigns, categories, devices, segments
             )
-            if df_ads.empty:
+            if totals is None:
                 return 0
 
-            total_clicks = df_ads["clicks"].sum()
-            total_impressions = df_ads["impressions"].sum()
+            total_clicks = totals["clicks"]
+            total_impressions = totals["impressions"]
 
             return (
                 round((total_clicks / total_impressions) * 100, 2)
@@ -189,6 +187,7 @@ class MarketingCalculations:
             print(f"Error calculating CTR: {e}")
             return 0
 
+    @cached_calculation
     def calculate_cac(
         self,
         start_date=None,
@@ -219,6 +218,7 @@ class MarketingCalculations:
             print(f"Error calculating CAC: {e}")
             return 0
 
+    @cached_calculation
     def calculate_conversion_rate(
         self,
         start_date=None,
@@ -249,6 +249,7 @@ class MarketingCalculations:
             print(f"Error calculating conversion rate: {e}")
             return 0
 
+    @cached_calculation
     def get_romi_trend(
         self,
         start_date=None,
@@ -282,6 +283,7 @@ class MarketingCalculations:
             print(f"Error getting ROMI trend: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_budget_distribution(
         self,
         start_date=None,
@@ -300,7 +302,9 @@ class MarketingCalculations:
                 return pd.DataFrame()
 
             channel_distribution = (
-                df_traffic.groupby("channel")["traffic_id"].nunique().reset_index()
+                df_traffic.groupby("channel", observed=True)["traffic_id"]
+                .nunique()
+                .reset_index()
             )
             channel_distribution.columns = ["channel", "sessions"]
 
@@ -309,6 +313,7 @@ class MarketingCalculations:
             print(f"Error getting budget distribution: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_campaigns_effectiveness(
         self,
         start_date=None,
@@ -327,7 +332,7 @@ class MarketingCalculations:
                 return pd.DataFrame()
 
             campaigns_data = (
-                df_ads.groupby("campaign_name")
+                df_ads.groupby("campaign_name", observed=True)
                 .agg(
                     {
                         "spend": "sum",
@@ -353,6 +358,7 @@ class MarketingCalculations:
             print(f"Error getting campaigns effectiveness: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_ctr_by_channels(
         self,
         start_date=None,
@@ -371,7 +377,9 @@ class MarketingCalculations:
                 return pd.DataFrame()
 
             channel_sessions = (
-                df_traffic.groupby("channel")["traffic_id"].nunique().reset_index()
+                df_traffic.groupby("channel", observed=True)["traffic_id"]
+                .nunique()
+                .reset_index()
             )
             channel_sessions.columns = ["channel", "sessions"]
 
@@ -380,6 +388,7 @@ class MarketingCalculations:
             print(f"Error getting CTR by channels: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_cac_by_segments(
         self,
         start_date=None,
@@ -402,7 +411,7 @@ class MarketingCalculations:
                 return pd.DataFrame()
 
             segment_data = (
-                df_traffic.groupby("segment")
+                df_traffic.groupby("segment", observed=True)
                 .agg({"customer_id": "nunique"})
                 .reset_index()
             )
@@ -417,6 +426,7 @@ class MarketingCalculations:
             print(f"Error getting CAC by segments: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_conversion_by_devices(
         self,
         start_date=None,
@@ -435,7 +445,9 @@ class MarketingCalculations:
                 return pd.DataFrame()
 
             device_sessions = (
-                df_traffic.groupby("device")["traffic_id"].nunique().reset_index()
+                df_traffic.groupby("device", observed=True)["traffic_id"]
+                .nunique()
+                .reset_index()
             )
             device_sessions.columns = ["device", "sessions"]
 
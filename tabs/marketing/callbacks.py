@@ -1,10 +1,32 @@
 from dash import Input, Output, State, no_update, ctx
 import dash_bootstrap_components as dbc
 from components.kpi_cards import create_kpi_card
+from core.executor import chart_executor
 from datetime import datetime
 
 
 def register_marketing_callbacks(app, data_manager, calculations, charts):
+    # Графики update_charts строятся параллельно (см. core/executor.py)
+    marketing_charts = [
+        ("marketing-romi-trend-chart", charts.create_romi_trend_chart),
+        (
+            "marketing-budget-distribution-chart",
+            charts.create_budget_distribution_chart,
+        ),
+        (
+            "marketing-campaigns-effectiveness-chart",
+            charts.create_campaigns_effectiveness_chart,
+        ),
+        ("marketing-ctr-by-channels-chart", charts.create_ctr_by_channels_chart),
+        ("marketing-cac-by-segments-chart", charts.create_cac_by_segments_chart),
+        (
+            "marketing-conversion-by-devices-chart",
+            charts.create_conversion_by_devices_chart,
+        ),
+    ]
+    for name, build in marketing_charts:
+        chart_executor.register(name, build)
+
     @app.callback(
         Output("marketing-filter-modal", "is_open"),
         [
@@ -168,14 +190,7 @@ def register_marketing_callbacks(app, data_manager, calculations, charts):
             ]
 
     @app.callback(
-        [
-            Output("marketing-romi-trend-chart", "figure"),
-            Output("marketing-budget-distribution-chart", "figure"),
-            Output("marketing-campaigns-effectiveness-chart", "figure"),
-            Output("marketing-ctr-by-channels-chart", "figure"),
-            Output("marketing-cac-by-segments-chart", "figure"),
-            Output("marketing-conversion-by-devices-chart", "figure"),
-        ],
+        [Output(name, "figure") for name, _ in marketing_charts],
         [Input("marketing-filters-store", "data")],
     )
     def update_charts(filters_data):
@@ -198,43 +213,15 @@ def register_marketing_callbacks(app, data_manager, calculations, charts):
         devices = filters_data.get("devices")
         segments = filters_data.get("segments")
 
-        try:
-            romi_trend_chart = charts.create_romi_trend_chart(
-                start_date, end_date, channels, campaigns, categories, devices, segments
-            )
-            budget_distribution_chart = charts.create_budget_distribution_chart(
-                start_date, end_date, channels, campaigns, categories, devices, segments
-            )
-            campaigns_effectiveness_chart = charts.create_campaigns_effectiveness_chart(
-                start_date, end_date, channels, campaigns, categories, devices, segments
-            )
-            ctr_by_channels_chart = charts.create_ctr_by_channels_chart(
-                start_date, end_date, channels, campaigns, categories, devices, segments
-            )
-            cac_by_segments_chart = charts.create_cac_by_segments_chart(
-                start_date, end_date, channels, campaigns, categories, devices, segments
-            )
-            conversion_by_devices_chart = charts.create_conversion_by_devices_chart(
-                start_date, end_date, channels, campaigns, categories, devices, segments
-            )
-
-            return (
-                romi_trend_chart,
-                budget_distribution_chart,
-                campaigns_effectiveness_chart,
-                ctr_by_channels_chart,
-                cac_by_segments_chart,
-                conversion_by_devices_chart,
-            )
-
-        except Exception as e:
-            print(f"Error updating charts: {e}")
-            error_fig = {
-                "data": [],
-                "layout": {
-                    "title": f"Ошибка при загрузке данных: {str(e)}",
-                    "xaxis": {"visible": False},
-                    "yaxis": {"visible": False},
-                },
-            }
-            return error_fig, error_fig, error_fig, error_fig, error_fig, error_fig
+        args = (
+            start_date,
+            end_date,
+            channels,
+            campaigns,
+            categories,
+            devices,
+            segments,
+        )
+        return tuple(
+            chart_executor.run([(name, args) for name, _ in marketing_charts])
+        )
@@ -1,6 +1,6 @@
-import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
+from components import figures
+from core.cache import cached_figure
 from .calculations import MarketingCalculations
 
 
@@ -9,6 +9,7 @@ class MarketingCharts:
         self.dm = data_manager
         self.calculations = MarketingCalculations(data_manager)
 
+    @cached_figure
     def create_romi_trend_chart(
         self,
         start_date=None,
@@ -33,7 +34,7 @@ class MarketingCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.line(
+        fig = figures.line(
             romi_data,
             x="date",
             y="romi",
@@ -42,20 +43,17 @@ class MarketingCharts:
             color_discrete_sequence=["#8a2be2"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             template="plotly_white",
             hovermode="x unified",
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1", tickformat="%d.%m.%Y"),
             yaxis=dict(gridcolor="#ecf0f1", ticksuffix="%"),
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
+        figures.update_traces(
+            fig,
             line=dict(width=3),
             marker=dict(size=6),
             hovertemplate="<b>%{x|%d.%m.%Y}</b><br>ROMI: <b>%{y}%</b><extra></extra>",
@@ -63,6 +61,7 @@ class MarketingCharts:
 
         return fig
 
+    @cached_figure
     def create_budget_distribution_chart(
         self,
         start_date=None,
@@ -89,7 +88,7 @@ class MarketingCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.pie(
+        fig = figures.pie(
             budget_data,
             values="sessions",
             names="channel",
@@ -103,25 +102,23 @@ class MarketingCharts:
             ],
         )
 
-        fig.update_traces(
+        figures.update_traces(
+            fig,
             textposition="inside",
             textinfo="percent+label",
             marker=dict(line=dict(color="#ffffff", width=2)),
             hovertemplate="<b>%{label}</b><br>Сессий: <b>%{value}</b><br>Доля: <b>%{percent}</b><extra></extra>",
         )
 
-        fig.update_layout(
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+        figures.update_layout(
+            fig,
+            **figures.THEME,
             showlegend=True,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
         return fig
 
+    @cached_figure
     def create_campaigns_effectiveness_chart(
         self,
         start_date=None,
@@ -148,7 +145,7 @@ class MarketingCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.bar(
+        fig = figures.bar(
             campaigns_data,
             x="romi",
             y="campaign_name",
@@ -159,24 +156,21 @@ class MarketingCharts:
             color_continuous_scale=["#FF6B6B", "#FF9999", "#96CEB4", "#4ECDC4"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             yaxis={"categoryorder": "total ascending"},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1", ticksuffix="%"),
             showlegend=False,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
-            hovertemplate="<b>%{y}</b><br>ROMI: <b>%{x}%</b><extra></extra>"
+        figures.update_traces(
+            fig, hovertemplate="<b>%{y}</b><br>ROMI: <b>%{x}%</b><extra></extra>"
         )
 
         return fig
 
+    @cached_figure
     def create_ctr_by_channels_chart(
         self,
         start_date=None,
@@ -203,7 +197,7 @@ class MarketingCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.bar(
+        fig = figures.bar(
             ctr_data,
             x="sessions",
             y="channel",
@@ -214,24 +208,21 @@ class MarketingCharts:
             color_continuous_scale=["#9370db", "#8a2be2", "#4b0082"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             yaxis={"categoryorder": "total ascending"},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1"),
             showlegend=False,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
-            hovertemplate="<b>%{y}</b><br>Сессий: <b>%{x}</b><extra></extra>"
+        figures.update_traces(
+            fig, hovertemplate="<b>%{y}</b><br>Сессий: <b>%{x}</b><extra></extra>"
         )
 
         return fig
 
+    @cached_figure
     def create_cac_by_segments_chart(
         self,
         start_date=None,
@@ -258,7 +249,7 @@ class MarketingCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.bar(
+        fig = figures.bar(
             cac_data,
             x="cac",
             y="segment",
@@ -269,24 +260,21 @@ class MarketingCharts:
             color_continuous_scale=["#FF6B6B", "#FF9999", "#FFCCCC"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             yaxis={"categoryorder": "total ascending"},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1", tickprefix="₽"),
             showlegend=False,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
-            hovertemplate="<b>%{y}</b><br>CAC: <b>%{x} ₽</b><extra></extra>"
+        figures.update_traces(
+            fig, hovertemplate="<b>%{y}</b><br>CAC: <b>%{x} ₽</b><extra></extra>"
         )
 
         return fig
 
+    @cached_figure
     def create_conversion_by_devices_chart(
         self,
         start_date=None,
@@ -313,7 +301,7 @@ class MarketingCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.pie(
+        fig = figures.pie(
             conversion_data,
             values="sessions",
             names="device",
@@ -321,37 +309,25 @@ class MarketingCharts:
             color_discrete_sequence=["#4ECDC4", "#45B7D1", "#96CEB4"],
         )
 
-        fig.update_traces(
+        figures.update_traces(
+            fig,
             textposition="inside",
             textinfo="percent+label",
             marker=dict(line=dict(color="#ffffff", width=2)),
             hovertemplate="<b>%{label}</b><br>Сессий: <b>%{value}</b><br>Доля: <b>%{percent}</b><extra></extra>",
         )
 
-        fig.update_layout(
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+        figures.update_layout(
+            fig,
+            **figures.THEME,
             showlegend=True,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
         return fig
 
     def _create_empty_chart(self, message):
         """Создает пустой график с сообщением"""
-        fig = go.Figure()
-        fig.update_layout(
-            title=message,
-            xaxis={"visible": False},
-            yaxis={"visible": False},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
-        )
-        return fig
+        return figures.empty(message)
 
     def _get_filter_info(
         self, start_date, end_date, channels, campaigns, categories, devices, segments
@@ -1,10 +1,13 @@
 import pandas as pd
 
+from core.cache import cached_calculation
+
 
 class OperationsCalculations:
     def __init__(self, data_manager):
         self.dm = data_manager
 
+    @cached_calculation
     def get_latest_inventory_data(self):
         """Получаем актуальные данные по остаткам (последние обновления по каждому товару)"""
         try:
@@ -24,9 +27,13 @@ class OperationsCalculations:
             return self.dm.df_inventory
 
     def get_latest_support_data(self):
-        """Получаем актуальные данные поддержки (можно добавить фильтр по дате если нужно)"""
-        return self.dm.df_customer_support.copy()
+        """Получаем актуальные данные поддержки (можно добавить фильтр по дате если нужно)
+
+        Возвращается общая таблица DataManager без копирования - изменять её нельзя.
+        """
+        return self.dm.df_customer_support
 
+    @cached_calculation
     def calculate_stock_availability(self):
         """Уровень доступности товаров (% товаров с остатком > 0)"""
         try:
@@ -44,6 +51,7 @@ class OperationsCalculations:
             print(f"Error calculating stock availability: {e}")
             return 0
 
+    @cached_calculation
     def calculate_low_stock_items(self, threshold=5):
         """Товары с дефицитом (остаток < threshold)"""
         try:
@@ -53,6 +61,7 @@ class OperationsCalculations:
             print(f"Error calculating low stock items: {e}")
             return 0
 
+    @cached_calculation
     def calculate_inventory_value(self):
         """Стоимость запасов на складах"""
         try:
@@ -66,6 +75,7 @@ class OperationsCalculations:
             print(f"Error calculating inventory value: {e}")
             return 0
 
+    @cached_calculation
     def calculate_avg_resolution_time(self):
         """Среднее время решения тикетов (в часах)"""
         try:
@@ -80,6 +90,7 @@ class OperationsCalculations:
             print(f"Error calculating avg resolution time: {e}")
             return 0
 
+    @cached_calculation
     def calculate_resolved_tickets_rate(self):
         """Процент решенных тикетов"""
         try:
@@ -96,6 +107,7 @@ class OperationsCalculations:
             print(f"Error calculating resolved tickets rate: {e}")
             return 0
 
+    @cached_calculation
     def calculate_overdue_tickets(self, threshold_hours=24):
         """Тикеты с временем решения > threshold_hours"""
         try:
@@ -105,6 +117,7 @@ class OperationsCalculations:
             print(f"Error calculating overdue tickets: {e}")
             return 0
 
+    @cached_calculation
     def calculate_delivery_delays(self):
         """Количество тикетов с задержкой доставки"""
         try:
@@ -115,6 +128,7 @@ class OperationsCalculations:
             print(f"Error calculating delivery delays: {e}")
             return 0
 
+    @cached_calculation
     def get_low_stock_products(self, threshold=5):
         """Список товаров с низким запасом"""
         try:
@@ -133,6 +147,7 @@ class OperationsCalculations:
             print(f"Error getting low stock products: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_warehouse_stats(self):
         """Статистика по складам на основе актуальных данных"""
         try:
@@ -167,13 +182,14 @@ class OperationsCalculations:
             print(f"Error getting warehouse stats: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_support_metrics_by_type(self):
         """Метрики поддержки по типам проблем"""
         try:
             df = self.get_latest_support_data()
 
             metrics_by_type = (
-                df.groupby("issue_type")
+                df.groupby("issue_type", observed=True)
                 .agg(
                     {
                         "ticket_id": "count",
@@ -206,6 +222,7 @@ class OperationsCalculations:
             print(f"Error getting support metrics by type: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_data_freshness(self):
         """Возвращает информацию о свежести данных"""
         try:
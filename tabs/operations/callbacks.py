@@ -1,9 +1,20 @@
 from dash import callback, Input, Output, State, html, no_update, ctx
 import dash_bootstrap_components as dbc
 from components.kpi_cards import create_kpi_card
+from core.executor import chart_executor
 
 
 def register_operations_callbacks(app, data_manager, calculations, charts):
+    # Графики строятся параллельно (см. core/executor.py)
+    operations_charts = [
+        ("operations-stock-heatmap-chart", charts.create_stock_heatmap_chart),
+        ("operations-issue-resolution-chart", charts.create_issue_resolution_chart),
+        ("operations-ticket-status-chart", charts.create_ticket_status_chart),
+        ("operations-low-stock-chart", charts.create_low_stock_chart),
+    ]
+    for name, build in operations_charts:
+        chart_executor.register(name, build)
+
     @app.callback(
         Output("operations-filter-modal", "is_open"),
         [
@@ -89,37 +100,14 @@ def register_operations_callbacks(app, data_manager, calculations, charts):
             return error_kpi, error_kpi
 
     @app.callback(
-        [
-            Output("operations-stock-heatmap-chart", "figure"),
-            Output("operations-issue-resolution-chart", "figure"),
-            Output("operations-ticket-status-chart", "figure"),
-            Output("operations-low-stock-chart", "figure"),
-        ],
+        [Output(name, "figure") for name, _ in operations_charts],
         [Input("url", "pathname")],
     )
     def update_charts(pathname):
         if pathname != "/operations":
             return no_update, no_update, no_update, no_update
 
-        try:
-            stock_heatmap = charts.create_stock_heatmap_chart()
-            issue_resolution = charts.create_issue_resolution_chart()
-            ticket_status = charts.create_ticket_status_chart()
-            low_stock_fig = charts.create_low_stock_chart()
-
-            return stock_heatmap, issue_resolution, ticket_status, low_stock_fig
-
-        except Exception as e:
-            print(f"Error updating operations charts: {e}")
-            error_fig = {
-                "data": [],
-                "layout": {
-                    "title": f"Ошибка при загрузке данных: {str(e)}",
-                    "xaxis": {"visible": False},
-                    "yaxis": {"visible": False},
-                },
-            }
-            return error_fig, error_fig, error_fig, error_fig
+        return tuple(chart_executor.run([(name, ()) for name, _ in operations_charts]))
 
     @app.callback(
         [
@@ -175,10 +163,9 @@ def register_operations_callbacks(app, data_manager, calculations, charts):
                 ),
             ]
 
-            stock_heatmap = charts.create_stock_heatmap_chart()
-            issue_resolution = charts.create_issue_resolution_chart()
-            ticket_status = charts.create_ticket_status_chart()
-            low_stock_fig = charts.create_low_stock_chart()
+            stock_heatmap, issue_resolution, ticket_status, low_stock_fig = (
+                chart_executor.run([(name, ()) for name, _ in operations_charts])
+            )
 
             return (
                 inventory_kpi,
@@ -1,4 +1,5 @@
-import plotly.express as px
+from components import figures
+from core.cache import cached_figure
 
 
 class OperationsCharts:
@@ -6,6 +7,7 @@ class OperationsCharts:
         self.dm = data_manager
         self.calc = calculations
 
+    @cached_figure
     def create_stock_heatmap_chart(self):
         """Heatmap остатков по складам и категориям на основе актуальных данных"""
         try:
@@ -16,12 +18,14 @@ class OperationsCharts:
             )
 
             heatmap_data = (
-                df.groupby(["warehouse_id", "category"])["stock_quantity"]
+                df.groupby(["warehouse_id", "category"], observed=True)[
+                    "stock_quantity"
+                ]
                 .sum()
                 .reset_index()
             )
 
-            fig = px.density_heatmap(
+            fig = figures.density_heatmap(
                 heatmap_data,
                 x="warehouse_id",
                 y="category",
@@ -30,7 +34,8 @@ class OperationsCharts:
                 color_continuous_scale="Blues",
             )
 
-            fig.update_layout(
+            figures.update_layout(
+                fig,
                 plot_bgcolor="rgba(0,0,0,0)",
                 paper_bgcolor="rgba(0,0,0,0)",
             )
@@ -40,19 +45,22 @@ class OperationsCharts:
             print(f"Error creating stock heatmap: {e}")
             return self._create_empty_chart("Ошибка при создании графика")
 
+    @cached_figure
     def create_issue_resolution_chart(self):
         """Время решения по типам проблем на основе актуальных данных"""
         try:
             df = self.calc.get_latest_support_data()
 
             resolution_by_issue = (
-                df.groupby("issue_type")["resolution_time_minutes"].mean().reset_index()
+                df.groupby("issue_type", observed=True)["resolution_time_minutes"]
+                .mean()
+                .reset_index()
             )
             resolution_by_issue["hours"] = (
                 resolution_by_issue["resolution_time_minutes"] / 60
             )
 
-            fig = px.bar(
+            fig = figures.bar(
                 resolution_by_issue,
                 x="issue_type",
                 y="hours",
@@ -62,7 +70,8 @@ class OperationsCharts:
                 color_continuous_scale="Viridis",
             )
 
-            fig.update_layout(
+            figures.update_layout(
+                fig,
                 plot_bgcolor="rgba(0,0,0,0)",
                 paper_bgcolor="rgba(0,0,0,0)",
             )
@@ -72,6 +81,7 @@ class OperationsCharts:
             print(f"Error creating issue resolution chart: {e}")
             return self._create_empty_chart("Ошибка при создании графика")
 
+    @cached_figure
     def create_ticket_status_chart(self):
         """Распределение тикетов по статусам на основе актуальных данных"""
         try:
@@ -82,7 +92,7 @@ class OperationsCharts:
                 lambda x: "Решено" if x else "Не решено"
             )
 
-            fig = px.pie(
+            fig = figures.pie(
                 status_counts,
                 values="count",
                 names="status",
@@ -91,7 +101,8 @@ class OperationsCharts:
                 color_discrete_sequence=["#00cc96", "#ef553b"],
             )
 
-            fig.update_layout(
+            figures.update_layout(
+                fig,
                 plot_bgcolor="rgba(0,0,0,0)",
                 paper_bgcolor="rgba(0,0,0,0)",
             )
@@ -101,6 +112,7 @@ class OperationsCharts:
             print(f"Error creating ticket status chart: {e}")
             return self._create_empty_chart("Ошибка при создании графика")
 
+    @cached_figure
     def create_low_stock_chart(self, threshold=5):
         """Топ товаров с низким запасом на основе актуальных данных"""
         try:
@@ -114,13 +126,15 @@ class OperationsCharts:
             low_stock = df[df["stock_quantity"] < threshold]
 
             low_stock_agg = (
-                low_stock.groupby(["product_name", "category"])["stock_quantity"]
+                low_stock.groupby(["product_name", "category"], observed=True)[
+                    "stock_quantity"
+                ]
                 .sum()
                 .reset_index()
             )
             low_stock_agg = low_stock_agg.nlargest(10, "stock_quantity")
 
-            fig = px.bar(
+            fig = figures.bar(
                 low_stock_agg,
                 x="stock_quantity",
                 y="product_name",
@@ -130,7 +144,8 @@ class OperationsCharts:
                 color="category",
             )
 
-            fig.update_layout(
+            figures.update_layout(
+                fig,
                 plot_bgcolor="rgba(0,0,0,0)",
                 paper_bgcolor="rgba(0,0,0,0)",
                 yaxis={"categoryorder": "total ascending"},
@@ -1,54 +1,65 @@
+import pandas as pd
+
+from core.cache import cached_calculation
+
+
 class OverviewCalculations:
     def __init__(self, data_manager):
         self.dm = data_manager
 
-    def apply_filters(
-        self, df, start_date=None, end_date=None, regions=None, categories=None
+    # Обзор показывает только продажи 2025 года
+    YEAR_START = pd.Timestamp("2025-01-01")
+    YEAR_END = pd.Timestamp("2026-01-01") - pd.Timedelta(1, "ns")
+
+    @cached_calculation
+    def get_filtered_sales_data(
+        self, start_date=None, end_date=None, regions=None, categories=None
     ):
-        """Применение фильтров к DataFrame"""
-        df = df[df["transaction_date"].dt.year == 2025]
+        """Продажи 2025 года с учетом фильтров. Результат изменять нельзя."""
+        start, end = self._date_range(start_date, end_date)
+        return self.dm.select(
+            "sales", {"region": regions, "category": categories}, start, end
+        )
 
+    def _date_range(self, start_date, end_date):
+        """Диапазон дат фильтра, ограниченный 2025 годом"""
+        start, end = self.YEAR_START, self.YEAR_END
         if start_date and end_date:
-            df = df[
-                (df["transaction_date"] >= start_date)
-                & (df["transaction_date"] <= end_date)
-            ]
-
-        if regions and len(regions) > 0:
-            if "region" not in df.columns:
-                df = df.merge(
-                    self.dm.df_user_segments[["customer_id", "region"]],
-                    on="customer_id",
-                )
-            df = df[df["region"].isin(regions)]
-
-        if categories is not None and len(categories) > 0:
-            if "category" not in df.columns:
-                df = df.merge(
-                    self.dm.df_products[["product_id", "category"]], on="product_id"
-                )
-            df = df[df["category"].isin(categories)]
-
-        return df
+            start = max(start, pd.Timestamp(start_date))
+            end = min(end, pd.Timestamp(end_date))
+        return start, end
+
+    def _rollup_totals(self, start_date, end_date, regions, categories):
+        """Суммы продаж по дневным агрегатам или None, если нужен просмотр строк"""
+        start, end = self._date_range(start_date, end_date)
+        return self.dm.rollup_totals(
+            "sales", {"region": regions, "category": categories}, start, end
+        )
 
+    @cached_calculation
     def calculate_total_revenue(
         self, start_date=None, end_date=None, regions=None, categories=None
     ):
-        df = self.dm.df_sales.copy()
-        df = self.apply_filters(df, start_date, end_date, regions, categories)
+        totals = self._rollup_totals(start_date, end_date, regions, categories)
+        if totals is not None:
+            return round(totals["revenue"], 2)
 
-        df = df.merge(self.dm.df_products[["product_id", "price"]], on="product_id")
-        df["revenue"] = df["quantity"] * df["price"]
+        df = self.get_filtered_sales_data(start_date, end_date, regions, categories)
 
         return round(df["revenue"].sum(), 2)
 
+    @cached_calculation
     def calculate_orders_count(
         self, start_date=None, end_date=None, regions=None, categories=None
     ):
-        df = self.dm.df_sales.copy()
-        df = self.apply_filters(df, start_date, end_date, regions, categories)
+        totals = self._rollup_totals(start_date, end_date, regions, categories)
+        if totals is not None and "orders" in totals:
+            return totals["orders"]
+
+        df = self.get_filtered_sales_data(start_date, end_date, regions, categories)
         return df["transaction_id"].nunique()
 
+    @cached_calculation
     def calculate_avg_order_value(
         self, start_date=None, end_date=None, regions=None, categories=None
     ):
@@ -61,31 +72,32 @@ class OverviewCalculations:
 
         return round(total_revenue / orders_count, 2) if orders_count > 0 else 0
 
+    @cached_calculation
     def calculate_active_users(
         self, start_date=None, end_date=None, regions=None, categories=None
     ):
-        df = self.dm.df_sales.copy()
-        df = self.apply_filters(df, start_date, end_date, regions, categories)
+        df = self.get_filtered_sales_data(start_date, end_date, regions, categories)
         return df["customer_id"].nunique()
 
+    @cached_calculation
     def calculate_ad_spend(self, start_date=None, end_date=None):
-        df = self.dm.df_ad_revenue.copy()
+        totals = self.dm.rollup_totals("ad_revenue", None, start_date, end_date)
+        if totals is not None:
+            return round(totals["spend"], 2)
 
-        if start_date and end_date:
-            df = df[(df["date"] >= start_date) & (df["date"] <= end_date)]
+        df = self.dm.slice_by_date("ad_revenue", start_date, end_date)
 
         return round(df["spend"].sum(), 2)
 
+    @cached_calculation
     def calculate_romi(self, start_date=None, end_date=None):
         ad_spend = self.calculate_ad_spend(start_date, end_date)
-        ad_revenue_df = self.dm.df_ad_revenue.copy()
-
-        if start_date and end_date:
-            ad_revenue_df = ad_revenue_df[
-                (ad_revenue_df["date"] >= start_date)
-                & (ad_revenue_df["date"] <= end_date)
-            ]
 
-        ad_revenue = ad_revenue_df["revenue"].sum()
+        totals = self.dm.rollup_totals("ad_revenue", None, start_date, end_date)
+        if totals is not None:
+            ad_revenue = totals["revenue"]
+        else:
+            ad_revenue_df = self.dm.slice_by_date("ad_revenue", start_date, end_date)
+            ad_revenue = ad_revenue_df["revenue"].sum()
 
         return round((ad_revenue - ad_spend) / ad_spend * 100, 2) if ad_spend > 0 else 0
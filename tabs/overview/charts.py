@@ -1,5 +1,6 @@
-import plotly.express as px
 import pandas as pd
+from components import figures
+from core.cache import cached_figure
 from .calculations import OverviewCalculations
 
 
@@ -8,25 +9,20 @@ class OverviewCharts:
         self.dm = data_manager
         self.calculations = OverviewCalculations(data_manager)
 
+    @cached_figure
     def create_sales_trend_chart(
         self, start_date=None, end_date=None, regions=None, categories=None
     ):
-        df = self.dm.df_sales.copy()
-        df = self.calculations.apply_filters(
-            df, start_date, end_date, regions, categories
+        df = self.calculations.get_filtered_sales_data(
+            start_date, end_date, regions, categories
         )
-
-        df = df.merge(self.dm.df_products[["product_id", "price"]], on="product_id")
-        df["revenue"] = df["quantity"] * df["price"]
-
-        df = df[df["transaction_date"].dt.year == 2025]
         daily_sales = (
             df.groupby(df["transaction_date"].dt.date)["revenue"].sum().reset_index()
         )
 
         daily_sales = daily_sales.sort_values("transaction_date")
 
-        fig = px.line(
+        fig = figures.line(
             daily_sales,
             x="transaction_date",
             y="revenue",
@@ -35,20 +31,17 @@ class OverviewCharts:
             color_discrete_sequence=["#8a2be2"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             template="plotly_white",
             hovermode="x unified",
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1", tickformat="%d.%m.%Y"),
             yaxis=dict(gridcolor="#ecf0f1", tickformat=",.0f"),
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
+        figures.update_traces(
+            fig,
             line=dict(width=3),
             marker=dict(size=6),
             hovertemplate="<b>%{x|%d.%m.%Y}</b><br>Выручка: <b>%{y:,.0f} ₽</b><extra></extra>",
@@ -56,23 +49,17 @@ class OverviewCharts:
 
         return fig
 
+    @cached_figure
     def create_category_distribution_chart(
         self, start_date=None, end_date=None, regions=None, categories=None
     ):
-        df = self.dm.df_sales.copy()
-
-        df = self.calculations.apply_filters(
-            df, start_date, end_date, regions, categories=None
+        df = self.calculations.get_filtered_sales_data(
+            start_date, end_date, regions, None
         )
 
-        df = df[df["transaction_date"].dt.year == 2025]
-
-        df = df.merge(
-            self.dm.df_products[["product_id", "category", "price"]], on="product_id"
+        category_revenue = (
+            df.groupby("category", observed=True)["revenue"].sum().reset_index()
         )
-        df["revenue"] = df["quantity"] * df["price"]
-
-        category_revenue = df.groupby("category")["revenue"].sum().reset_index()
 
         if categories and len(categories) > 0:
             selected_categories = category_revenue[
@@ -109,7 +96,7 @@ class OverviewCharts:
         if categories and len(categories) > 0:
             title = f"🥧 Сравнение выбранных категорий с рынком"
 
-        fig = px.pie(
+        fig = figures.pie(
             category_revenue,
             values="revenue",
             names="category",
@@ -118,17 +105,14 @@ class OverviewCharts:
             color_discrete_sequence=colors,
         )
 
-        fig.update_layout(
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+        figures.update_layout(
+            fig,
+            **figures.THEME,
             showlegend=True,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
+        figures.update_traces(
+            fig,
             textposition="inside",
             textinfo="percent+label",
             marker=dict(line=dict(color="#ffffff", width=2)),
@@ -137,24 +121,19 @@ class OverviewCharts:
 
         return fig
 
+    @cached_figure
     def create_top_products_chart(
         self, start_date=None, end_date=None, regions=None, categories=None, top_n=10
     ):
-        df = self.dm.df_sales.copy()
-        df = self.calculations.apply_filters(
-            df, start_date, end_date, regions, categories
-        )
-
-        df = df[df["transaction_date"].dt.year == 2025]
-
-        df = df.merge(
-            self.dm.df_products[["product_id", "product_name", "price"]],
-            on="product_id",
+        df = self.calculations.get_filtered_sales_data(
+            start_date, end_date, regions, categories
         )
-        df["revenue"] = df["quantity"] * df["price"]
 
         top_products = (
-            df.groupby("product_name")["revenue"].sum().nlargest(top_n).reset_index()
+            df.groupby("product_name", observed=True)["revenue"]
+            .sum()
+            .nlargest(top_n)
+            .reset_index()
         )
 
         colors = [
@@ -174,7 +153,7 @@ class OverviewCharts:
         if categories and len(categories) > 0:
             title = f"🏆 Топ {top_n} товаров в выбранных категориях"
 
-        fig = px.bar(
+        fig = figures.bar(
             top_products,
             x="revenue",
             y="product_name",
@@ -185,20 +164,17 @@ class OverviewCharts:
             color_continuous_scale=colors,
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             yaxis={"categoryorder": "total ascending"},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1", tickformat=",.0f"),
             showlegend=False,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
-            hovertemplate="<b>%{y}</b><br>Выручка: <b>%{x:,.0f} ₽</b><extra></extra>"
+        figures.update_traces(
+            fig,
+            hovertemplate="<b>%{y}</b><br>Выручка: <b>%{x:,.0f} ₽</b><extra></extra>",
         )
 
         return fig
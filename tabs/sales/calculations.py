@@ -1,10 +1,13 @@
 import pandas as pd
 
+from core.cache import cached_calculation
+
 
 class SalesCalculations:
     def __init__(self, data_manager):
         self.dm = data_manager
 
+    @cached_calculation
     def get_filtered_sales_data(
         self,
         start_date=None,
@@ -15,62 +18,127 @@ class SalesCalculations:
         payment_methods=None,
         suppliers=None,
     ):
-        """Получает отфильтрованные данные продаж с учетом ВСЕХ фильтров"""
+        """Получает отфильтрованные данные продаж с учетом ВСЕХ фильтров.
+
+        Результат кэшируется и общий для всех KPI и графиков - изменять его нельзя.
+        """
 
         try:
-            df_sales = self.dm.df_sales.copy()
-
-            df_sales = df_sales.merge(
-                self.dm.df_products[
-                    ["product_id", "product_name", "category", "price", "supplier_id"]
-                ],
-                on="product_id",
-                how="left",
+            return self.dm.select(
+                "sales",
+                {
+                    "region": regions,
+                    "category": categories,
+                    "segment": segments,
+                    "payment_method": payment_methods,
+                    "supplier_name": suppliers,
+                },
+                start_date,
+                end_date,
             )
 
-            df_sales = df_sales.merge(
-                self.dm.df_suppliers[["supplier_id", "supplier_name"]],
-                on="supplier_id",
-                how="left",
-            )
+        except Exception as e:
+            print(f"Error in get_filtered_sales_data: {e}")
+            return pd.DataFrame()
 
-            df_sales = df_sales.merge(
-                self.dm.df_user_segments[["customer_id", "region", "segment"]],
-                on="customer_id",
-                how="left",
+    @staticmethod
+    def _dimension_filters(regions, categories, segments, payment_methods, suppliers):
+        return {
+            "region": regions,
+            "category": categories,
+            "segment": segments,
+            "payment_method": payment_methods,
+            "supplier_name": suppliers,
+        }
+
+    def _totals(
+        self,
+        start_date,
+        end_date,
+        regions,
+        categories,
+        segments,
+        payment_methods,
+        suppliers,
+    ):
+        """
+        Суммы выручки и количества по дневным агрегатам или кубу продаж.
+        None - ни те, ни другой не отвечают на запрос, нужен просмотр строк.
+        """
+        filters = self._dimension_filters(
+            regions, categories, segments, payment_methods, suppliers
+        )
+        totals = self.dm.rollup_totals("sales", filters, start_date, end_date)
+        if totals is None:
+            totals = self.dm.sales_cube.totals(filters, start_date, end_date)
+        return totals
+
+    def _revenue_by(
+        self,
+        dimension,
+        start_date,
+        end_date,
+        regions,
+        categories,
+        segments,
+        payment_methods,
+        suppliers,
+    ):
+        """Выручка по значениям измерения из куба продаж, если диапазон дат не
+        отсекает продаж, иначе по строкам под фильтрами. None - нет продаж.
+        """
+        source = self.dm.sales_cube.select(
+            self._dimension_filters(
+                regions, categories, segments, payment_methods, suppliers
+            ),
+            start_date,
+            end_date,
+        )
+        if source is None:
+            source = self.get_filtered_sales_data(
+                start_date,
+                end_date,
+                regions,
+                categories,
+                segments,
+                payment_methods,
+                suppliers,
             )
+        if source.empty:
+            return None
+        return source.groupby(dimension, observed=True)["revenue"].sum().reset_index()
 
-            if start_date and end_date:
-                start_date = pd.to_datetime(start_date)
-                end_date = pd.to_datetime(end_date)
-                df_sales = df_sales[
-                    (df_sales["transaction_date"] >= start_date)
-                    & (df_sales["transaction_date"] <= end_date)
-                ]
-
-            if regions and len(regions) > 0:
-                df_sales = df_sales[df_sales["region"].isin(regions)]
-
-            if categories and len(categories) > 0:
-                df_sales = df_sales[df_sales["category"].isin(categories)]
-
-            if segments and len(segments) > 0:
-                df_sales = df_sales[df_sales["segment"].isin(segments)]
-
-            if payment_methods and len(payment_methods) > 0:
-                df_sales = df_sales[df_sales["payment_method"].isin(payment_methods)]
-
-            if suppliers and len(suppliers) > 0:
-                df_sales = df_sales[df_sales["supplier_name"].isin(suppliers)]
-
-            df_sales["revenue"] = df_sales["quantity"] * df_sales["price"]
+    @cached_calculation
+    def get_filtered_returns_data(
+        self,
+        start_date=None,
+        end_date=None,
+        regions=None,
+        categories=None,
+        segments=None,
+        payment_methods=None,
+        suppliers=None,
+    ):
+        """Получает отфильтрованные возвраты с учетом ВСЕХ фильтров.
 
-            return df_sales
+        Измерения возврата сопоставлены при загрузке (см.
+        DataManager._build_returns_fact). Изменять результат нельзя.
+        """
+        try:
+            return self.dm.select(
+                "returns",
+                self._dimension_filters(
+                    regions, categories, segments, payment_methods, suppliers
+                ),
+                start_date,
+                end_date,
+            )
 
         except Exception as e:
-            print(f"Error in get_filtered_sales_data: {e}")
+            print(f"Error in get_filtered_returns_data: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def calculate_total_revenue(
         self,
         start_date=None,
@@ -82,6 +150,18 @@ class SalesCalculations:
         suppliers=None,
     ):
         try:
+            totals = self._totals(
+                start_date,
+                end_date,
+                regions,
+                categories,
+                segments,
+                payment_methods,
+                suppliers,
+            )
+            if totals is not None:
+                return round(totals["revenue"], 2) if totals["rows"] else 0
+
             df = self.get_filtered_sales_data(
                 start_date,
                 end_date,
@@ -98,6 +178,7 @@ class SalesCalculations:
             print(f"Error calculating total revenue: {e}")
             return 0
 
+    @cached_calculation
     def calculate_orders_count(
         self,
         start_date=None,
@@ -109,6 +190,18 @@ class SalesCalculations:
         suppliers=None,
     ):
         try:
+            totals = self._totals(
+                start_date,
+                end_date,
+                regions,
+                categories,
+                segments,
+                payment_methods,
+                suppliers,
+            )
+            if totals is not None and "orders" in totals:
+                return totals["orders"]
+
             df = self.get_filtered_sales_data(
                 start_date,
                 end_date,
@@ -125,6 +218,7 @@ class SalesCalculations:
             print(f"Error calculating orders count: {e}")
             return 0
 
+    @cached_calculation
     def calculate_avg_order_value(
         self,
         start_date=None,
@@ -159,6 +253,7 @@ class SalesCalculations:
             print(f"Error calculating avg order value: {e}")
             return 0
 
+    @cached_calculation
     def calculate_total_quantity(
         self,
         start_date=None,
@@ -170,6 +265,18 @@ class SalesCalculations:
         suppliers=None,
     ):
         try:
+            totals = self._totals(
+                start_date,
+                end_date,
+                regions,
+                categories,
+                segments,
+                payment_methods,
+                suppliers,
+            )
+            if totals is not None:
+                return totals["quantity"]
+
             df = self.get_filtered_sales_data(
                 start_date,
                 end_date,
@@ -186,6 +293,7 @@ class SalesCalculations:
             print(f"Error calculating total quantity: {e}")
             return 0
 
+    @cached_calculation
     def calculate_return_rate(
         self,
         start_date=None,
@@ -209,59 +317,16 @@ class SalesCalculations:
             if orders_count == 0:
                 return 0
 
-            df_returns = self.dm.df_returns.copy()
-
-            df_returns = df_returns.merge(
-                self.dm.df_sales[
-                    ["transaction_id", "transaction_date", "payment_method"]
-                ],
-                on="transaction_id",
-                how="left",
-            )
-
-            df_returns = df_returns.merge(
-                self.dm.df_products[["product_id", "category", "supplier_id"]],
-                on="product_id",
-                how="left",
-            )
-
-            df_returns = df_returns.merge(
-                self.dm.df_suppliers[["supplier_id", "supplier_name"]],
-                on="supplier_id",
-                how="left",
-            )
-
-            df_returns = df_returns.merge(
-                self.dm.df_user_segments[["customer_id", "region", "segment"]],
-                on="customer_id",
-                how="left",
+            df_returns = self.get_filtered_returns_data(
+                start_date,
+                end_date,
+                regions,
+                categories,
+                segments,
+                payment_methods,
+                suppliers,
             )
 
-            if start_date and end_date:
-                start_date = pd.to_datetime(start_date)
-                end_date = pd.to_datetime(end_date)
-                df_returns = df_returns[
-                    (df_returns["transaction_date"] >= start_date)
-                    & (df_returns["transaction_date"] <= end_date)
-                ]
-
-            if regions and len(regions) > 0:
-                df_returns = df_returns[df_returns["region"].isin(regions)]
-
-            if categories and len(categories) > 0:
-                df_returns = df_returns[df_returns["category"].isin(categories)]
-
-            if segments and len(segments) > 0:
-                df_returns = df_returns[df_returns["segment"].isin(segments)]
-
-            if payment_methods and len(payment_methods) > 0:
-                df_returns = df_returns[
-                    df_returns["payment_method"].isin(payment_methods)
-                ]
-
-            if suppliers and len(suppliers) > 0:
-                df_returns = df_returns[df_returns["supplier_name"].isin(suppliers)]
-
             returns_count = df_returns["return_id"].nunique()
 
             return (
@@ -274,6 +339,7 @@ class SalesCalculations:
             print(f"Error calculating return rate: {e}")
             return 0
 
+    @cached_calculation
     def calculate_unique_customers(
         self,
         start_date=None,
@@ -301,6 +367,7 @@ class SalesCalculations:
             print(f"Error calculating unique customers: {e}")
             return 0
 
+    @cached_calculation
     def get_regions_distribution(
         self,
         start_date=None,
@@ -312,7 +379,8 @@ class SalesCalculations:
         suppliers=None,
     ):
         try:
-            df = self.get_filtered_sales_data(
+            regions_revenue = self._revenue_by(
+                "region",
                 start_date,
                 end_date,
                 regions,
@@ -321,14 +389,14 @@ class SalesCalculations:
                 payment_methods,
                 suppliers,
             )
-            if df.empty:
+            if regions_revenue is None:
                 return pd.DataFrame()
-            regions_revenue = df.groupby("region")["revenue"].sum().reset_index()
             return regions_revenue.sort_values("revenue", ascending=False)
         except Exception as e:
             print(f"Error getting regions distribution: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_segments_distribution(
         self,
         start_date=None,
@@ -340,7 +408,8 @@ class SalesCalculations:
         suppliers=None,
     ):
         try:
-            df = self.get_filtered_sales_data(
+            segments_revenue = self._revenue_by(
+                "segment",
                 start_date,
                 end_date,
                 regions,
@@ -349,14 +418,14 @@ class SalesCalculations:
                 payment_methods,
                 suppliers,
             )
-            if df.empty:
+            if segments_revenue is None:
                 return pd.DataFrame()
-            segments_revenue = df.groupby("segment")["revenue"].sum().reset_index()
             return segments_revenue.sort_values("revenue", ascending=False)
         except Exception as e:
             print(f"Error getting segments distribution: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_payment_methods_distribution(
         self,
         start_date=None,
@@ -368,7 +437,8 @@ class SalesCalculations:
         suppliers=None,
     ):
         try:
-            df = self.get_filtered_sales_data(
+            payment_methods_revenue = self._revenue_by(
+                "payment_method",
                 start_date,
                 end_date,
                 regions,
@@ -377,16 +447,14 @@ class SalesCalculations:
                 payment_methods,
                 suppliers,
             )
-            if df.empty:
+            if payment_methods_revenue is None:
                 return pd.DataFrame()
-            payment_methods_revenue = (
-                df.groupby("payment_method")["revenue"].sum().reset_index()
-            )
             return payment_methods_revenue.sort_values("revenue", ascending=False)
         except Exception as e:
             print(f"Error getting payment methods distribution: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_suppliers_distribution(
         self,
         start_date=None,
@@ -398,7 +466,8 @@ class SalesCalculations:
         suppliers=None,
     ):
         try:
-            df = self.get_filtered_sales_data(
+            suppliers_revenue = self._revenue_by(
+                "supplier_name",
                 start_date,
                 end_date,
                 regions,
@@ -407,16 +476,14 @@ class SalesCalculations:
                 payment_methods,
                 suppliers,
             )
-            if df.empty:
+            if suppliers_revenue is None:
                 return pd.DataFrame()
-            suppliers_revenue = (
-                df.groupby("supplier_name")["revenue"].sum().reset_index()
-            )
             return suppliers_revenue.nlargest(10, "revenue")
         except Exception as e:
             print(f"Error getting suppliers distribution: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_hourly_distribution(
         self,
         start_date=None,
@@ -439,13 +506,17 @@ class SalesCalculations:
             )
             if df.empty:
                 return pd.DataFrame()
-            df["hour"] = df["transaction_date"].dt.hour
-            hourly_revenue = df.groupby("hour")["revenue"].sum().reset_index()
+            hourly_revenue = (
+                df.groupby(df["transaction_date"].dt.hour.rename("hour"))["revenue"]
+                .sum()
+                .reset_index()
+            )
             return hourly_revenue.sort_values("hour")
         except Exception as e:
             print(f"Error getting hourly distribution: {e}")
             return pd.DataFrame()
 
+    @cached_calculation
     def get_returns_reasons_distribution(
         self,
         start_date=None,
@@ -458,61 +529,20 @@ class SalesCalculations:
     ):
         """Распределение возвратов по причинам"""
         try:
-            df_returns = self.dm.df_returns.copy()
-
-            df_returns = df_returns.merge(
-                self.dm.df_sales[
-                    ["transaction_id", "transaction_date", "payment_method"]
-                ],
-                on="transaction_id",
-                how="left",
-            )
-
-            df_returns = df_returns.merge(
-                self.dm.df_products[["product_id", "category", "supplier_id"]],
-                on="product_id",
-                how="left",
-            )
-
-            df_returns = df_returns.merge(
-                self.dm.df_suppliers[["supplier_id", "supplier_name"]],
-                on="supplier_id",
-                how="left",
-            )
-
-            df_returns = df_returns.merge(
-                self.dm.df_user_segments[["customer_id", "region", "segment"]],
-                on="customer_id",
-                how="left",
+            df_returns = self.get_filtered_returns_data(
+                start_date,
+                end_date,
+                regions,
+                categories,
+                segments,
+                payment_methods,
+                suppliers,
             )
 
-            if start_date and end_date:
-                start_date = pd.to_datetime(start_date)
-                end_date = pd.to_datetime(end_date)
-                df_returns = df_returns[
-                    (df_returns["transaction_date"] >= start_date)
-                    & (df_returns["transaction_date"] <= end_date)
-                ]
-
-            if regions and len(regions) > 0:
-                df_returns = df_returns[df_returns["region"].isin(regions)]
-
-            if categories and len(categories) > 0:
-                df_returns = df_returns[df_returns["category"].isin(categories)]
-
-            if segments and len(segments) > 0:
-                df_returns = df_returns[df_returns["segment"].isin(segments)]
-
-            if payment_methods and len(payment_methods) > 0:
-                df_returns = df_returns[
-                    df_returns["payment_method"].isin(payment_methods)
-                ]
-
-            if suppliers and len(suppliers) > 0:
-                df_returns = df_returns[df_returns["supplier_name"].isin(suppliers)]
-
             reasons_distribution = (
-                df_returns.groupby("reason")["return_id"].nunique().reset_index()
+                df_returns.groupby("reason", observed=True)["return_id"]
+                .nunique()
+                .reset_index()
             )
             reasons_distribution.columns = ["reason", "returns_count"]
 
@@ -1,10 +1,23 @@
 from dash import Input, Output, State, no_update, ctx
 import dash_bootstrap_components as dbc
 from components.kpi_cards import create_kpi_card
+from core.executor import chart_executor
 from datetime import datetime
 
 
 def register_sales_callbacks(app, data_manager, calculations, charts):
+    # Графики update_charts строятся параллельно (см. core/executor.py)
+    sales_charts = [
+        ("sales-regions-chart", charts.create_regions_chart),
+        ("sales-segments-chart", charts.create_segments_chart),
+        ("sales-payment-methods-chart", charts.create_payment_methods_chart),
+        ("sales-suppliers-chart", charts.create_suppliers_chart),
+        ("sales-hourly-chart", charts.create_hourly_chart),
+        ("sales-returns-reasons-chart", charts.create_returns_reasons_chart),
+    ]
+    for name, build in sales_charts:
+        chart_executor.register(name, build)
+
     @app.callback(
         Output("sales-filter-modal", "is_open"),
         [
@@ -213,14 +226,7 @@ def register_sales_callbacks(app, data_manager, calculations, charts):
             ]
 
     @app.callback(
-        [
-            Output("sales-regions-chart", "figure"),
-            Output("sales-segments-chart", "figure"),
-            Output("sales-payment-methods-chart", "figure"),
-            Output("sales-suppliers-chart", "figure"),
-            Output("sales-hourly-chart", "figure"),
-            Output("sales-returns-reasons-chart", "figure"),
-        ],
+        [Output(name, "figure") for name, _ in sales_charts],
         [Input("sales-filters-store", "data")],
     )
     def update_charts(filters_data):
@@ -243,79 +249,13 @@ def register_sales_callbacks(app, data_manager, calculations, charts):
         payment_methods = filters_data.get("payment_methods")
         suppliers = filters_data.get("suppliers")
 
-        try:
-            regions_chart = charts.create_regions_chart(
-                start_date,
-                end_date,
-                regions,
-                categories,
-                segments,
-                payment_methods,
-                suppliers,
-            )
-            segments_chart = charts.create_segments_chart(
-                start_date,
-                end_date,
-                regions,
-                categories,
-                segments,
-                payment_methods,
-                suppliers,
-            )
-            payment_methods_chart = charts.create_payment_methods_chart(
-                start_date,
-                end_date,
-                regions,
-                categories,
-                segments,
-                payment_methods,
-                suppliers,
-            )
-            suppliers_chart = charts.create_suppliers_chart(
-                start_date,
-                end_date,
-                regions,
-                categories,
-                segments,
-                payment_methods,
-                suppliers,
-            )
-            hourly_chart = charts.create_hourly_chart(
-                start_date,
-                end_date,
-                regions,
-                categories,
-                segments,
-                payment_methods,
-                suppliers,
-            )
-            returns_reasons_chart = charts.create_returns_reasons_chart(
-                start_date,
-                end_date,
-                regions,
-                categories,
-                segments,
-                payment_methods,
-                suppliers,
-            )
-
-            return (
-                regions_chart,
-                segments_chart,
-                payment_methods_chart,
-                suppliers_chart,
-                hourly_chart,
-                returns_reasons_chart,
-            )
-
-        except Exception as e:
-            print(f"Error updating charts: {e}")
-            error_fig = {
-                "data": [],
-                "layout": {
-                    "title": f"Ошибка при загрузке данных: {str(e)}",
-                    "xaxis": {"visible": False},
-                    "yaxis": {"visible": False},
-                },
-            }
-            return error_fig, error_fig, error_fig, error_fig, error_fig, error_fig
+        args = (
+            start_date,
+            end_date,
+            regions,
+            categories,
+            segments,
+            payment_methods,
+            suppliers,
+        )
+        return tuple(chart_executor.run([(name, args) for name, _ in sales_charts]))
@@ -1,14 +1,15 @@
-import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
+from components import figures
+from core.cache import cached_figure
 from .calculations import SalesCalculations
 
 
 class SalesCharts:
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, calculations=None):
         self.dm = data_manager
-        self.calculations = SalesCalculations(data_manager)
+        self.calculations = calculations or SalesCalculations(data_manager)
 
+    @cached_figure
     def create_regions_chart(
         self,
         start_date=None,
@@ -47,7 +48,7 @@ class SalesCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.bar(
+        fig = figures.bar(
             regions_data,
             x="revenue",
             y="region",
@@ -58,24 +59,22 @@ class SalesCharts:
             color_continuous_scale=["#9370db", "#8a2be2", "#4b0082"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             yaxis={"categoryorder": "total ascending"},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1", tickformat=",.0f"),
             showlegend=False,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
-            hovertemplate="<b>%{y}</b><br>Выручка: <b>%{x:,.0f} ₽</b><extra></extra>"
+        figures.update_traces(
+            fig,
+            hovertemplate="<b>%{y}</b><br>Выручка: <b>%{x:,.0f} ₽</b><extra></extra>",
         )
 
         return fig
 
+    @cached_figure
     def create_segments_chart(
         self,
         start_date=None,
@@ -123,7 +122,7 @@ class SalesCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.bar(
+        fig = figures.bar(
             segments_data,
             x="revenue",
             y="segment",
@@ -134,24 +133,22 @@ class SalesCharts:
             color_discrete_map=segment_colors,
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             yaxis={"categoryorder": "total ascending"},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1", tickformat=",.0f"),
             showlegend=False,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
-            hovertemplate="<b>%{y}</b><br>Выручка: <b>%{x:,.0f} ₽</b><extra></extra>"
+        figures.update_traces(
+            fig,
+            hovertemplate="<b>%{y}</b><br>Выручка: <b>%{x:,.0f} ₽</b><extra></extra>",
         )
 
         return fig
 
+    @cached_figure
     def create_payment_methods_chart(
         self,
         start_date=None,
@@ -190,7 +187,7 @@ class SalesCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.pie(
+        fig = figures.pie(
             payment_data,
             values="revenue",
             names="payment_method",
@@ -204,25 +201,23 @@ class SalesCharts:
             ],
         )
 
-        fig.update_traces(
+        figures.update_traces(
+            fig,
             textposition="inside",
             textinfo="percent+label",
             marker=dict(line=dict(color="#ffffff", width=2)),
             hovertemplate="<b>%{label}</b><br>Выручка: <b>%{value:,.0f} ₽</b><br>Доля: <b>%{percent}</b><extra></extra>",
         )
 
-        fig.update_layout(
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+        figures.update_layout(
+            fig,
+            **figures.THEME,
             showlegend=True,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
         return fig
 
+    @cached_figure
     def create_suppliers_chart(
         self,
         start_date=None,
@@ -261,7 +256,7 @@ class SalesCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.bar(
+        fig = figures.bar(
             suppliers_data,
             x="revenue",
             y="supplier_name",
@@ -272,24 +267,22 @@ class SalesCharts:
             color_continuous_scale=["#9370db", "#8a2be2", "#4b0082"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             yaxis={"categoryorder": "total ascending"},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1", tickformat=",.0f"),
             showlegend=False,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
-            hovertemplate="<b>%{y}</b><br>Выручка: <b>%{x:,.0f} ₽</b><extra></extra>"
+        figures.update_traces(
+            fig,
+            hovertemplate="<b>%{y}</b><br>Выручка: <b>%{x:,.0f} ₽</b><extra></extra>",
         )
 
         return fig
 
+    @cached_figure
     def create_hourly_chart(
         self,
         start_date=None,
@@ -326,7 +319,7 @@ class SalesCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.line(
+        fig = figures.line(
             hourly_data,
             x="hour",
             y="revenue",
@@ -335,20 +328,17 @@ class SalesCharts:
             color_discrete_sequence=["#8a2be2"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             template="plotly_white",
             hovermode="x unified",
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1", tickmode="linear", dtick=1),
             yaxis=dict(gridcolor="#ecf0f1", tickformat=",.0f"),
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
+        figures.update_traces(
+            fig,
             line=dict(width=3),
             marker=dict(size=6),
             hovertemplate="<b>%{x}:00</b><br>Выручка: <b>%{y:,.0f} ₽</b><extra></extra>",
@@ -358,16 +348,7 @@ class SalesCharts:
 
     def _create_empty_chart(self, message):
         """Создает пустой график с сообщением"""
-        fig = go.Figure()
-        fig.update_layout(
-            title=message,
-            xaxis={"visible": False},
-            yaxis={"visible": False},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
-        )
-        return fig
+        return figures.empty(message)
 
     def _get_filter_info(
         self,
@@ -412,6 +393,7 @@ class SalesCharts:
 
         return " | ".join(filters) if filters else ""
 
+    @cached_figure
     def create_returns_reasons_chart(
         self,
         start_date=None,
@@ -450,7 +432,7 @@ class SalesCharts:
         if filter_info:
             title += f"<br><sub>{filter_info}</sub>"
 
-        fig = px.bar(
+        fig = figures.bar(
             reasons_data,
             x="returns_count",
             y="reason",
@@ -464,20 +446,16 @@ class SalesCharts:
             color_continuous_scale=["#FF6B6B", "#FF9999", "#FFCCCC"],
         )
 
-        fig.update_layout(
+        figures.update_layout(
+            fig,
             yaxis={"categoryorder": "total ascending"},
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="#2c3e50"),
+            **figures.THEME,
             xaxis=dict(gridcolor="#ecf0f1"),
             showlegend=False,
-            hoverlabel=dict(
-                bgcolor="white", bordercolor="black", font=dict(color="black", size=12)
-            ),
         )
 
-        fig.update_traces(
-            hovertemplate="<b>%{y}</b><br>Возвратов: <b>%{x}</b><extra></extra>"
+        figures.update_traces(
+            fig, hovertemplate="<b>%{y}</b><br>Возвратов: <b>%{x}</b><extra></extra>"
         )
 
         return fig
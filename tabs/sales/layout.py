@@ -10,7 +10,7 @@ class SalesTab:
     def __init__(self, data_manager):
         self.data_manager = data_manager
         self.calculations = SalesCalculations(data_manager)
-        self.charts = SalesCharts(data_manager)
+        self.charts = SalesCharts(data_manager, self.calculations)
 
     def get_layout(self):
         return html.Div(
@@ -0,0 +1,215 @@
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.data_manager import DataManager  # noqa: E402
+
+# Объемы синтетических таблиц: немного, но на все фильтры хватает
+SALES_ROWS = 2600
+CUSTOMERS = 1000
+PRODUCTS = 100
+SUPPLIERS = 20
+EVENTS_PARTS = 2
+
+START = np.datetime64("2025-01-01")
+DAYS = 365
+
+REGIONS = ["Moscow", "SPB", "Kazan", "Ekaterinburg"]
+SEGMENTS = ["new", "returning", "loyal", "discount_hunter", "high_spender"]
+CATEGORIES = ["Electronics", "Clothes", "Home", "Beauty", "Food"]
+PAYMENT_METHODS = ["card", "sbp", "cash", "installment"]
+
+
+def _times(rng, size):
+    """Случайные моменты 2025 года с точностью до секунды, по возрастанию"""
+    seconds = rng.integers(0, DAYS * 86400, size)
+    return np.sort(START.astype("datetime64[s]") + seconds.astype("timedelta64[s]"))
+
+
+def _dates(rng, size):
+    """Случайные даты 2025 года без времени, по возрастанию"""
+    return np.sort(START + rng.integers(0, DAYS, size).astype("timedelta64[D]"))
+
+
+def write_dataset(path, seed=7):
+    """Пишет в path все CSV в формате data/: те же файлы и колонки"""
+    rng = np.random.default_rng(seed)
+
+    def ids(n):
+        return np.arange(1, n + 1)
+
+    def write(name, df, index=False):
+        df.to_csv(os.path.join(path, name), index=index)
+
+    write(
+        "suppliers.csv",
+        pd.DataFrame(
+            {
+                "supplier_id": ids(SUPPLIERS),
+                "supplier_name": [f"Supplier_{i}" for i in ids(SUPPLIERS)],
+                "region": rng.choice(REGIONS, SUPPLIERS),
+                "rating": rng.uniform(3.0, 5.0, SUPPLIERS).round(2),
+            }
+        ),
+    )
+    write(
+        "products.csv",
+        pd.DataFrame(
+            {
+                "product_id": ids(PRODUCTS),
+                "product_name": [f"Product_{i}" for i in ids(PRODUCTS)],
+                "category": rng.choice(CATEGORIES, PRODUCTS),
+                "price": rng.uniform(200, 20000, PRODUCTS).round(2),
+                "supplier_id": rng.integers(1, SUPPLIERS + 1, PRODUCTS),
+            }
+        ),
+    )
+    write(
+        "user_segments.csv",
+        pd.DataFrame(
+            {
+                "customer_id": ids(CUSTOMERS),
+                "segment": rng.choice(SEGMENTS, CUSTOMERS),
+                "region": rng.choice(REGIONS, CUSTOMERS),
+                "registration_date": rng.permutation(_dates(rng, CUSTOMERS)),
+            }
+        ),
+    )
+    write(
+        "inventory.csv",
+        pd.DataFrame(
+            {
+                "product_id": ids(PRODUCTS),
+                "warehouse_id": rng.integers(1, 6, PRODUCTS),
+                "stock_quantity": rng.integers(0, 1000, PRODUCTS),
+                "last_updated": rng.permutation(_times(rng, PRODUCTS)),
+            }
+        ),
+    )
+
+    sales = pd.DataFrame(
+        {
+            "transaction_id": ids(SALES_ROWS),
+            "customer_id": rng.integers(1, CUSTOMERS + 1, SALES_ROWS),
+            "product_id": rng.integers(1, PRODUCTS + 1, SALES_ROWS),
+            "quantity": rng.integers(1, 5, SALES_ROWS),
+            "payment_method": rng.choice(PAYMENT_METHODS, SALES_ROWS),
+            "transaction_date": _times(rng, SALES_ROWS),
+        }
+    )
+    write("sales.csv", sales)
+    returned = sales.sample(frac=0.1, random_state=seed).sort_index()
+    write(
+        "returns.csv",
+        pd.DataFrame(
+            {
+                "return_id": ids(len(returned)),
+                "transaction_id": returned["transaction_id"].to_numpy(),
+                "customer_id": returned["customer_id"].to_numpy(),
+                "product_id": returned["product_id"].to_numpy(),
+                "reason": rng.choice(
+                    ["wrong_size", "damaged", "defect", "other"], len(returned)
+                ),
+            }
+        ),
+        # Исходный returns.csv записан с индексом pandas
+        index=True,
+    )
+
+    events = pd.DataFrame(
+        {
+            "event_id": ids(1200),
+            "customer_id": rng.integers(1, CUSTOMERS + 1, 1200),
+            "event_type": rng.choice(["page_view", "add_to_cart", "purchase"], 1200),
+            "event_timestamp": _times(rng, 1200),
+            "page_url": rng.choice(["/home", "/product", "/checkout"], 1200),
+            "product_id": rng.integers(1, PRODUCTS + 1, 1200),
+        }
+    )
+    bounds = np.linspace(0, len(events), EVENTS_PARTS + 1).astype(int)
+    for part, (start, end) in enumerate(zip(bounds, bounds[1:]), 1):
+        write(f"events_part{part}.csv", events.iloc[start:end])
+
+    write(
+        "traffic.csv",
+        pd.DataFrame(
+            {
+                "traffic_id": ids(CUSTOMERS),
+                "customer_id": rng.integers(1, CUSTOMERS + 1, CUSTOMERS),
+                "channel": rng.choice(["yandex", "organic", "vk"], CUSTOMERS),
+                "session_start": _times(rng, CUSTOMERS),
+                "device": rng.choice(["mobile", "desktop", "tablet"], CUSTOMERS),
+            }
+        ),
+    )
+    write(
+        "customer_support.csv",
+        pd.DataFrame(
+            {
+                "ticket_id": ids(CUSTOMERS),
+                "customer_id": rng.integers(1, CUSTOMERS + 1, CUSTOMERS),
+                "issue_type": rng.choice(["delivery_delay", "refund"], CUSTOMERS),
+                "resolution_time_minutes": rng.integers(5, 1000, CUSTOMERS),
+                "resolved": rng.random(CUSTOMERS) < 0.8,
+                "support_date": _dates(rng, CUSTOMERS),
+            }
+        ),
+    )
+    write(
+        "ad_revenue.csv",
+        pd.DataFrame(
+            {
+                "ad_id": ids(60),
+                "campaign_name": [f"Campaign_{i}" for i in ids(60)],
+                "product_id": rng.integers(1, PRODUCTS + 1, 60),
+                "spend": rng.uniform(100, 500, 60).round(2),
+                "revenue": rng.uniform(50, 1500, 60).round(2),
+                "impressions": rng.integers(100, 5000, 60),
+                "clicks": rng.integers(0, 100, 60),
+                "date": _dates(rng, 60),
+            }
+        ),
+    )
+
+
+@pytest.fixture(scope="session")
+def data_dir(tmp_path_factory):
+    """Синтетические CSV в формате data/"""
+    path = tmp_path_factory.mktemp("data")
+    write_dataset(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def data_copy(data_dir, tmp_path):
+    """Копия синтетических CSV, которую тест может изменять"""
+    path = tmp_path / "data"
+    shutil.copytree(data_dir, path, ignore=shutil.ignore_patterns(".cache"))
+    return str(path)
+
+
+@pytest.fixture
+def load_data():
+    """Загружает DataManager из каталога без кэша таблиц"""
+
+    def load(data_dir, **kwargs):
+        kwargs.setdefault("use_cache", False)
+        dm = DataManager(data_dir, **kwargs)
+        assert dm.load_data()
+        return dm
+
+    return load
+
+
+@pytest.fixture(scope="session")
+def data_manager(data_dir):
+    """Общий для тестов DataManager: таблицы только читаются"""
+    dm = DataManager(data_dir, use_cache=False)
+    assert dm.load_data()
+    return dm
@@ -0,0 +1,300 @@
+import pickle
+import threading
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from plotly.io.json import to_json_plotly
+
+from core import cache
+from core.cache import (
+    CalculationCache,
+    EncodedFigure,
+    _estimate_size,
+    bypass_caches,
+    cached_calculation,
+    cached_figure,
+    figure_response,
+    make_filters_key,
+)
+from core.executor import ChartExecutor
+from core.warmup import warm_up_tabs
+from tabs.sales.charts import SalesCharts
+
+
+class _Counter:
+    """compute для кэша, считающий свои вызовы"""
+
+    def __init__(self, value=None):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_lru_evicts_least_recently_used():
+    cache = CalculationCache(maxsize=2)
+    a, b, c = _Counter("a"), _Counter("b"), _Counter("c")
+
+    cache.get_or_compute("a", a)
+    cache.get_or_compute("b", b)
+    # "a" становится самым свежим - вытесняется "b"
+    assert cache.get_or_compute("a", a) == "a"
+    cache.get_or_compute("c", c)
+
+    assert cache.get_or_compute("a", a) == "a"
+    assert cache.get_or_compute("b", b) == "b"
+    assert (a.calls, b.calls, c.calls) == (1, 2, 1)
+    assert cache.stats()["entries"] == 2
+
+
+def test_evicts_by_size_and_skips_values_larger_than_limit():
+    value = pd.Series(range(100))
+    size = _estimate_size(value)
+    cache = CalculationCache(maxsize=10, max_bytes=size * 3 // 2)
+    cache.get_or_compute("a", lambda: value)
+    cache.get_or_compute("b", lambda: value)
+    assert cache.stats() == {"entries": 1, "bytes": size, "hits": 0, "misses": 2}
+
+    large = _Counter(pd.Series(range(200)))
+    cache.get_or_compute("large", large)
+    cache.get_or_compute("large", large)
+    assert large.calls == 2
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.mark.parametrize(
+    "left, right",
+    [
+        ({"regions": ["SPB", "Moscow"]}, {"regions": ["Moscow", "SPB", "Moscow"]}),
+        ({"regions": []}, {"regions": None}),
+        ({"regions": ("Kazan",)}, {"regions": {"Kazan"}}),
+        (
+            {"start_date": "2025-01-01", "end_date": "2025-02-01"},
+            {"end_date": "2025-02-01T00:00:00", "start_date": "2025-01-01 00:00"},
+        ),
+        ({"start_date": ""}, {"start_date": None}),
+    ],
+)
+def test_filters_key_is_canonical(left, right):
+    assert make_filters_key(left) == make_filters_key(right)
+    hash(make_filters_key(left))
+
+
+@pytest.mark.parametrize(
+    "left, right",
+    [
+        ({"regions": ["Moscow"]}, {"regions": ["SPB"]}),
+        ({"regions": ["Moscow"]}, {"segments": ["Moscow"]}),
+        ({"start_date": "2025-01-01"}, {"start_date": "2025-01-01 08:00"}),
+        ({"limit": 10}, {"limit": 20}),
+    ],
+)
+def test_filters_key_distinguishes_filters(left, right):
+    assert make_filters_key(left) != make_filters_key(right)
+
+
+class _Calculations:
+    def __init__(self, dm):
+        self.dm = dm
+        self.calls = 0
+
+    @cached_calculation
+    def total(self, regions=None, start_date=None):
+        self.calls += 1
+        return self.calls
+
+
+def _dm():
+    return SimpleNamespace(data_version=1, calculation_cache=CalculationCache())
+
+
+def test_cached_calculation_keys_on_arguments_and_data_version():
+    calculations = _Calculations(_dm())
+
+    assert calculations.total(["SPB", "Moscow"]) == 1
+    assert calculations.total(regions=["Moscow", "SPB"]) == 1
+    assert calculations.total() == 2
+    assert calculations.total(regions=[]) == 2
+
+    calculations.dm.data_version = 2
+    assert calculations.total(["SPB", "Moscow"]) == 3
+
+
+class _Charts:
+    def __init__(self, dm):
+        self.dm = dm
+        self.calls = 0
+
+    @cached_figure
+    def chart(self, regions=None):
+        self.calls += 1
+        return {"data": [{"type": "bar", "y": [self.calls]}], "layout": {}}
+
+
+def _response_json(figure):
+    """JSON вывода callback с графиком так, как его кодирует Dash"""
+    return to_json_plotly({"figure": figure})
+
+
+@pytest.mark.parametrize(
+    "method",
+    ["create_regions_chart", "create_suppliers_chart", "create_hourly_chart"],
+)
+def test_cached_figure_serializes_like_fresh_one(data_dir, load_data, method):
+    charts = SalesCharts(load_data(data_dir))
+    filters = {"regions": ["Moscow", "SPB"], "start_date": "2025-03-01"}
+
+    charts_method = getattr(charts, method)
+    charts_method(**filters)
+    cached = charts_method(**filters)
+    fresh = getattr(SalesCharts, method).__wrapped__(charts, **filters)
+
+    assert charts.dm.figure_cache.stats()["hits"] == 1
+    assert _response_json(cached) == _response_json(fresh)
+
+
+def test_cached_figure_keys_on_filters_and_data_version():
+    charts = _Charts(SimpleNamespace(data_version=1, figure_cache=CalculationCache()))
+
+    first = _response_json(charts.chart(["SPB", "Moscow"]))
+    assert _response_json(charts.chart(regions=["Moscow", "SPB"])) == first
+    assert charts.calls == 1
+    charts.chart(["Kazan"])
+    assert charts.calls == 2
+
+    charts.dm.data_version = 2
+    assert _response_json(charts.chart(["SPB", "Moscow"])) != first
+    assert charts.calls == 3
+
+
+# Аргументы графиков вкладки продаж в update_charts без выбранных фильтров
+UNFILTERED_ARGS = (None, None, [], [], [], [], [])
+
+
+@pytest.fixture
+def warm_charts(data_dir, load_data):
+    charts = SalesCharts(load_data(data_dir))
+    warm_up_tabs([SimpleNamespace(charts=charts)])
+    return charts
+
+
+def test_pool_process_hits_warm_up_entries(warm_charts, monkeypatch):
+    warm = _response_json(warm_charts.create_regions_chart(*UNFILTERED_ARGS))
+    before = warm_charts.dm.figure_cache.stats()
+    # Так работает процесс пула графиков (initializer ChartExecutor)
+    monkeypatch.setattr(cache, "_fragments_enabled", False)
+
+    figure = warm_charts.create_regions_chart(*UNFILTERED_ARGS)
+
+    after = warm_charts.dm.figure_cache.stats()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+    assert isinstance(figure, EncodedFigure)
+    response = figure_response(pickle.loads(pickle.dumps(figure)))
+    assert _response_json(response) == warm
+
+
+def test_process_executor_serves_warm_up_entries(warm_charts):
+    executor = ChartExecutor("process", max_workers=1, timeout=30)
+    executor.register("test-regions", warm_charts.create_regions_chart)
+    executor.register("test-stats", warm_charts.dm.figure_cache.stats)
+    executor.start()
+    try:
+        if executor.kind != "process":
+            pytest.skip("пул процессов не запустился: в процессе есть потоки")
+        figure, stats = executor.run(
+            [("test-regions", UNFILTERED_ARGS), ("test-stats", ())]
+        )
+    finally:
+        executor.shutdown()
+
+    # Единственный процесс пула нашел график в кэше, прогретом до fork
+    assert stats["hits"] == warm_charts.dm.figure_cache.stats()["hits"] + 1
+    assert stats["misses"] == warm_charts.dm.figure_cache.stats()["misses"]
+    assert _response_json(figure) == _response_json(
+        warm_charts.create_regions_chart(*UNFILTERED_ARGS)
+    )
+
+
+def test_concurrent_misses_compute_once():
+    cache = CalculationCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(threading.get_ident())
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+    owner = threading.Thread(
+        target=lambda: results.append(cache.get_or_compute("k", compute))
+    )
+    owner.start()
+    assert started.wait(5)
+    waiters = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_compute("k", compute))
+        )
+        for _ in range(3)
+    ]
+    for thread in waiters:
+        thread.start()
+    release.set()
+    for thread in [owner, *waiters]:
+        thread.join(5)
+
+    assert results == ["value"] * 4
+    assert len(calls) == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_waiter_computes_itself_when_owner_fails():
+    cache = CalculationCache()
+    started, release = threading.Event(), threading.Event()
+    errors, results = [], []
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    def run_owner():
+        try:
+            cache.get_or_compute("k", failing)
+        except ValueError as e:
+            errors.append(e)
+
+    owner = threading.Thread(target=run_owner)
+    owner.start()
+    assert started.wait(5)
+    waiter = threading.Thread(
+        target=lambda: results.append(cache.get_or_compute("k", lambda: "retry"))
+    )
+    waiter.start()
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert len(errors) == 1
+    assert results == ["retry"]
+    # Результат ожидавшего потока не сохраняется - следующий вызов считает снова
+    assert cache.get_or_compute("k", lambda: "next") == "next"
+
+
+def test_bypass_caches_neither_reads_nor_stores():
+    cache = CalculationCache()
+    cache.get_or_compute("k", lambda: "cached")
+    compute = _Counter("fresh")
+
+    with bypass_caches():
+        assert cache.get_or_compute("k", compute) == "fresh"
+        assert cache.get_or_compute("other", compute) == "fresh"
+
+    assert compute.calls == 2
+    assert cache.get_or_compute("k", compute) == "cached"
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from core.executor import ChartExecutor
+
+TIMEOUT_TITLE = "Превышено время построения графика"
+
+
+@pytest.fixture
+def executor():
+    executor = ChartExecutor("thread", max_workers=2, timeout=0.5)
+    executor.register("test-ok", lambda value: {"data": [value], "layout": {}})
+    executor.register("test-error", lambda: 1 / 0)
+    executor.register("test-slow", lambda event: event.wait(5) and {})
+    yield executor
+    executor.shutdown()
+
+
+def _title(figure):
+    return figure["layout"].get("title")
+
+
+@pytest.mark.parametrize("kind", ["thread", "serial"])
+def test_failed_chart_does_not_break_others(executor, kind):
+    executor.kind = kind
+
+    first, failed, last = executor.run(
+        [("test-ok", (1,)), ("test-error", ()), ("test-ok", (2,))]
+    )
+
+    assert first == {"data": [1], "layout": {}}
+    assert _title(failed).startswith("Ошибка при загрузке данных")
+    assert "division by zero" in _title(failed)
+    assert last == {"data": [2], "layout": {}}
+
+
+def test_slow_chart_does_not_block_others(executor):
+    release = threading.Event()
+    try:
+        started = time.monotonic()
+        slow, fast = executor.run([("test-slow", (release,)), ("test-ok", (1,))])
+        elapsed = time.monotonic() - started
+
+        assert _title(slow) == TIMEOUT_TITLE
+        assert fast == {"data": [1], "layout": {}}
+        assert elapsed < 2
+    finally:
+        release.set()
+
+
+def test_timed_out_charts_do_not_hold_pool(executor):
+    release = threading.Event()
+    try:
+        # Оба потока пула заняты графиками, которые не уложатся в timeout
+        results = executor.run([("test-slow", (release,)), ("test-slow", (release,))])
+        assert [_title(figure) for figure in results] == [TIMEOUT_TITLE] * 2
+
+        started = time.monotonic()
+        results = executor.run([("test-ok", (1,)), ("test-ok", (2,))])
+
+        assert results == [{"data": [1], "layout": {}}, {"data": [2], "layout": {}}]
+        assert time.monotonic() - started < 0.4
+    finally:
+        release.set()
+
+
+def test_abandoned_charts_do_not_multiply_threads(executor):
+    release = threading.Event()
+    before = set(threading.enumerate())
+    try:
+        for _ in range(3):
+            results = executor.run([("test-slow", (release,))] * 2)
+            assert [_title(figure) for figure in results] == [TIMEOUT_TITLE] * 2
+        started = set(threading.enumerate()) - before
+    finally:
+        release.set()
+
+    # Пул заменяется, пока брошенных задач не больше max_workers; дальше
+    # новые задачи ждут в очереди и снимаются по таймауту
+    assert len(started) == 2 * executor.max_workers
+
+
+def test_queued_chart_is_skipped_after_timeout(executor):
+    release = threading.Event()
+    calls = []
+    executor.register("test-record", lambda: calls.append(1) or {})
+    try:
+        results = executor.run(
+            [
+                ("test-slow", (release,)),
+                ("test-slow", (release,)),
+                ("test-record", ()),
+            ]
+        )
+        assert _title(results[2]) == TIMEOUT_TITLE
+    finally:
+        release.set()
+    time.sleep(0.2)
+    assert calls == []
+
+
+def test_process_pool_falls_back_to_threads_when_not_started():
+    executor = ChartExecutor("process", max_workers=2, timeout=5)
+    executor.register("test-ok", lambda value: {"data": [value], "layout": {}})
+    try:
+        results = executor.run([("test-ok", (1,)), ("test-ok", (2,))])
+    finally:
+        executor.shutdown()
+
+    assert executor.kind == "thread"
+    assert results == [{"data": [1], "layout": {}}, {"data": [2], "layout": {}}]
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.data_manager import SALES_DIMENSIONS
+from core.filter_index import FilterIndex
+
+SCENARIOS = [
+    ({}, None, None),
+    ({"region": ["Moscow"]}, None, None),
+    ({"region": ["Moscow", "Kazan"], "segment": ["loyal", "new"]}, None, None),
+    ({"category": ["Food"], "payment_method": ["card", "sbp"]}, None, None),
+    ({"region": ["Unknown"]}, None, None),
+    ({"region": [], "segment": None}, "2025-03-01", "2025-06-30"),
+    ({"supplier_name": ["Supplier_1", "Supplier_2"]}, "2025-02-10 08:00", "2025-09-30"),
+    ({"region": ["SPB"], "category": ["Clothes", "Home"]}, "2025-11-01", "2025-11-30"),
+    ({}, "2026-01-01", "2026-12-31"),
+]
+
+
+def _expected(df, filters, start_date, end_date):
+    """Та же выборка обычными масками pandas"""
+    mask = pd.Series(True, index=df.index)
+    for dimension, values in filters.items():
+        if values:
+            mask &= df[dimension].isin(values)
+    if start_date and end_date:
+        dates = df["transaction_date"]
+        mask &= (dates >= pd.to_datetime(start_date)) & (
+            dates <= pd.to_datetime(end_date)
+        )
+    return df[mask]
+
+
+@pytest.mark.parametrize("filters, start_date, end_date", SCENARIOS)
+def test_select_matches_pandas_masks(data_manager, filters, start_date, end_date):
+    df = data_manager.df_sales_fact
+    index = FilterIndex(df, SALES_DIMENSIONS, "transaction_date")
+
+    result = index.select(filters, start_date, end_date)
+
+    pd.testing.assert_frame_equal(result, _expected(df, filters, start_date, end_date))
+
+
+@pytest.mark.parametrize("filters, start_date, end_date", SCENARIOS)
+def test_select_on_unsorted_table(data_manager, filters, start_date, end_date):
+    df = data_manager.df_sales_fact.sample(frac=1, random_state=3)
+    df = df.reset_index(drop=True)
+    index = FilterIndex(df, SALES_DIMENSIONS, "transaction_date")
+
+    result = index.select(filters, start_date, end_date)
+
+    pd.testing.assert_frame_equal(result, _expected(df, filters, start_date, end_date))
+
+
+def test_missing_values_match_no_filter_value():
+    df = pd.DataFrame(
+        {
+            "region": pd.Categorical(["Moscow", None, "SPB", None, "Moscow"]),
+            "device": ["mobile", "desktop", None, "mobile", "mobile"],
+        }
+    )
+    index = FilterIndex(df, ["region", "device"])
+
+    for filters in [
+        {"region": ["Moscow", "SPB"]},
+        {"device": ["mobile"]},
+        {"region": ["Moscow"], "device": ["mobile", "desktop"]},
+    ]:
+        pd.testing.assert_frame_equal(
+            index.select(filters), _expected(df, filters, None, None)
+        )
+
+
+@pytest.mark.parametrize("start", [0, 1, 7, 8, 9, 1000, 2599])
+def test_appended_index_matches_rebuilt(data_manager, start):
+    df = data_manager.df_sales_fact
+    old = FilterIndex(df.iloc[:start], SALES_DIMENSIONS, "transaction_date")
+    appended = old.appended(df, start)
+    rebuilt = FilterIndex(df, SALES_DIMENSIONS, "transaction_date")
+
+    assert appended._sorted == rebuilt._sorted
+    for filters, start_date, end_date in SCENARIOS:
+        pd.testing.assert_frame_equal(
+            appended.select(filters, start_date, end_date),
+            rebuilt.select(filters, start_date, end_date),
+        )
+    # Прежний индекс не изменился
+    assert old.size == start
+    assert len(old.select({"region": ["Moscow"]})) == np.count_nonzero(
+        df["region"].iloc[:start] == "Moscow"
+    )
@@ -0,0 +1,178 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.data_manager import SHARED_TABLES
+from core.ingest import (
+    append_rows,
+    appended_range,
+    complete_offset,
+    read_csv_range,
+    source_state,
+)
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_bytes(b"id,name\n1,a\n2,b\n3,c\n")
+    return str(path)
+
+
+def test_complete_offset_stops_at_last_full_line(csv_file):
+    size = os.path.getsize(csv_file)
+    with open(csv_file, "ab") as f:
+        f.write(b"4,d")
+
+    assert complete_offset(csv_file, os.path.getsize(csv_file)) == size
+    assert complete_offset(csv_file, 3) == 0
+
+
+def test_read_csv_range_keeps_header(csv_file):
+    start = len(b"id,name\n1,a\n")
+    end = os.path.getsize(csv_file)
+
+    result = read_csv_range(csv_file, start, end)
+
+    pd.testing.assert_frame_equal(
+        result, pd.DataFrame({"id": [2, 3], "name": ["b", "c"]})
+    )
+
+
+def test_appended_range_of_appended_file(csv_file):
+    offset = os.path.getsize(csv_file)
+    state = source_state(csv_file, offset, 3)
+    with open(csv_file, "ab") as f:
+        f.write(b"4,d\n5,")
+
+    start, end = appended_range(state)
+
+    assert (start, end) == (offset, offset + 4)
+    pd.testing.assert_frame_equal(
+        read_csv_range(csv_file, start, end), pd.DataFrame({"id": [4], "name": ["d"]})
+    )
+
+
+@pytest.mark.parametrize(
+    "content", [b"id,name\n1,a\n2,X\n3,c\n4,d\n", b"id,name\n1,a\n", b""]
+)
+def test_appended_range_of_rewritten_file(csv_file, content):
+    state = source_state(csv_file, os.path.getsize(csv_file), 3)
+    with open(csv_file, "wb") as f:
+        f.write(content)
+
+    assert appended_range(state) is None
+
+
+def test_append_rows_keeps_category_codes():
+    df = pd.DataFrame({"id": [1, 2], "region": pd.Categorical(["SPB", "Moscow"])})
+    rows = pd.DataFrame({"id": [3], "region": pd.Categorical(["Kazan"])})
+
+    result = append_rows(df, rows)
+
+    assert list(result["region"]) == ["SPB", "Moscow", "Kazan"]
+    assert list(result["region"].cat.categories[:2]) == list(
+        df["region"].cat.categories
+    )
+
+
+def _append_csv(path, rows, partial=b""):
+    """Дописывает в CSV строки rows, после них - недописанную строку partial"""
+    with open(path, "a", newline="") as f:
+        rows.to_csv(f, header=False, index=False)
+    with open(path, "ab") as f:
+        f.write(partial)
+
+
+def _later_rows(path, date_column, count, days):
+    """Строки файла с новыми id и временем позже последней строки"""
+    df = pd.read_csv(path, parse_dates=[date_column])
+    rows = df.sample(count, random_state=1).copy()
+    id_column = df.columns[0]
+    rows[id_column] = np.arange(count) + df[id_column].max() + 1
+    rows[date_column] = df[date_column].max() + pd.to_timedelta(
+        np.arange(count) + days * 24, unit="h"
+    )
+    rows[date_column] = rows[date_column].dt.strftime("%Y-%m-%d %H:%M:%S")
+    return rows
+
+
+def _assert_same_tables(actual, expected):
+    for name in SHARED_TABLES:
+        pd.testing.assert_frame_equal(
+            getattr(actual, f"df_{name}"),
+            getattr(expected, f"df_{name}"),
+            check_categorical=False,
+            obj=name,
+        )
+
+
+def test_reload_reads_only_appended_rows(data_copy, load_data):
+    dm = load_data(data_copy)
+    sales_path = os.path.join(data_copy, "sales.csv")
+    traffic_path = os.path.join(data_copy, "traffic.csv")
+    _append_csv(
+        sales_path,
+        _later_rows(sales_path, "transaction_date", 50, 1),
+        partial=b"999999,1,",
+    )
+    _append_csv(traffic_path, _later_rows(traffic_path, "session_start", 40, 1))
+
+    changed = dm.changed_tables()
+    new = dm.reloaded(list(changed))
+
+    assert set(changed) == {"sales", "traffic"}
+    assert new.ingest_state["sales"][0]["offset"] < os.path.getsize(sales_path)
+    # Недописанная строка не прочитана: после ее удаления полная загрузка
+    # дает те же таблицы
+    with open(sales_path, "rb+") as f:
+        data = f.read()
+        f.truncate(data.rfind(b"\n") + 1)
+    fresh = load_data(data_copy)
+    _assert_same_tables(new, fresh)
+    assert new.df_sales_fact is not dm.df_sales_fact
+    assert len(new.df_sales_fact) == len(dm.df_sales_fact) + 50
+
+
+def test_reload_finishes_partial_line(data_copy, load_data):
+    dm = load_data(data_copy)
+    sales_path = os.path.join(data_copy, "sales.csv")
+    rows = _later_rows(sales_path, "transaction_date", 2, 1)
+    line = rows.iloc[:1].to_csv(header=False, index=False).encode()
+    _append_csv(sales_path, rows.iloc[:0], partial=line[:5])
+
+    first = dm.reloaded(list(dm.changed_tables()))
+    with open(sales_path, "ab") as f:
+        f.write(line[5:])
+    second = first.reloaded(list(first.changed_tables()))
+
+    assert len(first.df_sales) == len(dm.df_sales)
+    assert len(second.df_sales) == len(dm.df_sales) + 1
+    _assert_same_tables(second, load_data(data_copy))
+
+
+def test_reload_rereads_rewritten_file(data_copy, load_data):
+    dm = load_data(data_copy)
+    sales_path = os.path.join(data_copy, "sales.csv")
+    sales = pd.read_csv(sales_path)
+    sales["quantity"] = sales["quantity"] + 1
+    sales.to_csv(sales_path, index=False)
+
+    new = dm.reloaded(list(dm.changed_tables()))
+
+    _assert_same_tables(new, load_data(data_copy))
+    assert new.df_sales["quantity"].sum() == dm.df_sales["quantity"].sum() + len(sales)
+
+
+def test_reload_rereads_rows_earlier_than_loaded(data_copy, load_data):
+    dm = load_data(data_copy)
+    sales_path = os.path.join(data_copy, "sales.csv")
+    rows = _later_rows(sales_path, "transaction_date", 20, -200)
+    _append_csv(sales_path, rows)
+
+    new = dm.reloaded(list(dm.changed_tables()))
+
+    _assert_same_tables(new, load_data(data_copy))
+    assert new.df_sales["transaction_date"].is_monotonic_increasing
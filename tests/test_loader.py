@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+
+import pytest
+
+from core.data_manager import FACT_SOURCES, DataManager
+from core.loader import LoadError, run_tasks
+
+
+def test_task_starts_after_its_dependencies():
+    finished = []
+    lock = threading.Lock()
+
+    def task(name, delay=0.0):
+        def run():
+            time.sleep(delay)
+            with lock:
+                finished.append(name)
+            return name
+
+        return run
+
+    def joined():
+        # К запуску обе зависимости уже завершены
+        return sorted(finished)
+
+    results, timings = run_tasks(
+        {
+            "joined": (joined, ["slow", "fast"]),
+            "slow": (task("slow", 0.1), ()),
+            "fast": (task("fast"), ()),
+        },
+        max_workers=3,
+    )
+
+    assert results == {"slow": "slow", "fast": "fast", "joined": ["fast", "slow"]}
+    assert finished == ["fast", "slow"]
+    assert set(timings) == {"slow", "fast", "joined"}
+
+
+def test_independent_tasks_run_concurrently():
+    barrier = threading.Barrier(2, timeout=2)
+
+    # С одним потоком barrier.wait не дождался бы второй задачи
+    results, _ = run_tasks(
+        {"a": (barrier.wait, ()), "b": (barrier.wait, ())}, max_workers=2
+    )
+
+    assert sorted(results.values()) == [0, 1]
+
+
+def test_failed_task_skips_dependents_but_not_others():
+    calls = []
+
+    def broken():
+        raise ValueError("bad csv")
+
+    with pytest.raises(LoadError) as error:
+        run_tasks(
+            {
+                "broken": (broken, ()),
+                "dependent": (lambda: calls.append("dependent"), ["broken"]),
+                "chained": (lambda: calls.append("chained"), ["dependent"]),
+                "other": (lambda: calls.append("other"), ()),
+            },
+            max_workers=2,
+        )
+
+    assert list(error.value.errors) == ["broken"]
+    assert isinstance(error.value.errors["broken"], ValueError)
+    assert sorted(error.value.skipped) == ["chained", "dependent"]
+    assert calls == ["other"]
+    assert "broken: bad csv" in str(error.value)
+
+
+def test_unknown_dependency_is_reported():
+    with pytest.raises(LoadError) as error:
+        run_tasks({"orphan": (lambda: 1, ["missing"])}, max_workers=1)
+
+    assert error.value.errors == {}
+    assert error.value.skipped == ["orphan"]
+
+
+def test_missing_file_reports_table_and_dependent_facts(data_copy):
+    os.remove(os.path.join(data_copy, "products.csv"))
+    dm = DataManager(data_copy, use_cache=False)
+
+    with pytest.raises(LoadError) as error:
+        dm._load_tables()
+
+    assert list(error.value.errors) == ["products"]
+    assert sorted(error.value.skipped) == sorted(
+        fact for fact, sources in FACT_SOURCES.items() if "products" in sources
+    )
+    # Независимые таблицы загружены
+    assert dm.df_sales is not None and dm.df_traffic is not None
+    assert dm.load_data() is False
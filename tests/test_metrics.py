@@ -0,0 +1,135 @@
+import os
+import re
+
+import pytest
+from dash import Dash, Input, Output, dcc, html
+
+from core.instrumentation import CallbackInstrumentation
+from core.metrics import CONTENT_TYPE, install_metrics, render_metrics
+from core.reloader import DataReloader, LiveData
+
+NAME = r"[a-zA-Z_:][a-zA-Z0-9_:]*"
+LABEL = r'[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\[\\"n])*"'
+VALUE = r"[-+]?(?:[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?|Inf|NaN)"
+SAMPLE = re.compile(rf"^({NAME})(?:\{{({LABEL}(?:,{LABEL})*)\}})? ({VALUE})$")
+SUFFIXES = {"histogram": ("_bucket", "_sum", "_count")}
+
+
+def _parse(text):
+    """
+    Разбор текстового формата Prometheus: метрика -> (тип, образцы), образец -
+    (имя с суффиксом, метки, значение). Проверяет, что образцы каждой метрики
+    идут одной группой сразу после ее HELP и TYPE
+    """
+    families, current = {}, None
+    lines = text.split("\n")
+    assert lines[-1] == ""
+    for line in lines[:-1]:
+        if line.startswith("# HELP "):
+            name = line.split(" ")[2]
+            assert name not in families, f"повтор метрики {name}"
+            current = name
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name == current
+            families[name] = (kind, [])
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"строка не в формате Prometheus: {line!r}"
+        sample_name, label_text, value = match.groups()
+        kind, samples = families[current]
+        assert sample_name in [current + s for s in SUFFIXES.get(kind, ("",))]
+        labels = dict(
+            re.findall(
+                r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"', label_text or ""
+            )
+        )
+        samples.append((sample_name, labels, float(value)))
+    return families
+
+
+@pytest.fixture
+def instrumentation():
+    return CallbackInstrumentation()
+
+
+@pytest.fixture
+def app(data_manager, instrumentation):
+    app = Dash(__name__)
+    instrumentation.install(app)
+    app.layout = html.Div([dcc.Input(id="value"), html.Div(id="echo")])
+
+    @app.callback(Output("echo", "children"), Input("value", "value"))
+    def echo(value):
+        if value == "fail":
+            raise ValueError("boom")
+        return value
+
+    return app
+
+
+def _call(client, value):
+    return client.post(
+        "/_dash-update-component",
+        json={
+            "output": "echo.children",
+            "outputs": {"id": "echo", "property": "children"},
+            "inputs": [{"id": "value", "property": "value", "value": value}],
+            "changedPropIds": ["value.value"],
+        },
+    )
+
+
+def test_render_metrics_format(app, data_manager, instrumentation):
+    client = app.server.test_client()
+    assert _call(client, "a").status_code == 200
+    _call(client, "fail")
+    live_data = LiveData(data_manager)
+
+    families = _parse(
+        render_metrics(live_data, DataReloader(live_data), instrumentation)
+    )
+
+    for name, (kind, samples) in families.items():
+        assert kind in ("counter", "gauge", "histogram")
+        assert samples, f"метрика {name} без образцов"
+        for _, labels, _ in samples:
+            assert labels["pid"] == str(os.getpid())
+
+    callback = next(
+        labels["callback"]
+        for _, labels, _ in families["dashboard_callback_requests_total"][1]
+    )
+    assert callback.endswith("echo")
+    samples = {
+        (name, labels.get("callback"), labels.get("le")): value
+        for name, labels, value in families["dashboard_callback_duration_seconds"][1]
+    }
+    buckets = [value for (name, _, _), value in samples.items() if "_bucket" in name]
+    assert buckets == sorted(buckets)
+    count = samples[("dashboard_callback_duration_seconds_count", callback, None)]
+    assert count == 2
+    assert (
+        samples[("dashboard_callback_duration_seconds_bucket", callback, "+Inf")]
+        == count
+    )
+    errors = families["dashboard_callback_errors_total"][1]
+    assert [value for _, _, value in errors] == [1]
+
+
+def test_metrics_endpoint(app, data_manager):
+    install_metrics(app.server, LiveData(data_manager))
+
+    response = app.server.test_client().get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type == CONTENT_TYPE
+    families = _parse(response.get_data(as_text=True))
+    _, samples = families["dashboard_process_info"]
+    assert samples == [("dashboard_process_info", {"pid": str(os.getpid())}, 1.0)]
+    rows = {
+        labels["table"]: value
+        for _, labels, value in families["dashboard_table_rows"][1]
+    }
+    assert rows["sales_fact"] == len(data_manager.df_sales_fact)
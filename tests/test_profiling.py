@@ -0,0 +1,126 @@
+import json
+import os
+
+import pytest
+from dash import Dash, Input, Output, dcc, html
+
+from core import cache
+from core.profiling import HEADER, CallbackProfiler
+
+TOKEN = "secret"
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    return CallbackProfiler(token=TOKEN, output_dir=str(tmp_path / "profiles"))
+
+
+@pytest.fixture
+def calls():
+    """Значение bypass кэшей при каждом вызове callback"""
+    return []
+
+
+@pytest.fixture
+def client(profiler, calls):
+    app = Dash(__name__)
+    profiler.install(app)
+    app.layout = html.Div([dcc.Input(id="value"), html.Div(id="echo")])
+
+    @app.callback(Output("echo", "children"), Input("value", "value"))
+    def echo(value):
+        calls.append(cache._bypass.get())
+        if value == "fail":
+            raise ValueError("boom")
+        return value
+
+    return app.server.test_client()
+
+
+def _call(client, value, headers=None, query=""):
+    return client.post(
+        f"/_dash-update-component{query}",
+        json={
+            "output": "echo.children",
+            "outputs": {"id": "echo", "property": "children"},
+            "inputs": [{"id": "value", "property": "value", "value": value}],
+            "changedPropIds": ["value.value"],
+        },
+        headers=headers or {},
+    )
+
+
+def _profiles(profiler):
+    if not os.path.isdir(profiler.output_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(profiler.output_dir) if name.endswith(".prof")
+    )
+
+
+def test_header_profiles_call_without_caches(client, profiler, calls):
+    response = _call(client, "Moscow", headers={HEADER: TOKEN})
+
+    assert response.status_code == 200
+    saved = response.headers["X-Dashboard-Profile-File"]
+    assert _profiles(profiler) == [saved]
+    with open(
+        os.path.join(profiler.output_dir, saved.replace(".prof", ".json")),
+        encoding="utf-8",
+    ) as f:
+        details = json.load(f)
+    assert details["callback"].endswith(".echo")
+    assert details["status"] == 200
+    assert details["inputs"][0]["value"] == "Moscow"
+    assert details["top"]
+
+    # После вызова кэши снова работают, а профилировщик свободен
+    _call(client, "SPB")
+    assert calls == [True, False]
+    assert "X-Dashboard-Profile-File" in _call(client, "SPB", {HEADER: TOKEN}).headers
+
+
+def test_failed_call_finishes_profile(client, profiler, calls):
+    response = _call(client, "fail", headers={HEADER: TOKEN})
+
+    assert response.status_code == 500
+    assert len(_profiles(profiler)) == 1
+    assert "X-Dashboard-Profile-File" in _call(client, "SPB", {HEADER: TOKEN}).headers
+    assert calls == [True, True]
+
+
+def test_wrong_token_is_not_profiled(client, profiler, calls):
+    response = _call(client, "Moscow", headers={HEADER: "wrong"})
+
+    assert response.status_code == 200
+    assert "X-Dashboard-Profile-File" not in response.headers
+    assert _profiles(profiler) == []
+    assert calls == [False]
+
+
+@pytest.mark.parametrize("query", [f"?token={TOKEN}", f"?{HEADER}={TOKEN}"])
+def test_token_in_query_string_is_rejected(client, profiler, calls, query):
+    assert client.get(f"/_profiling{query}").status_code == 403
+    assert client.post(f"/_profiling{query}", json={"seconds": 60}).status_code == 403
+
+    response = _call(client, "Moscow", query=query)
+
+    assert "X-Dashboard-Profile-File" not in response.headers
+    assert _profiles(profiler) == []
+
+
+def test_toggle_profiles_matching_callbacks(client, profiler):
+    headers = {HEADER: TOKEN}
+    state = client.post(
+        "/_profiling", json={"callback": "", "seconds": 60}, headers=headers
+    ).get_json()
+    assert state["toggle"]["callback"] == ""
+
+    profiled = _call(client, "Moscow")
+    client.delete("/_profiling", headers=headers)
+    plain = _call(client, "SPB")
+
+    assert "X-Dashboard-Profile-File" in profiled.headers
+    assert "X-Dashboard-Profile-File" not in plain.headers
+    state = client.get("/_profiling", headers=headers).get_json()
+    assert state == {"toggle": None, "profiles": _profiles(profiler)}
@@ -0,0 +1,116 @@
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from core.data_manager import DataManager
+from core.reloader import DataReloader, LiveData
+from tabs.sales.charts import SalesCharts
+
+
+def _append_sales(data_dir, rows=5):
+    """Дописывает в sales.csv копии последних строк с новыми id"""
+    path = os.path.join(data_dir, "sales.csv")
+    sales = pd.read_csv(path)
+    new = sales.tail(rows).assign(
+        transaction_id=lambda df: df["transaction_id"] + len(sales)
+    )
+    new.to_csv(path, mode="a", header=False, index=False)
+
+
+@pytest.fixture
+def live_data(data_copy, load_data):
+    return LiveData(load_data(data_copy))
+
+
+def test_pinned_snapshot_survives_swap(data_dir, load_data):
+    old, new = load_data(data_dir), load_data(data_dir)
+    live_data = LiveData(old)
+
+    token = live_data.pin()
+    live_data.swap(new)
+
+    assert live_data.snapshot is old
+    assert live_data.df_sales is old.df_sales
+    assert live_data.current is new
+    live_data.unpin(token)
+    assert live_data.snapshot is new
+    assert live_data.df_sales is new.df_sales
+
+
+def test_check_swaps_snapshot_when_files_change(live_data, data_copy):
+    old = live_data.current
+    charts = SalesCharts(live_data)
+    reloader = DataReloader(live_data, [SimpleNamespace(charts=charts)])
+
+    assert reloader.check() is False
+    assert live_data.current is old
+
+    _append_sales(data_copy)
+    assert reloader.check() is True
+
+    new = live_data.current
+    assert new is not old
+    assert len(new.df_sales) == len(old.df_sales) + 5
+    assert new.changed_tables() == {}
+    # Кэши нового снимка прогреты до подмены, старый снимок не тронут
+    assert new.figure_cache.stats()["entries"] > 0
+    assert old.figure_cache.stats()["entries"] == 0
+    assert reloader.check() is False
+    assert reloader.reload_duration.count == 1
+
+
+def test_failed_reload_keeps_snapshot_until_files_change(
+    live_data, data_copy, monkeypatch
+):
+    old = live_data.current
+    reloader = DataReloader(live_data)
+
+    def reloaded(self, tables):
+        raise ValueError("broken file")
+
+    monkeypatch.setattr(DataManager, "reloaded", reloaded)
+    _append_sales(data_copy)
+
+    assert reloader.check() is False
+    assert reloader.check() is False
+    assert reloader.reload_failures == 1
+    assert live_data.current is old
+
+    monkeypatch.undo()
+    # Те же файлы повторно не перечитываются, измененные - перечитываются
+    assert reloader.check() is False
+    _append_sales(data_copy)
+    assert reloader.check() is True
+    assert len(live_data.current.df_sales) == len(old.df_sales) + 10
+    assert reloader.reload_failures == 1
+
+
+def test_multiple_workers_reload_only_through_shared_store(
+    data_dir, tmp_path, load_data
+):
+    plain = LiveData(load_data(data_dir))
+    shared = LiveData(load_data(data_dir, shared_dir=str(tmp_path / "shared")))
+
+    assert DataReloader(plain, interval=30, workers=1).interval == 30
+    assert DataReloader(plain, interval=30, workers=4).interval == 0
+    assert DataReloader(shared, interval=30, workers=4).interval == 30
+
+
+def test_workers_reload_once_and_share_published_version(
+    data_copy, tmp_path, load_data
+):
+    shared_dir = str(tmp_path / "shared")
+    first = LiveData(load_data(data_copy, shared_dir=shared_dir))
+    second = LiveData(load_data(data_copy, shared_dir=shared_dir))
+    old_version = first.current.shared_version
+    _append_sales(data_copy)
+
+    assert DataReloader(first, workers=2).check() is True
+    assert DataReloader(second, workers=2).check() is True
+
+    # Второй воркер отобразил версию, опубликованную первым, а не свою
+    assert first.current.shared_version == second.current.shared_version
+    assert first.current.shared_version != old_version
+    assert len(second.current.df_sales) == len(first.current.df_sales)
@@ -0,0 +1,128 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from core.data_manager import DataManager
+from tabs.sales.calculations import SalesCalculations
+
+FILTERS = [
+    {},
+    {"regions": ["Moscow"]},
+    {"categories": ["Electronics", "Home"]},
+    {"segments": ["loyal"], "payment_methods": ["card", "sbp"]},
+    {"suppliers": ["Supplier_3", "Supplier_7"]},
+    {"start_date": "2025-03-01", "end_date": "2025-06-30"},
+    {"start_date": "2025-02-01", "end_date": "2025-11-30", "regions": ["SPB"]},
+]
+
+
+@pytest.fixture(scope="module")
+def returns_dir(data_dir, tmp_path_factory):
+    """
+    Синтетические CSV, где у части транзакций несколько товаров (строки с
+    общими датой и способом оплаты), а часть возвратов не находит продажу
+    """
+    path = tmp_path_factory.mktemp("returns") / "data"
+    shutil.copytree(data_dir, path, ignore=shutil.ignore_patterns(".cache"))
+
+    sales_path = os.path.join(path, "sales.csv")
+    sales = pd.read_csv(sales_path)
+    # Каждая третья строка - еще один товар предыдущей транзакции
+    joined = sales.index[sales.index % 3 == 2]
+    for column in ["transaction_id", "transaction_date", "payment_method"]:
+        sales.loc[joined, column] = sales.loc[joined - 1, column].to_numpy()
+    sales.to_csv(sales_path, index=False)
+
+    returns_path = os.path.join(path, "returns.csv")
+    returns = pd.read_csv(returns_path, index_col=0)
+    # Возвраты другого товара той же транзакции и возвраты без продажи; к
+    # тому же возвраты строк из joined ссылаются на исчезнувшие транзакции
+    other_item = returns.sample(30, random_state=3).assign(
+        product_id=lambda df: df["product_id"] % 100 + 1
+    )
+    unmatched = returns.sample(20, random_state=4).assign(
+        transaction_id=lambda df: df["transaction_id"] + 100000
+    )
+    extra = pd.concat([other_item, unmatched], ignore_index=True)
+    extra["return_id"] = range(len(returns) + 1, len(returns) + len(extra) + 1)
+    pd.concat([returns, extra], ignore_index=True).to_csv(returns_path, index=True)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def calculations(returns_dir):
+    dm = DataManager(returns_dir, use_cache=False)
+    assert dm.load_data()
+    return SalesCalculations(dm)
+
+
+def _baseline_returns(dm, filters):
+    """Возвраты под фильтрами так, как их считал исходный расчет через merge"""
+    df = dm.df_returns.merge(
+        dm.df_sales[["transaction_id", "transaction_date", "payment_method"]],
+        on="transaction_id",
+        how="left",
+    )
+    df = df.merge(
+        dm.df_products[["product_id", "category", "supplier_id"]],
+        on="product_id",
+        how="left",
+    )
+    df = df.merge(
+        dm.df_suppliers[["supplier_id", "supplier_name"]],
+        on="supplier_id",
+        how="left",
+    )
+    df = df.merge(
+        dm.df_user_segments[["customer_id", "region", "segment"]],
+        on="customer_id",
+        how="left",
+    )
+
+    if filters.get("start_date") and filters.get("end_date"):
+        df = df[
+            (df["transaction_date"] >= pd.to_datetime(filters["start_date"]))
+            & (df["transaction_date"] <= pd.to_datetime(filters["end_date"]))
+        ]
+    for key, column in [
+        ("regions", "region"),
+        ("categories", "category"),
+        ("segments", "segment"),
+        ("payment_methods", "payment_method"),
+        ("suppliers", "supplier_name"),
+    ]:
+        if filters.get(key):
+            df = df[df[column].isin(filters[key])]
+    return df
+
+
+def test_data_has_unmatched_returns_and_multi_item_orders(calculations):
+    dm = calculations.dm
+
+    matched = dm.df_returns["transaction_id"].isin(dm.df_sales["transaction_id"])
+
+    assert (~matched).sum() > 20
+    assert dm.df_sales["transaction_id"].duplicated().any()
+    assert len(dm.df_returns_fact) == len(dm.df_returns)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_returns_match_baseline(calculations, filters):
+    expected = _baseline_returns(calculations.dm, filters)
+
+    returns = calculations.get_filtered_returns_data(**filters)
+
+    assert sorted(returns["return_id"]) == sorted(expected["return_id"].unique())
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_return_rate_matches_baseline(calculations, filters):
+    expected_returns = _baseline_returns(calculations.dm, filters)
+    orders = calculations.calculate_orders_count(**filters)
+
+    rate = calculations.calculate_return_rate(**filters)
+
+    assert orders > 0
+    assert rate == round(expected_returns["return_id"].nunique() / orders * 100, 2)
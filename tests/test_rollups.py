@@ -0,0 +1,268 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.cube import AggregateCube
+from core.data_manager import SALES_DIMENSIONS
+from core.rollups import DailyRollup, day_bounds
+
+MEASURES = ["revenue", "quantity"]
+
+DATE_RANGES = [
+    (None, None),
+    ("2025-03-01", "2025-06-30"),
+    ("2025-03-01", "2025-06-30 23:59:59.999999999"),
+    ("2025-06-30", "2025-06-30"),
+    ("2024-06-01", "2025-01-15"),
+    ("2025-12-20", "2026-03-01"),
+    ("2026-01-01", "2026-12-31"),
+    ("2025-05-10", "2025-05-01"),
+]
+
+FILTERS = [
+    {},
+    {"region": ["Moscow"]},
+    {"segment": ["loyal", "new", "loyal"]},
+    {"payment_method": ["card", "all"]},
+    {"category": []},
+]
+
+
+@pytest.fixture(scope="module")
+def sales(data_manager):
+    """
+    Продажи с дополнительными строками ровно в полночь: они попадают в
+    последний день фильтра, только если конец фильтра - полночь
+    """
+    df = data_manager.df_sales_fact
+    midnight = df.sample(300, random_state=5)
+    midnight = midnight.assign(
+        transaction_date=midnight["transaction_date"].dt.normalize()
+    )
+    combined = pd.concat([df, midnight], ignore_index=True)
+    return combined.sort_values("transaction_date", kind="stable", ignore_index=True)
+
+
+def _selected(df, filters, start_date, end_date):
+    mask = pd.Series(True, index=df.index)
+    for dimension, values in filters.items():
+        if values:
+            mask &= df[dimension].isin(values)
+    if start_date and end_date:
+        dates = df["transaction_date"]
+        mask &= (dates >= pd.to_datetime(start_date)) & (
+            dates <= pd.to_datetime(end_date)
+        )
+    return df[mask]
+
+
+def _expected_totals(df, filters, start_date, end_date):
+    selected = _selected(df, filters, start_date, end_date)
+    return {
+        "revenue": selected["revenue"].sum(),
+        "quantity": selected["quantity"].sum(),
+        "rows": len(selected),
+    }
+
+
+def _assert_totals(result, expected):
+    assert result["revenue"] == pytest.approx(expected["revenue"], rel=1e-9, abs=1e-6)
+    assert result["quantity"] == expected["quantity"]
+    assert result["rows"] == expected["rows"]
+
+
+def test_day_bounds():
+    assert day_bounds("2025-03-01", "2025-03-31") == (
+        np.datetime64("2025-03-01"),
+        np.datetime64("2025-03-31"),
+        False,
+    )
+    assert day_bounds("2025-03-01", "2025-03-31 23:59:59.999999999")[2] is True
+    assert day_bounds("2025-03-01 08:00", "2025-03-31") is None
+    assert day_bounds("2025-03-01", "2025-03-31 18:30") is None
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("start_date, end_date", DATE_RANGES)
+def test_daily_rollup_matches_pandas(sales, filters, start_date, end_date):
+    rollup = DailyRollup(
+        sales, "transaction_date", MEASURES, SALES_DIMENSIONS, "transaction_id"
+    )
+
+    result = rollup.query(start_date, end_date, filters)
+
+    _assert_totals(result, _expected_totals(sales, filters, start_date, end_date))
+    assert isinstance(result["quantity"], int)
+    # Строки в полночь повторяют id транзакций
+    assert "orders" not in result
+
+
+def test_daily_rollup_with_missing_values_matches_pandas(sales):
+    # Строки без даты входят только в итоги без дат, без региона - ни в
+    # один фильтр по региону
+    df = sales.assign(
+        transaction_date=sales["transaction_date"].where(sales.index % 7 > 0),
+        region=sales["region"].where(sales.index % 5 > 0),
+    )
+    rollup = DailyRollup(df, "transaction_date", MEASURES, ["region"])
+
+    for filters in [{}, {"region": ["Moscow", "SPB"]}]:
+        for start_date, end_date in DATE_RANGES:
+            _assert_totals(
+                rollup.query(start_date, end_date, filters),
+                _expected_totals(df, filters, start_date, end_date),
+            )
+
+
+def test_daily_rollup_declines_unsupported_queries(sales):
+    rollup = DailyRollup(sales, "transaction_date", MEASURES, ["region"])
+
+    assert rollup.query(filters={"region": ["SPB"], "segment": ["new"]}) is None
+    assert rollup.query(filters={"segment": ["new"]}) is None
+    assert rollup.query("2025-02-10 08:00", "2025-02-20") is None
+
+
+def test_daily_rollup_counts_orders_when_ids_are_unique(data_manager):
+    df = data_manager.df_sales_fact
+    rollup = DailyRollup(df, "transaction_date", MEASURES, (), "transaction_id")
+
+    result = rollup.query("2025-04-01", "2025-04-30")
+
+    assert (
+        result["orders"]
+        == result["rows"]
+        == len(_selected(df, {}, "2025-04-01", "2025-04-30"))
+    )
+
+
+@pytest.mark.parametrize("start", [0, 1000, 2599])
+def test_appended_rollup_matches_rebuilt(sales, start):
+    old = DailyRollup(
+        sales.iloc[:start], "transaction_date", MEASURES, SALES_DIMENSIONS
+    )
+    appended = old.appended(sales, start)
+
+    for filters in FILTERS:
+        for start_date, end_date in DATE_RANGES:
+            _assert_totals(
+                appended.query(start_date, end_date, filters),
+                _expected_totals(sales, filters, start_date, end_date),
+            )
+
+
+def test_rollup_rebuilt_when_appended_rows_are_earlier(sales):
+    late = sales[sales["transaction_date"] >= "2025-06-01"].reset_index(drop=True)
+    early = sales[sales["transaction_date"] < "2025-06-01"]
+    df = pd.concat([late, early], ignore_index=True)
+    old = DailyRollup(late, "transaction_date", MEASURES, ["region"])
+
+    appended = old.appended(df, len(late))
+
+    _assert_totals(
+        appended.query("2025-01-01", "2025-03-31", {"region": ["Kazan"]}),
+        _expected_totals(df, {"region": ["Kazan"]}, "2025-01-01", "2025-03-31"),
+    )
+
+
+@pytest.mark.parametrize(
+    "filters",
+    FILTERS
+    + [
+        {"region": ["Moscow", "SPB"], "category": ["Food", "Home"]},
+        {"segment": ["new"], "supplier_name": ["Supplier_1"], "region": ["Kazan"]},
+    ],
+)
+@pytest.mark.parametrize(
+    "start_date, end_date", [(None, None), ("2024-06-01", "2026-03-01")]
+)
+def test_cube_matches_pandas_groupby(sales, filters, start_date, end_date):
+    cube = AggregateCube(
+        sales, "transaction_date", SALES_DIMENSIONS, MEASURES, "transaction_id"
+    )
+
+    _assert_totals(
+        cube.totals(filters, start_date, end_date),
+        _expected_totals(sales, filters, start_date, end_date),
+    )
+
+    selected = cube.select(filters, start_date, end_date)
+    by_region = selected.groupby("region", observed=True)[MEASURES].sum()
+    expected = (
+        _selected(sales, filters, start_date, end_date)
+        .groupby("region", observed=True)[MEASURES]
+        .sum()
+    )
+    pd.testing.assert_frame_equal(
+        by_region.sort_index(), expected.sort_index(), check_dtype=False
+    )
+
+
+def test_sparse_cube_matches_dense(sales):
+    df = sales.assign(region=sales["region"].where(sales.index % 9 > 0))
+    dense = AggregateCube(df, "transaction_date", SALES_DIMENSIONS, MEASURES)
+    sparse = AggregateCube(df, "transaction_date", SALES_DIMENSIONS, MEASURES)
+    sparse.DENSE_CELLS = 0
+    sparse.cube = sparse._aggregate(df)
+
+    pd.testing.assert_frame_equal(
+        sparse.cube.astype({k: str for k in SALES_DIMENSIONS})
+        .sort_values(SALES_DIMENSIONS)
+        .reset_index(drop=True),
+        dense.cube.astype({k: str for k in SALES_DIMENSIONS})
+        .sort_values(SALES_DIMENSIONS)
+        .reset_index(drop=True),
+        check_dtype=False,
+    )
+
+
+def test_cube_declines_ranges_inside_table(sales):
+    cube = AggregateCube(sales, "transaction_date", SALES_DIMENSIONS, MEASURES)
+    first = sales["transaction_date"].min()
+    last = sales["transaction_date"].max()
+
+    assert cube.totals(start_date=first, end_date=last) is not None
+    assert cube.totals(start_date="2025-02-10", end_date="2025-02-20") is None
+    assert cube.totals(start_date=first, end_date=last.normalize()) is None
+
+
+def test_cube_with_missing_dates_declines_date_ranges(sales):
+    undated = sales.assign(
+        transaction_date=sales["transaction_date"].where(sales.index > 0)
+    )
+    cube = AggregateCube(undated, "transaction_date", ["region"], MEASURES)
+
+    assert cube.totals()["rows"] == len(sales)
+    assert cube.totals(start_date="2024-01-01", end_date="2026-12-31") is None
+
+
+def test_cube_not_much_smaller_than_table_declines(sales):
+    small = AggregateCube(
+        sales, "transaction_date", ["region"], MEASURES, min_reduction=10
+    )
+    # На 2600 строках почти все комбинации пяти измерений уникальны
+    large = AggregateCube(
+        sales, "transaction_date", SALES_DIMENSIONS, MEASURES, min_reduction=10
+    )
+
+    assert small.totals() is not None
+    assert large.select() is None
+    assert large.totals() is None
+
+
+@pytest.mark.parametrize("start", [0, 1000, 2599])
+def test_appended_cube_matches_rebuilt(sales, start):
+    old = AggregateCube(
+        sales.iloc[:start], "transaction_date", SALES_DIMENSIONS, MEASURES
+    )
+    appended = old.appended(sales, start)
+    rebuilt = AggregateCube(sales, "transaction_date", SALES_DIMENSIONS, MEASURES)
+
+    keys = SALES_DIMENSIONS
+    pd.testing.assert_frame_equal(
+        appended.cube.astype({k: str for k in SALES_DIMENSIONS})
+        .sort_values(keys)
+        .reset_index(drop=True),
+        rebuilt.cube.astype({k: str for k in SALES_DIMENSIONS})
+        .sort_values(keys)
+        .reset_index(drop=True),
+    )
@@ -0,0 +1,60 @@
+import os
+
+import pandas as pd
+import pytest
+
+from core.schema import optimize_dtypes
+from tabs.operations.calculations import OperationsCalculations
+from tabs.sales.calculations import SalesCalculations
+
+
+def test_optimize_dtypes_downcasts_only_listed_columns():
+    df = pd.DataFrame(
+        {
+            "product_id": [1, 2, 3, 4],
+            "quantity": [1, 2, 3, 4],
+            "price": [100.0, 200.0, 300.0, 400.0],
+            "category": ["a", "a", "b", "a"],
+        }
+    )
+
+    result = optimize_dtypes(df, categories=["category"], downcast=["product_id"])
+
+    assert result["product_id"].dtype == "int8"
+    assert result["quantity"].dtype == "int64"
+    assert result["price"].dtype == "float64"
+    assert isinstance(result["category"].dtype, pd.CategoricalDtype)
+    assert df["product_id"].dtype == "int64"
+
+
+def test_integer_prices_do_not_overflow_revenue(data_copy, load_data):
+    products_path = os.path.join(data_copy, "products.csv")
+    products = pd.read_csv(products_path)
+    products["price"] = products["price"].round().astype("int64")
+    products.to_csv(products_path, index=False)
+
+    dm = load_data(data_copy)
+
+    sales = pd.read_csv(os.path.join(data_copy, "sales.csv"))
+    merged = sales.merge(products, on="product_id")
+    expected = (
+        merged["quantity"].astype("float64") * merged["price"].astype("float64")
+    ).sum()
+    assert (dm.df_sales_fact["revenue"] >= 0).all()
+    assert dm.df_sales_fact["revenue"].sum() == pytest.approx(expected, rel=1e-12)
+    assert SalesCalculations(dm).calculate_total_revenue() == pytest.approx(
+        expected, rel=1e-9
+    )
+
+    inventory = pd.read_csv(
+        os.path.join(data_copy, "inventory.csv"), parse_dates=["last_updated"]
+    )
+    latest = inventory.groupby("product_id")["last_updated"].max().reset_index()
+    latest = latest.merge(inventory, on=["product_id", "last_updated"])
+    latest = latest.merge(products[["product_id", "price"]], on="product_id")
+    expected_value = (
+        latest["stock_quantity"].astype("float64") * latest["price"].astype("float64")
+    ).sum()
+    assert OperationsCalculations(dm).calculate_inventory_value() == pytest.approx(
+        expected_value, rel=1e-9
+    )
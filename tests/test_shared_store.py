@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.data_manager import SHARED_TABLES
+from core.shared_store import SharedStore
+
+
+@pytest.fixture
+def sources(tmp_path):
+    path = tmp_path / "source.csv"
+    path.write_text("id\n1\n")
+    return [str(path)]
+
+
+def _table():
+    return pd.DataFrame(
+        {
+            "id": np.arange(5, dtype=np.int32),
+            "amount": [1.5, np.nan, 3.0, 4.25, 0.0],
+            "date": pd.to_datetime(
+                [
+                    "2025-01-01 00:00",
+                    None,
+                    "2025-03-01 12:30",
+                    "2025-04-01 08:15",
+                    "2025-05-01 00:00",
+                ]
+            ),
+            "flag": [True, False, True, True, False],
+            "region": pd.Categorical(["SPB", "Moscow", None, "SPB", "Kazan"]),
+            "grade": pd.Categorical(
+                ["low", "high", "low", "mid", "high"],
+                categories=["low", "mid", "high"],
+                ordered=True,
+            ),
+            "comment": ["a", None, "b", "a", "c"],
+        }
+    )
+
+
+def test_round_trip(tmp_path, sources):
+    store = SharedStore(str(tmp_path / "store"))
+    table = _table()
+
+    with store.lock():
+        version = store.publish(sources, {"table": table, "missing": None})
+    loaded_version, tables = store.load(sources)
+
+    assert loaded_version == version == store.current_version()
+    assert list(tables) == ["table"]
+    pd.testing.assert_frame_equal(tables["table"], table)
+    with pytest.raises(ValueError):
+        tables["table"]["id"].to_numpy()[0] = 10
+
+
+def test_load_rejects_changed_sources(tmp_path, sources):
+    store = SharedStore(str(tmp_path / "store"))
+    with store.lock():
+        store.publish(sources, {"table": _table()})
+
+    with open(sources[0], "a") as f:
+        f.write("2\n")
+
+    assert store.load(sources) == (None, None)
+
+
+def test_keeps_last_versions(tmp_path, sources):
+    store = SharedStore(str(tmp_path / "store"), keep=2)
+    with store.lock():
+        versions = [store.publish(sources, {"table": _table()}) for _ in range(4)]
+
+    remaining = sorted(
+        name
+        for name in os.listdir(store.root)
+        if not name.startswith(".") and name != SharedStore.CURRENT
+    )
+    assert remaining == versions[-2:]
+
+
+def test_rejects_unsupported_tables(tmp_path, sources):
+    store = SharedStore(str(tmp_path / "store"))
+    with store.lock():
+        with pytest.raises(ValueError):
+            store.publish(sources, {"table": _table().iloc[1:]})
+        with pytest.raises(TypeError):
+            store.publish(sources, {"table": pd.DataFrame({"mixed": [1, "a"]})})
+    assert store.current_version() is None
+
+
+def test_data_manager_tables_from_store(data_dir, tmp_path, load_data):
+    shared_dir = str(tmp_path / "shared")
+    publisher = load_data(data_dir, shared_dir=shared_dir)
+    reader = load_data(data_dir, shared_dir=shared_dir)
+    plain = load_data(data_dir)
+
+    assert reader.shared_version == publisher.shared_version is not None
+    for name in SHARED_TABLES:
+        pd.testing.assert_frame_equal(
+            getattr(reader, f"df_{name}"), getattr(plain, f"df_{name}"), obj=name
+        )
@@ -0,0 +1,116 @@
+import os
+import pickle
+
+import pandas as pd
+
+from core import data_manager
+from core.data_manager import FACT_SOURCES, SHARED_TABLES, DataManager
+from core.table_cache import TableCache
+
+
+class _Exploit:
+    """Объект pickle, который при чтении создает каталог marker"""
+
+    def __init__(self, marker):
+        self.marker = marker
+
+    def __reduce__(self):
+        return (os.mkdir, (self.marker,))
+
+
+def test_loads_same_tables_as_csv(data_copy, load_data, monkeypatch):
+    first = load_data(data_copy, use_cache=True)
+    plain = load_data(data_copy)
+
+    def read_csv_range(*args, **kwargs):
+        raise AssertionError("CSV разбирается, хотя есть кэш")
+
+    monkeypatch.setattr(data_manager, "read_csv_range", read_csv_range)
+    cached = load_data(data_copy, use_cache=True)
+
+    for name in SHARED_TABLES:
+        pd.testing.assert_frame_equal(
+            getattr(cached, f"df_{name}"), getattr(plain, f"df_{name}"), obj=name
+        )
+    assert cached.ingest_state == first.ingest_state
+
+
+def test_fact_tables_loaded_from_cache(data_copy, load_data, monkeypatch):
+    load_data(data_copy, use_cache=True)
+    plain = load_data(data_copy)
+
+    def build(self, *args):
+        raise AssertionError("денормализованная таблица строится, хотя есть кэш")
+
+    for fact in FACT_SOURCES:
+        monkeypatch.setattr(DataManager, f"_build_{fact}", build)
+    cached = load_data(data_copy, use_cache=True)
+
+    for fact in FACT_SOURCES:
+        pd.testing.assert_frame_equal(
+            getattr(cached, f"df_{fact}"), getattr(plain, f"df_{fact}"), obj=fact
+        )
+
+
+def test_changed_source_rebuilds_fact_tables(data_copy, load_data):
+    load_data(data_copy, use_cache=True)
+    path = os.path.join(data_copy, "products.csv")
+    products = pd.read_csv(path)
+    products["category"] = "Books"
+    products.to_csv(path, index=False)
+
+    cached = load_data(data_copy, use_cache=True)
+
+    assert set(cached.df_sales_fact["category"]) == {"Books"}
+    assert set(cached.df_returns_fact["category"]) == {"Books"}
+    assert set(cached.df_ad_fact["category"]) == {"Books"}
+
+
+def test_changed_source_or_schema_invalidates(tmp_path):
+    source = tmp_path / "table.csv"
+    source.write_text("id\n1\n")
+    cache = TableCache(str(tmp_path / ".cache"))
+    df = pd.DataFrame({"id": [1], "name": pd.Categorical(["a"])})
+    cache.save("table", [str(source)], df, schema={"v": 1}, meta={"rows": 1})
+
+    loaded, meta = cache.load("table", [str(source)], schema={"v": 1})
+    pd.testing.assert_frame_equal(loaded, df)
+    assert meta == {"rows": 1}
+    assert cache.load("table", [str(source)], schema={"v": 2}) == (None, None)
+    source.write_text("id\n1\n2\n")
+    assert cache.load("table", [str(source)], schema={"v": 1}) == (None, None)
+
+
+def test_never_unpickles_cache_files(tmp_path):
+    source = tmp_path / "table.csv"
+    source.write_text("id\n1\n")
+    cache_dir = tmp_path / ".cache"
+    cache = TableCache(str(cache_dir))
+    cache.save("table", [str(source)], pd.DataFrame({"id": [1], "name": ["a"]}))
+    marker = str(tmp_path / "executed")
+
+    # Подмена файлов кэша объектом pickle: чтение не исполняет его, а
+    # отказывается от кэша
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if name.endswith(".npy"):
+                with open(os.path.join(root, name), "wb") as f:
+                    pickle.dump(_Exploit(marker), f)
+
+    assert cache.load("table", [str(source)]) == (None, None)
+    assert not os.path.exists(marker)
+
+
+def test_save_keeps_only_current_data(tmp_path):
+    source = tmp_path / "table.csv"
+    source.write_text("id\n1\n")
+    cache_dir = tmp_path / ".cache"
+    cache = TableCache(str(cache_dir))
+
+    for value in (1, 2, 3):
+        cache.save("table", [str(source)], pd.DataFrame({"id": [value]}))
+    cache.save("table_fact", [str(source)], pd.DataFrame({"id": [0]}))
+
+    assert len(os.listdir(cache_dir)) == 4
+    loaded, _ = cache.load("table", [str(source)])
+    assert loaded["id"].tolist() == [3]
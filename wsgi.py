@@ -0,0 +1,7 @@
+from app import create_app
+
+# Точка входа для продакшена: gunicorn -c gunicorn.conf.py wsgi:server
+# Данные загружаются один раз при импорте модуля в мастере gunicorn, воркеры
+# получают их через fork (см. gunicorn.conf.py)
+app = create_app()
+server = app.server